@@ -1,10 +1,14 @@
 from flask import Flask, jsonify
-from asgiref.wsgi import WsgiToAsgi
 import os
 import logging
 from logging.handlers import RotatingFileHandler
 
 from config import settings
+from middlewares.admission import AdmissionController
+from middlewares.book_stream import BookStream
+from middlewares.lifespan import Lifespan
+from middlewares.wsgi_threads import ThreadedWsgiToAsgi
+from utils.exceptions import ServiceUnavailableError
 
 
 def create_app():
@@ -30,13 +34,47 @@ def create_app():
         app.logger.addHandler(file_handler)
         app.logger.setLevel(logging.INFO)
 
+    # Response Compression
+    from middlewares.compression import Compress
+    Compress(app)
+
+    # Routing query baca ke replica (read-your-writes per sesi)
+    from middlewares.read_routing import ReadRouting
+    ReadRouting(app)
+
     # Blueprints
     from routes.book_routes import book_bp
     from routes.peminjaman_routes import peminjaman_bp
     from routes.user_routes import user_bp
+    from routes.report_routes import report_bp
+    from routes.popular_book_routes import popular_book_bp
+    from routes.metrics_routes import metrics_bp
     app.register_blueprint(book_bp)
     app.register_blueprint(peminjaman_bp)
     app.register_blueprint(user_bp)
+    app.register_blueprint(report_bp)
+    app.register_blueprint(popular_book_bp)
+    app.register_blueprint(metrics_bp)
+
+    # Invalidasi cache in-process lintas worker (socket Unix + polling entity_versions)
+    if settings.invalidation.INVALIDATION_ENABLED:
+        from utils.invalidation import start_bus
+        start_bus()
+
+    # Indeks pencarian fuzzy dibangun di background; sebelum siap,
+    # /books/search?fuzzy=true memakai pencarian LIKE biasa
+    if settings.search_index.TRIGRAM_INDEX_ON_STARTUP:
+        from services.book_services import schedule_index_build
+        schedule_index_build()
+
+    # Database tidak tersedia (circuit breaker terbuka/retry habis) di route
+    # mana pun: 503 + Retry-After seperti load shedding di AdmissionController
+    @app.errorhandler(ServiceUnavailableError)
+    def handle_service_unavailable(e):
+        return jsonify({
+            'error': 'Service Unavailable',
+            'message': str(e)
+        }), 503, {'Retry-After': str(e.retry_after or 1)}
 
     # Health Check
     @app.route('/health')
@@ -47,7 +85,10 @@ def create_app():
 
 
 app = create_app()
-asgi_app = WsgiToAsgi(app)
+# Admission control di lapisan ASGI, sebelum request menunggu thread WSGI;
+# stream SSE /books/stream dilayani di depannya tanpa thread WSGI; pool
+# bersama worker ditutup saat shutdown (lifespan)
+asgi_app = Lifespan(BookStream(AdmissionController(ThreadedWsgiToAsgi(app, settings.server.WSGI_THREADS))))
 
 if __name__ == '__main__':
     app.run(
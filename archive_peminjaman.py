@@ -0,0 +1,74 @@
+"""Arsipkan peminjaman yang sudah dikembalikan ke tabel peminjaman_history.
+
+Baris dipindah per batch (INSERT ... SELECT + DELETE dalam satu transaksi)
+dengan jeda antar batch, sehingga aman dijalankan saat aplikasi melayani
+request. Riwayat user, laporan, dan analitik membaca kedua tabel.
+
+    python archive_peminjaman.py --dry-run
+    python archive_peminjaman.py --older-than-days 365 --batch-size 1000
+    # cron harian: 0 3 * * * cd /app && python archive_peminjaman.py
+
+Butuh migrasi 0007 (python migrate.py up). Dengan DB_SHARD_MAP setiap node
+shard diarsip bergantian.
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+
+from config import settings, get_db_pool
+from dao.peminjaman_dao import PeminjamanDAO
+from dao.sharding import ShardRouter
+
+
+async def archive_node(dao, cutoff, args):
+    pending = await dao.count_archivable(cutoff)
+    print(f"{pending} peminjaman dikembalikan dengan tgl_pinjam < {cutoff}")
+    if args.dry_run or not pending:
+        return
+
+    total = batches = 0
+    started = time.perf_counter()
+    while not args.max_batches or batches < args.max_batches:
+        moved = await dao.archive_returned(cutoff, args.batch_size)
+        if not moved:
+            break
+        total += moved
+        batches += 1
+        elapsed = time.perf_counter() - started
+        print(f"  batch {batches}: {total}/{pending} baris ({total / elapsed:,.0f} baris/detik)", flush=True)
+        await asyncio.sleep(args.pause_ms / 1000.0)
+    print(f"Selesai: {total} baris dipindah ke peminjaman_history dalam {time.perf_counter() - started:.1f}s")
+
+
+async def run(args):
+    cutoff = date.today() - timedelta(days=args.older_than_days)
+    pool = await get_db_pool()
+    router = ShardRouter(pool)
+    try:
+        for node, node_pool in zip(['default'] + router.nodes, await router.all_pools()):
+            if router.nodes:
+                print(f"== node {node}")
+            await archive_node(PeminjamanDAO(node_pool), cutoff, args)
+    finally:
+        router.close()
+        pool.close()
+        await router.wait_closed()
+        await pool.wait_closed()
+
+
+def main(argv=None):
+    config = settings.archive
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--older-than-days', type=int, default=config.ARCHIVE_AFTER_DAYS,
+                        help='arsipkan peminjaman dengan tgl_pinjam lebih tua dari N hari')
+    parser.add_argument('--batch-size', type=int, default=config.ARCHIVE_BATCH_SIZE)
+    parser.add_argument('--pause-ms', type=int, default=config.ARCHIVE_PAUSE_MS, help='jeda antar batch')
+    parser.add_argument('--max-batches', type=int, default=0, help='berhenti setelah N batch (0 = sampai habis)')
+    parser.add_argument('--dry-run', action='store_true', help='hanya hitung baris yang akan diarsip')
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
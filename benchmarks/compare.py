@@ -0,0 +1,72 @@
+"""Bandingkan dua file hasil benchmark (mis. main vs branch).
+
+    python -m benchmarks.compare bench_results/main.json bench_results/head.json \\
+        --fail-over 10
+"""
+import argparse
+import json
+import sys
+
+
+def _delta(before, after):
+    if not before or after is None:
+        return None
+    return round((after - before) * 100.0 / before, 1)
+
+
+def compare(baseline, candidate):
+    rows = []
+    labels = sorted(set(baseline['endpoints']) | set(candidate['endpoints']))
+    for label in labels + ['TOTAL']:
+        if label == 'TOTAL':
+            old, new = baseline['overall'], candidate['overall']
+        else:
+            old = baseline['endpoints'].get(label)
+            new = candidate['endpoints'].get(label)
+        if not old or not new:
+            rows.append((label, None))
+            continue
+        rows.append((label, {
+            'rps': _delta(old['throughput_rps'], new['throughput_rps']),
+            'p50': _delta(old['latency_ms']['p50'], new['latency_ms']['p50']),
+            'p95': _delta(old['latency_ms']['p95'], new['latency_ms']['p95']),
+            'p99': _delta(old['latency_ms']['p99'], new['latency_ms']['p99']),
+        }))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--fail-over', type=float, default=None,
+                        help='exit 1 jika p95 endpoint mana pun naik lebih dari persen ini')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline : {baseline['meta'].get('git_revision')} ({baseline['meta']['mix']})")
+    print(f"candidate: {candidate['meta'].get('git_revision')} ({candidate['meta']['mix']})")
+    print(f"{'endpoint':<36}{'rps %':>9}{'p50 %':>9}{'p95 %':>9}{'p99 %':>9}")
+
+    regressions = []
+    for label, delta in compare(baseline, candidate):
+        if delta is None:
+            print(f"{label:<36}{'(hanya di salah satu file)':>36}")
+            continue
+        fmt = lambda v: f"{v:+.1f}" if v is not None else '-'
+        print(f"{label:<36}{fmt(delta['rps']):>9}{fmt(delta['p50']):>9}"
+              f"{fmt(delta['p95']):>9}{fmt(delta['p99']):>9}")
+        if args.fail_over is not None and delta['p95'] is not None and delta['p95'] > args.fail_over:
+            regressions.append(label)
+
+    if regressions:
+        print(f"\nRegresi p95 > {args.fail_over}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
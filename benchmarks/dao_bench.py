@@ -0,0 +1,162 @@
+"""Micro-benchmark DAO terhadap stand-in SQLite in-process.
+
+Mengukur biaya sisi Python per operasi DAO (acquire, cursor, terjemahan
+query, konversi baris) tanpa MySQL. Baris `raw.execute` adalah baseline
+eksekusi SQLite langsung; selisih terhadap baseline adalah overhead DAO.
+
+    python -m benchmarks.dao_bench --books 5000 --iterations 2000 \\
+        --output bench_results/dao_bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import date, timedelta
+
+from dao.book_dao import BookDAO
+from dao.peminjaman_dao import PeminjamanDAO
+from dao.popular_book_dao import PopularBookDAO
+from dao.replicas import ReplicaRouter
+from dao.report_dao import ReportDAO
+from dao.sqlite_pool import SQLitePool
+from dao.user_dao import UserDAO
+from benchmarks.load_test import percentile, git_revision
+
+
+def seed(pool, books, users, loans, rng):
+    pool.run_many(
+        "INSERT INTO books (judul, pengarang, stok, tahun_terbit) VALUES (%s, %s, %s, %s)",
+        [(f"Judul Buku {i}", f"Pengarang {i % 400}", 1000000, 1950 + i % 70) for i in range(books)]
+    )
+    pool.run_many(
+        "INSERT INTO users (username, password, role) VALUES (%s, %s, %s)",
+        [(f"member{i:06d}", "x" * 60, 'user') for i in range(users)]
+    )
+    start = date(2022, 1, 1)
+    rows = []
+    for _ in range(loans):
+        pinjam = start + timedelta(days=rng.randint(0, 1000))
+        rows.append((
+            rng.randint(1, users), rng.randint(1, books), pinjam,
+            pinjam + timedelta(days=rng.randint(1, 30)), 'dikembalikan'
+        ))
+    pool.run_many(
+        """INSERT INTO peminjaman (user_id, book_id, tgl_pinjam, tgl_kembali, status)
+        VALUES (%s, %s, %s, %s, %s)""",
+        rows
+    )
+
+
+def build_operations(pool, books, users, rng):
+    # DAO meminta koneksi dengan acquire(read_only=...) seperti dari get_db_pool()
+    pool = ReplicaRouter(pool)
+    book_dao = BookDAO(pool)
+    peminjaman_dao = PeminjamanDAO(pool)
+    user_dao = UserDAO(pool)
+    report_dao = ReportDAO(pool)
+    popular_dao = PopularBookDAO(pool)
+
+    async def raw_execute():
+        pool.run("SELECT id FROM books WHERE id = %s", (rng.randint(1, books),))
+
+    async def borrow_and_return():
+        peminjaman_id = await peminjaman_dao.add_peminjaman(
+            rng.randint(1, users), rng.randint(1, books), date.today()
+        )
+        await peminjaman_dao.kembalikan_buku(peminjaman_id)
+
+    # (nama, coroutine factory, faktor iterasi)
+    return [
+        ('raw.execute', raw_execute, 1.0),
+        ('BookDAO.get_book_by_id', lambda: book_dao.get_book_by_id(rng.randint(1, books)), 1.0),
+        ('BookDAO.get_book_version', lambda: book_dao.get_book_version(rng.randint(1, books)), 1.0),
+        ('BookDAO.get_all_books', lambda: book_dao.get_all_books(rng.randint(1, 50), 20), 1.0),
+        ('BookDAO.search_books', lambda: book_dao.search_books(f"Buku {rng.randint(10, 99)}"), 0.1),
+        ('BookDAO.adjust_stock', lambda: book_dao.adjust_stock(rng.randint(1, books), 1), 1.0),
+        ('BookDAO.update_book', lambda: book_dao.update_book(rng.randint(1, books), stok=1000000), 1.0),
+        ('PeminjamanDAO.get_peminjaman_by_user',
+         lambda: peminjaman_dao.get_peminjaman_by_user(rng.randint(1, users)), 0.5),
+        ('PeminjamanDAO.is_book_dipinjam',
+         lambda: peminjaman_dao.is_book_dipinjam(rng.randint(1, users), rng.randint(1, books)), 1.0),
+        ('PeminjamanDAO.add+kembalikan', borrow_and_return, 0.5),
+        ('UserDAO.get_by_id', lambda: user_dao.get_by_id(rng.randint(1, users)), 1.0),
+        ('UserDAO.get_by_username', lambda: user_dao.get_by_username(f"member{rng.randint(0, users - 1):06d}"), 1.0),
+        ('ReportDAO.generate_report',
+         lambda: report_dao.generate_report(start_date=date(2024, 1, 1), end_date=date(2024, 1, 7)), 0.05),
+        ('ReportDAO.get_filter_options', report_dao.get_filter_options, 0.02),
+        ('PopularBookDAO.get_popular_books', lambda: popular_dao.get_popular_books(2023, 10), 0.05),
+    ]
+
+
+async def measure(factory, iterations, warmup):
+    for _ in range(warmup):
+        await factory()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await factory()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    to_us = lambda v: round(v * 1e6, 2)
+    total = sum(samples)
+    return {
+        'iterations': iterations,
+        'ops_per_s': round(iterations / total, 1) if total else None,
+        'mean_us': to_us(total / iterations),
+        'p50_us': to_us(percentile(samples, 50)),
+        'p99_us': to_us(percentile(samples, 99)),
+    }
+
+
+async def run(args):
+    rng = random.Random(args.random_seed)
+    pool = SQLitePool(':memory:')
+    seed(pool, args.books, args.users, args.loans, rng)
+
+    results = {}
+    for name, factory, factor in build_operations(pool, args.books, args.users, rng):
+        if args.only and args.only not in name:
+            continue
+        iterations = max(int(args.iterations * factor), 10)
+        results[name] = await measure(factory, iterations, warmup=max(iterations // 10, 1))
+    pool.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--loans', type=int, default=5000)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--only', help='hanya operasi yang namanya mengandung teks ini')
+    parser.add_argument('--random-seed', type=int, default=1234)
+    parser.add_argument('--output', default='bench_results/dao_bench.json')
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+
+    print(f"{'operasi':<40}{'ops/s':>12}{'mean us':>12}{'p50 us':>12}{'p99 us':>12}")
+    for name, item in results.items():
+        print(f"{name:<40}{item['ops_per_s']:>12}{item['mean_us']:>12}{item['p50_us']:>12}{item['p99_us']:>12}")
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({
+            'meta': {
+                'git_revision': git_revision(),
+                'books': args.books,
+                'users': args.users,
+                'loans': args.loans,
+            },
+            'operations': results,
+        }, f, indent=2)
+    print(f"\nHasil ditulis ke {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+"""Generator data sintetis deterministik untuk uji skala.
+
+Menghasilkan buku, user, dan riwayat peminjaman multi-tahun dengan
+popularitas buku mengikuti distribusi Zipf (sebagian kecil judul mendominasi
+peminjaman), aktivitas user yang juga timpang, serta pola musiman (libur
+sekolah Juni-Juli dan Desember, akhir pekan lebih ramai). Seed yang sama
+dan argumen yang sama selalu menghasilkan data yang sama.
+
+    # file TSV + load.sql untuk LOAD DATA (tercepat untuk MySQL)
+    python -m benchmarks.generate_data --books 1000000 --users 500000 \\
+        --loans 5000000 --tsv-dir bench_data
+
+    # batch INSERT langsung ke MySQL (.env) atau ke stand-in SQLite
+    python -m benchmarks.generate_data --books 200000 --loans 1000000 --mysql
+    python -m benchmarks.generate_data --books 50000 --sqlite bench.db
+
+Semua user sintetis memakai password GENERATED_PASSWORD (satu hash bcrypt
+dipakai bersama agar tidak perlu hashing jutaan kali; salt-nya diturunkan
+dari seed). Peminjaman berstatus dipinjam sudah mengurangi books.stok dan
+tidak pernah melebihi stok; satu user tidak meminjam buku yang sama dua kali
+secara bersamaan. Tabel tujuan harus kosong karena id ditulis eksplisit;
+gunakan --truncate untuk mengosongkan.
+"""
+import argparse
+import itertools
+import os
+import random
+import time
+from array import array
+from datetime import date, timedelta
+
+import bcrypt
+
+from utils.passwords import configured_rounds
+
+GENERATED_PASSWORD = 'Member123'
+# Tanggal akhir default tetap: output tidak boleh bergantung pada hari dijalankan
+DEFAULT_END_DATE = date(2025, 12, 31)
+# Alfabet base64 bcrypt; karakter salt terakhir hanya membawa 2 bit
+BCRYPT_ALPHABET = './ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+BCRYPT_LAST_CHARS = '.Oeu'
+MAX_STOCK = 30
+
+TITLE_WORDS = [
+    'Laskar', 'Pelangi', 'Bumi', 'Manusia', 'Negeri', 'Lima', 'Menara', 'Cantik', 'Itu', 'Luka',
+    'Ronggeng', 'Dukuh', 'Paruk', 'Perahu', 'Kertas', 'Hujan', 'Senja', 'Rumah', 'Kaca', 'Langit',
+    'Matahari', 'Bulan', 'Bintang', 'Jejak', 'Langkah', 'Anak', 'Semua', 'Bangsa', 'Pulang', 'Laut',
+    'Bercerita', 'Garis', 'Waktu', 'Filosofi', 'Kopi', 'Sang', 'Pemimpi', 'Edensor', 'Ayat', 'Cinta',
+    'Shadow', 'Kingdom', 'Secret', 'Garden', 'River', 'Winter', 'Silent', 'Night', 'Lost', 'City',
+    'History', 'Modern', 'Data', 'Science', 'Journey', 'Stone', 'Fire', 'Dream', 'Empire', 'Island',
+]
+FIRST_NAMES = [
+    'Andrea', 'Pramoedya', 'Tere', 'Dewi', 'Ahmad', 'Eka', 'Ayu', 'Leila', 'Okky', 'Seno',
+    'Sapardi', 'Habiburrahman', 'Dee', 'Sitor', 'Chairil', 'Laksmi', 'Intan', 'Budi', 'Sri', 'Putu',
+    'George', 'Jane', 'Stephen', 'Agatha', 'Haruki', 'Paulo', 'Yuval', 'James', 'Mary', 'Neil',
+]
+LAST_NAMES = [
+    'Hirata', 'Toer', 'Liye', 'Lestari', 'Tohari', 'Kurniawan', 'Utami', 'Chudori', 'Madasari',
+    'Ajidarma', 'Djoko', 'Shirazy', 'Situmorang', 'Anwar', 'Pamuntjak', 'Paramaditha', 'Santoso',
+    'Wijaya', 'Orwell', 'Austen', 'King', 'Christie', 'Murakami', 'Coelho', 'Harari', 'Clear',
+    'Shelley', 'Gaiman', 'Rowling', 'Tolkien',
+]
+
+# Bobot relatif per bulan (Jan..Des): puncak libur sekolah dan akhir tahun
+MONTH_WEIGHTS = [0.9, 0.85, 0.95, 1.0, 0.95, 1.25, 1.3, 1.0, 1.05, 1.0, 0.95, 1.15]
+# Bobot per hari (Senin..Minggu)
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 1.0, 1.05, 1.35, 0.6]
+# Pertumbuhan peminjaman per tahun
+YEARLY_GROWTH = 1.08
+# Peminjaman dalam N hari terakhir sebagian besar masih berstatus dipinjam
+ACTIVE_WINDOW_DAYS = 30
+ACTIVE_RATIO = 0.6
+
+
+def zipf_cum_weights(count, exponent, rng):
+    """Bobot kumulatif Zipf dengan peringkat diacak (id populer tersebar)"""
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in ranks))
+
+
+def day_cum_weights(start, end):
+    days, weights = [], []
+    current = start
+    while current <= end:
+        days.append(current)
+        weights.append(
+            MONTH_WEIGHTS[current.month - 1]
+            * WEEKDAY_WEIGHTS[current.weekday()]
+            * YEARLY_GROWTH ** (current.year - start.year)
+        )
+        current += timedelta(days=1)
+    return days, list(itertools.accumulate(weights))
+
+
+def generated_password_hash(seed):
+    """Hash bcrypt GENERATED_PASSWORD dengan salt dari seed (sama untuk seed
+    dan BCRYPT_ROUNDS yang sama)"""
+    rng = random.Random(f"{seed}:password")
+    chars = ''.join(rng.choice(BCRYPT_ALPHABET) for _ in range(21)) + rng.choice(BCRYPT_LAST_CHARS)
+    salt = f"$2b${configured_rounds():02d}${chars}".encode('ascii')
+    return bcrypt.hashpw(GENERATED_PASSWORD.encode('utf-8'), salt).decode('utf-8')
+
+
+def initial_stock(count, rng):
+    """Stok awal per buku (indeks id - 1); dikurangi generate_loans"""
+    return array('H', (rng.randint(1, MAX_STOCK) for _ in range(count)))
+
+
+def generate_books(count, stock, rng):
+    """stock harus sudah dikurangi peminjaman aktif (tulis setelah peminjaman)"""
+    for book_id in range(1, count + 1):
+        words = rng.sample(TITLE_WORDS, rng.randint(2, 4))
+        judul = f"{' '.join(words)} {book_id}"[:100]
+        pengarang = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        yield (book_id, judul, pengarang, stock[book_id - 1], rng.randint(1950, 2025))
+
+
+def generate_users(count, password_hash, rng):
+    for user_id in range(1, count + 1):
+        role = 'admin' if rng.random() < 0.002 else 'user'
+        yield (user_id, f"member{user_id:07d}", password_hash, role)
+
+
+def generate_loans(count, books, users, stock, start, end, rng, book_skew, user_skew, batch=10000):
+    """Riwayat peminjaman: buku & user Zipf, tanggal musiman.
+
+    Peminjaman aktif mengurangi stock; jika stok habis atau user masih
+    meminjam buku yang sama, peminjaman itu dibuat sudah dikembalikan.
+    """
+    book_ids = range(1, books + 1)
+    user_ids = range(1, users + 1)
+    book_weights = zipf_cum_weights(books, book_skew, rng)
+    user_weights = zipf_cum_weights(users, user_skew, rng)
+    days, day_weights = day_cum_weights(start, end)
+    active_from = end - timedelta(days=ACTIVE_WINDOW_DAYS)
+    active = set()
+
+    loan_id = 0
+    while loan_id < count:
+        size = min(batch, count - loan_id)
+        chosen_books = rng.choices(book_ids, cum_weights=book_weights, k=size)
+        chosen_users = rng.choices(user_ids, cum_weights=user_weights, k=size)
+        chosen_days = rng.choices(days, cum_weights=day_weights, k=size)
+        for book_id, user_id, tgl_pinjam in zip(chosen_books, chosen_users, chosen_days):
+            loan_id += 1
+            if (
+                tgl_pinjam >= active_from and rng.random() < ACTIVE_RATIO
+                and stock[book_id - 1] > 0 and (user_id, book_id) not in active
+            ):
+                stock[book_id - 1] -= 1
+                active.add((user_id, book_id))
+                yield (loan_id, user_id, book_id, tgl_pinjam, None, 'dipinjam')
+                continue
+            # Durasi log-normal: kebanyakan 1-2 minggu, ekor panjang
+            duration = min(int(rng.lognormvariate(2.1, 0.6)) + 1, 90)
+            tgl_kembali = min(tgl_pinjam + timedelta(days=duration), end)
+            yield (loan_id, user_id, book_id, tgl_pinjam, tgl_kembali, 'dikembalikan')
+
+
+TABLES = {
+    'users': ('id', 'username', 'password', 'role'),
+    'books': ('id', 'judul', 'pengarang', 'stok', 'tahun_terbit'),
+    'peminjaman': ('id', 'user_id', 'book_id', 'tgl_pinjam', 'tgl_kembali', 'status'),
+}
+
+
+def batched(rows, size):
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _tsv_value(value):
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+class TsvWriter:
+    """File TSV per tabel + load.sql berisi statement LOAD DATA"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, table, rows):
+        path = os.path.join(self.directory, f'{table}.tsv')
+        count = 0
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            for row in rows:
+                f.write('\t'.join(_tsv_value(value) for value in row) + '\n')
+                count += 1
+        return count
+
+    def finish(self):
+        statements = ["SET unique_checks = 0;", "SET foreign_key_checks = 0;"]
+        for table, columns in TABLES.items():
+            path = os.path.abspath(os.path.join(self.directory, f'{table}.tsv'))
+            statements.append(
+                f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE {table}\n"
+                "    CHARACTER SET utf8mb4\n"
+                "    FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'\n"
+                f"    ({', '.join(columns)});"
+            )
+        statements += ["SET foreign_key_checks = 1;", "SET unique_checks = 1;"]
+        path = os.path.join(self.directory, 'load.sql')
+        with open(path, 'w') as f:
+            f.write('\n'.join(statements) + '\n')
+        print(f"Muat dengan: mysql --local-infile=1 <db> < {path}")
+
+
+class MySQLWriter:
+    """Batch INSERT multi-row via pymysql (executemany menggabungkan VALUES)"""
+
+    def __init__(self, batch_size, truncate):
+        import pymysql
+        from config import get_sync_db_config
+
+        self.batch_size = batch_size
+        self.connection = pymysql.connect(**get_sync_db_config(), autocommit=False)
+        with self.connection.cursor() as cursor:
+            cursor.execute("SET unique_checks = 0")
+            cursor.execute("SET foreign_key_checks = 0")
+            if truncate:
+                for table in ('peminjaman_history', 'peminjaman', 'books', 'users'):
+                    cursor.execute(f"TRUNCATE TABLE {table}")
+        _require_empty(lambda table: self._count(table))
+
+    def _count(self, table):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            return cursor.fetchone()[0]
+
+    def write(self, table, rows):
+        columns = TABLES[table]
+        query = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                 f"VALUES ({', '.join(['%s'] * len(columns))})")
+        count = 0
+        with self.connection.cursor() as cursor:
+            for batch in batched(rows, self.batch_size):
+                cursor.executemany(query, batch)
+                self.connection.commit()
+                count += len(batch)
+        return count
+
+    def finish(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("SET foreign_key_checks = 1")
+            cursor.execute("SET unique_checks = 1")
+        self.connection.close()
+
+
+class SQLiteWriter:
+    def __init__(self, path, batch_size, truncate):
+        from dao.sqlite_pool import SQLitePool
+
+        self.batch_size = batch_size
+        self.pool = SQLitePool(path)
+        if truncate:
+            for table in ('peminjaman_history', 'peminjaman', 'refresh_tokens', 'books', 'users'):
+                self.pool.run(f"DELETE FROM {table}")
+        _require_empty(lambda table: self.pool.run(f"SELECT COUNT(*) AS total FROM {table}")[0][0]['total'])
+        # peminjaman ditulis sebelum books (lihat main)
+        self.pool.run("PRAGMA foreign_keys = OFF")
+
+    def write(self, table, rows):
+        columns = TABLES[table]
+        query = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                 f"VALUES ({', '.join(['%s'] * len(columns))})")
+        count = 0
+        for batch in batched(rows, self.batch_size):
+            self.pool.run_many(query, batch)
+            count += len(batch)
+        return count
+
+    def finish(self):
+        self.pool.run("PRAGMA foreign_keys = ON")
+        self.pool.close()
+
+
+def _require_empty(count):
+    for table in TABLES:
+        if count(table):
+            raise SystemExit(f"Tabel {table} tidak kosong; gunakan --truncate")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--loans', type=int, default=1000000)
+    parser.add_argument('--years', type=int, default=5, help='panjang riwayat peminjaman (tahun)')
+    parser.add_argument('--end-date', type=date.fromisoformat, default=DEFAULT_END_DATE,
+                        help=f'tanggal peminjaman terakhir (YYYY-MM-DD, default {DEFAULT_END_DATE})')
+    parser.add_argument('--book-skew', type=float, default=1.1, help='eksponen Zipf popularitas buku')
+    parser.add_argument('--user-skew', type=float, default=0.8, help='eksponen Zipf aktivitas user')
+    parser.add_argument('--random-seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--tsv-dir', metavar='DIR', help='tulis TSV + load.sql untuk LOAD DATA')
+    output.add_argument('--mysql', action='store_true', help='batch INSERT ke MySQL dari .env')
+    output.add_argument('--sqlite', metavar='PATH', help='batch INSERT ke stand-in SQLite')
+    parser.add_argument('--truncate', action='store_true', help='kosongkan tabel tujuan lebih dulu')
+    args = parser.parse_args(argv)
+
+    if args.tsv_dir:
+        writer = TsvWriter(args.tsv_dir)
+    elif args.mysql:
+        writer = MySQLWriter(args.batch_size, args.truncate)
+    else:
+        writer = SQLiteWriter(args.sqlite, args.batch_size, args.truncate)
+
+    start = date(args.end_date.year - args.years + 1, 1, 1)
+    # Setiap tabel punya RNG sendiri agar mengubah satu jumlah tidak
+    # menggeser data tabel lain
+    rng = {table: random.Random(f"{args.random_seed}:{table}") for table in TABLES}
+    password_hash = generated_password_hash(args.random_seed)
+    stock = initial_stock(args.books, random.Random(f"{args.random_seed}:stok"))
+
+    # Urutan penting: books baru ditulis setelah peminjaman aktif mengurangi stock
+    sources = {
+        'users': generate_users(args.users, password_hash, rng['users']),
+        'peminjaman': generate_loans(
+            args.loans, args.books, args.users, stock, start, args.end_date,
+            rng['peminjaman'], args.book_skew, args.user_skew
+        ),
+        'books': generate_books(args.books, stock, rng['books']),
+    }
+
+    total_started = time.perf_counter()
+    for table, rows in sources.items():
+        started = time.perf_counter()
+        count = writer.write(table, rows)
+        elapsed = time.perf_counter() - started
+        print(f"{table:<11}{count:>12} baris {elapsed:>8.1f}s ({count / elapsed if elapsed else 0:,.0f} baris/detik)")
+    writer.finish()
+    print(f"Selesai dalam {time.perf_counter() - total_started:.1f}s "
+          f"(peminjaman {start} s/d {args.end_date}, password user: {GENERATED_PASSWORD})")
+
+
+if __name__ == '__main__':
+    main()
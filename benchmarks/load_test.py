@@ -0,0 +1,400 @@
+"""Load test end-to-end untuk app:asgi_app.
+
+Menjalankan campuran skenario (browse katalog, search, login, pinjam/kembali,
+laporan) dengan N koneksi keep-alive paralel, lalu menulis throughput dan
+latensi p50/p95/p99 per endpoint ke file JSON.
+
+Contoh (dari root repo, database sudah berisi init.sql):
+    python -m benchmarks.load_test --spawn --seed --mix mixed \\
+        --duration 30 --concurrency 32 --output bench_results/head.json
+
+Tanpa MySQL, gunakan stand-in SQLite (file dipakai bersama oleh semua worker):
+    python -m benchmarks.load_test --spawn --seed --backend sqlite
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEARCH_TERMS = ['the', 'harry', 'tolkien', 'pramoedya', 'laskar', 'orwell', 'king', 'ma']
+
+MIXES = {
+    'catalog': {'browse': 70, 'search': 30},
+    'mixed': {'browse': 45, 'search': 25, 'login': 10, 'borrow_return': 15, 'reports': 5},
+    'write-heavy': {'borrow_return': 60, 'browse': 30, 'login': 10},
+    'reports': {'reports': 80, 'browse': 20},
+}
+
+DEFAULT_CREDENTIALS = {
+    'admin': ('bench_admin', 'BenchAdmin1'),
+    'user': ('bench_user', 'BenchUser1'),
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile dari list yang sudah terurut"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Stats:
+    """Rekaman latensi per endpoint untuk satu thread worker"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    def record(self, label, status, elapsed, ok):
+        self.latencies[label].append(elapsed)
+        self.statuses[label][status] += 1
+        if not ok:
+            self.errors[label] += 1
+
+    def merge(self, other):
+        for label, values in other.latencies.items():
+            self.latencies[label].extend(values)
+        for label, codes in other.statuses.items():
+            for code, count in codes.items():
+                self.statuses[label][code] += count
+        for label, count in other.errors.items():
+            self.errors[label] += count
+
+
+class Session:
+    """Satu koneksi HTTP keep-alive milik satu thread worker"""
+
+    def __init__(self, host, port, tokens, credentials, rng, timeout=30):
+        self.host = host
+        self.port = port
+        self.tokens = tokens
+        self.credentials = credentials
+        self.rng = rng
+        self.timeout = timeout
+        self.stats = Stats()
+        self.recording = False
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._conn
+
+    def call(self, label, method, path, body=None, role=None, expect=(200,)):
+        headers = {'Accept-Encoding': 'identity'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if role:
+            headers['Authorization'] = f"Bearer {self.tokens[role]}"
+
+        started = time.perf_counter()
+        try:
+            conn = self._connection()
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            raw = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            # Koneksi putus: catat sebagai error dan buka ulang pada request berikutnya
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+            status, raw = 0, b''
+        elapsed = time.perf_counter() - started
+
+        if self.recording:
+            self.stats.record(label, status, elapsed, status in expect)
+
+        try:
+            data = json.loads(raw) if raw else None
+        except ValueError:
+            data = None
+        return status, data
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+# Skenario
+
+def scenario_browse(session):
+    page = session.rng.randint(1, 5)
+    status, data = session.call('GET /books', 'GET', f'/books?page={page}&per_page=10')
+    books = (data or {}).get('data') or []
+    book_id = session.rng.choice(books)['id'] if books else session.rng.randint(1, 50)
+    session.call('GET /books/<id>', 'GET', f'/books/{book_id}', expect=(200, 404))
+
+
+def scenario_search(session):
+    term = session.rng.choice(SEARCH_TERMS)
+    session.call('GET /books/search', 'GET', f'/books/search?q={term}')
+
+
+def scenario_login(session):
+    username, password = session.credentials['user']
+    session.call('POST /login', 'POST', '/login', body={'username': username, 'password': password})
+
+
+def scenario_borrow_return(session):
+    book_id = session.rng.randint(1, 50)
+    status, data = session.call(
+        'POST /peminjaman', 'POST', '/peminjaman',
+        body={'book_id': book_id}, role='user', expect=(201, 403)
+    )
+    if status == 201 and data:
+        session.call(
+            'POST /peminjaman/<id>/kembalikan', 'POST',
+            f"/peminjaman/{data['id']}/kembalikan", role='user'
+        )
+
+
+def scenario_reports(session):
+    kind = session.rng.random()
+    if kind < 0.4:
+        session.call('GET /reports', 'GET', '/reports?status=dikembalikan', role='admin')
+    elif kind < 0.7:
+        session.call('GET /reports/filter-options', 'GET', '/reports/filter-options', role='admin')
+    else:
+        year = session.rng.choice([2023, 2024, 2025])
+        session.call(
+            'GET /analytics/popular-books', 'GET',
+            f'/analytics/popular-books?year={year}', role='admin'
+        )
+
+
+SCENARIOS = {
+    'browse': scenario_browse,
+    'search': scenario_search,
+    'login': scenario_login,
+    'borrow_return': scenario_borrow_return,
+    'reports': scenario_reports,
+}
+
+
+def login_tokens(host, port, credentials):
+    tokens = {}
+    for role, (username, password) in credentials.items():
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        conn.request(
+            'POST', '/login',
+            body=json.dumps({'username': username, 'password': password}),
+            headers={'Content-Type': 'application/json'}
+        )
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        if response.status != 200:
+            raise SystemExit(f"Login {role} ({username}) gagal: {response.status} {body[:200]!r}")
+        tokens[role] = json.loads(body)['token']
+    return tokens
+
+
+def wait_until_healthy(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise SystemExit(f"Server {host}:{port} tidak siap dalam {timeout} detik")
+
+
+def spawn_server(host, port, workers, extra_env=None):
+    env = dict(os.environ, **(extra_env or {}))
+    return subprocess.Popen(
+        [sys.executable, '-m', 'hypercorn', 'app:asgi_app',
+         '--bind', f'{host}:{port}', '--workers', str(workers)],
+        cwd=REPO_ROOT,
+        env=env,
+    )
+
+
+def run_load(host, port, tokens, credentials, mix, concurrency, duration, warmup, seed):
+    weights = MIXES[mix]
+    names = list(weights)
+    weight_values = [weights[name] for name in names]
+
+    sessions = [
+        Session(host, port, tokens, credentials, random.Random(seed + i))
+        for i in range(concurrency)
+    ]
+    start_recording = threading.Event()
+    stop = threading.Event()
+
+    def worker(session):
+        while not stop.is_set():
+            session.recording = start_recording.is_set()
+            name = session.rng.choices(names, weights=weight_values)[0]
+            SCENARIOS[name](session)
+        session.close()
+
+    threads = [threading.Thread(target=worker, args=(s,), daemon=True) for s in sessions]
+    for thread in threads:
+        thread.start()
+
+    time.sleep(warmup)
+    start_recording.set()
+    measured_from = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - measured_from
+
+    total = Stats()
+    for session in sessions:
+        total.merge(session.stats)
+    return total, elapsed
+
+
+def summarize(stats, elapsed):
+    endpoints = {}
+    all_latencies = []
+    total_errors = 0
+    for label in sorted(stats.latencies):
+        values = sorted(stats.latencies[label])
+        all_latencies.extend(values)
+        total_errors += stats.errors[label]
+        endpoints[label] = _summary(values, stats.errors[label], elapsed)
+        endpoints[label]['status_codes'] = {
+            str(code): count for code, count in sorted(stats.statuses[label].items())
+        }
+    all_latencies.sort()
+    return endpoints, _summary(all_latencies, total_errors, elapsed)
+
+
+def _summary(values, errors, elapsed):
+    to_ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0,
+        'latency_ms': {
+            'mean': to_ms(sum(values) / len(values)) if values else None,
+            'p50': to_ms(percentile(values, 50)),
+            'p95': to_ms(percentile(values, 95)),
+            'p99': to_ms(percentile(values, 99)),
+            'max': to_ms(values[-1]) if values else None,
+        },
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(endpoints, overall):
+    print(f"{'endpoint':<36}{'req':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    rows = list(endpoints.items()) + [('TOTAL', overall)]
+    for label, item in rows:
+        lat = item['latency_ms']
+        print(f"{label:<36}{item['requests']:>8}{item['errors']:>6}{item['throughput_rps']:>9}"
+              f"{lat['p50'] or 0:>9}{lat['p95'] or 0:>9}{lat['p99'] or 0:>9}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--spawn', action='store_true', help='jalankan hypercorn app:asgi_app sendiri')
+    parser.add_argument('--workers', type=int, default=4, help='jumlah worker hypercorn (dengan --spawn)')
+    parser.add_argument('--seed', action='store_true', help='buat/reset akun bench_admin dan bench_user')
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], default='mysql',
+                        help='backend database untuk server yang di-spawn')
+    parser.add_argument('--sqlite-path', default='bench_results/load_test.sqlite')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='mixed')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30.0, help='detik pengukuran')
+    parser.add_argument('--warmup', type=float, default=5.0, help='detik pemanasan (tidak dicatat)')
+    parser.add_argument('--random-seed', type=int, default=1234)
+    parser.add_argument('--output', default='bench_results/load_test.json')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.backend == 'sqlite' and not args.spawn:
+        raise SystemExit("--backend sqlite membutuhkan --spawn")
+
+    server_env = {}
+    credentials = dict(DEFAULT_CREDENTIALS)
+    if args.backend == 'sqlite':
+        os.makedirs(os.path.dirname(os.path.abspath(args.sqlite_path)), exist_ok=True)
+        server_env = {'DB_BACKEND': 'sqlite', 'DB_SQLITE_PATH': os.path.abspath(args.sqlite_path)}
+        if args.seed:
+            from benchmarks.seed import seed_sqlite
+            credentials = seed_sqlite(server_env['DB_SQLITE_PATH'])
+    elif args.seed:
+        from benchmarks.seed import seed_bench_users
+        credentials = seed_bench_users()
+
+    server = spawn_server(args.host, args.port, args.workers, server_env) if args.spawn else None
+    try:
+        wait_until_healthy(args.host, args.port)
+        tokens = login_tokens(args.host, args.port, credentials)
+        stats, elapsed = run_load(
+            args.host, args.port, tokens, credentials, args.mix,
+            args.concurrency, args.duration, args.warmup, args.random_seed
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=15)
+
+    endpoints, overall = summarize(stats, elapsed)
+    result = {
+        'meta': {
+            'git_revision': git_revision(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'mix': args.mix,
+            'backend': args.backend,
+            'weights': MIXES[args.mix],
+            'concurrency': args.concurrency,
+            'duration_s': round(elapsed, 3),
+            'warmup_s': args.warmup,
+            'workers': args.workers if args.spawn else None,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'overall': overall,
+        'endpoints': endpoints,
+    }
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    print_table(endpoints, overall)
+    print(f"\nHasil ditulis ke {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,551 @@
+"""Cek regresi query plan untuk semua bentuk query DAO.
+
+Setiap skenario memanggil method DAO lewat pool pencatat: SELECT dijalankan
+sungguhan (agar alur DAO tetap sama), statement tulis hanya dicatat dan
+tidak dieksekusi. Setiap statement lalu dijalankan ulang lewat
+`EXPLAIN FORMAT=JSON` (MySQL) atau `EXPLAIN QUERY PLAN` (stand-in SQLite)
+dan gagal (exit 1) jika ada full table scan, full index scan, filesort,
+atau tabel sementara di atas --max-rows yang tidak ada di ALLOWLIST.
+
+    # data skala produksi dulu (lihat benchmarks/generate_data.py)
+    python -m benchmarks.generate_data --books 200000 --loans 1000000 --mysql
+    python -m benchmarks.query_plans --analyze
+
+    # tanpa MySQL: proxy kasar lewat SQLite (tanpa estimasi baris per akses)
+    python -m benchmarks.generate_data --books 50000 --loans 200000 --sqlite bench.db
+    python -m benchmarks.query_plans --sqlite bench.db
+
+Pada SQLite, estimasi baris untuk SCAN memakai jumlah baris tabel dan
+untuk temp B-tree memakai tabel terbesar di statement tersebut.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from dao.book_dao import BookDAO
+from dao.peminjaman_dao import PeminjamanDAO
+from dao.popular_book_dao import PopularBookDAO
+from dao.report_dao import ReportDAO
+from dao.round_trips import unwrap_pool
+from dao.sqlite_pool import SQLitePool
+from dao.user_dao import UserDAO
+from dao.version_dao import VersionDAO
+from utils.exceptions import (
+    InvalidDataError,
+    OperationNotAllowedError,
+    PreconditionFailedError,
+    RecordNotFoundError
+)
+
+TABLES = ('books', 'users', 'peminjaman', 'peminjaman_history', 'entity_versions')
+
+# access_type MySQL yang berarti seluruh tabel/index dibaca
+MYSQL_SCANS = {'ALL': 'full_scan', 'index': 'full_index_scan'}
+
+_ALIAS_RE = re.compile(
+    r'\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(?!WHERE|JOIN|ON|SET|LIMIT|GROUP|ORDER)(\w+))?',
+    re.IGNORECASE
+)
+_SQLITE_ACCESS_RE = re.compile(r'^(SCAN|SEARCH) (?:TABLE )?(\w+)(?: USING (COVERING )?INDEX (\w+))?')
+_SQLITE_TEMP_RE = re.compile(r'^USE TEMP B-TREE FOR (?:RIGHT PART OF |LAST TERM OF )?(ORDER BY|GROUP BY|DISTINCT)')
+
+Finding = namedtuple('Finding', 'kind table rows')
+Allowed = namedtuple('Allowed', 'case kind table reason')
+
+# Plan mahal yang disengaja. Spesifik per jenis temuan agar regresi lain
+# pada query yang sama (mis. range tanggal berubah jadi full scan) tetap gagal.
+ALLOWLIST = [
+    Allowed('BookDAO.get_all_books', 'full_scan', 'books',
+            'LIMIT/OFFSET tanpa filter; berhenti setelah per_page baris'),
+    Allowed('BookDAO.search_books', 'full_scan', 'books',
+            "LIKE '%kw%' tidak bisa memakai B-tree; jalur cepat lewat indeks trigram"),
+    Allowed('BookDAO.get_search_terms', 'full_scan', 'books',
+            'snapshot seluruh katalog untuk membangun indeks trigram (sekali saat startup)'),
+    Allowed('BookDAO.get_search_terms', 'full_index_scan', 'books',
+            'snapshot seluruh katalog untuk membangun indeks trigram (sekali saat startup)'),
+    Allowed('PeminjamanDAO.get_all_peminjaman', 'full_scan', None,
+            'LIMIT/OFFSET tanpa filter; berhenti setelah per_page baris'),
+    Allowed('PeminjamanDAO.get_all_peminjaman', 'full_index_scan', None,
+            'LIMIT/OFFSET tanpa filter; berhenti setelah per_page baris'),
+    Allowed('PeminjamanDAO.get_peminjaman_by_user', 'filesort', None,
+            'ORDER BY id atas gabungan aktif + arsip satu user (baris sedikit)'),
+    Allowed('PeminjamanDAO.get_peminjaman_by_user', 'temporary', None,
+            'UNION ALL aktif + arsip satu user di-materialize untuk ORDER BY'),
+    Allowed('PeminjamanDAO.get_total_peminjaman', 'full_index_scan', 'peminjaman',
+            'COUNT(*) InnoDB selalu membaca index terkecil'),
+    Allowed('ReportDAO.generate_report[all]', 'full_scan', None,
+            'ekspor laporan tanpa filter memang membaca semua peminjaman'),
+    Allowed('ReportDAO.generate_report[all]', 'full_index_scan', None,
+            'ekspor laporan tanpa filter memang membaca semua peminjaman'),
+    Allowed('ReportDAO.generate_report[book_title]', 'full_scan', None,
+            "LIKE '%judul%' tidak bisa memakai B-tree"),
+    Allowed('ReportDAO.generate_report[book_title]', 'full_index_scan', None,
+            "LIKE '%judul%' tidak bisa memakai B-tree"),
+    Allowed('ReportDAO.generate_report[username]', 'full_scan', None,
+            "LIKE '%username%' tidak bisa memakai B-tree"),
+    Allowed('ReportDAO.generate_report[username]', 'full_index_scan', None,
+            "LIKE '%username%' tidak bisa memakai B-tree"),
+    Allowed('ReportDAO.get_filter_options', 'full_index_scan', None,
+            'DISTINCT seluruh kolom untuk dropdown filter (covering index)'),
+    Allowed('ReportDAO.get_filter_options', 'full_scan', None,
+            'DISTINCT seluruh kolom untuk dropdown filter'),
+    Allowed('ReportDAO.get_filter_options', 'temporary', None,
+            'DISTINCT seluruh kolom untuk dropdown filter'),
+    Allowed('PopularBookDAO.get_popular_books', 'temporary', None,
+            'GROUP BY buku dalam satu tahun; urut berdasarkan hasil agregat'),
+    Allowed('PopularBookDAO.get_popular_books', 'filesort', None,
+            'ORDER BY total_pinjam (hasil agregat) tidak bisa diambil dari index'),
+    Allowed('PopularBookDAO.get_available_years', 'full_index_scan', None,
+            'DISTINCT YEAR(tgl_pinjam) lewat covering index tgl_pinjam (aktif + arsip)'),
+    Allowed('PopularBookDAO.get_available_years', 'temporary', None,
+            'DISTINCT atas ekspresi YEAR()'),
+    Allowed('PopularBookDAO.get_available_years', 'filesort', None,
+            'ORDER BY atas ekspresi YEAR()'),
+    Allowed('UserDAO.search_users', 'full_scan', 'users',
+            "LIKE '%kw%' tidak bisa memakai B-tree; gunakan mode=prefix"),
+    Allowed('UserDAO.search_users', 'full_index_scan', 'users',
+            "LIKE '%kw%' tidak bisa memakai B-tree; gunakan mode=prefix"),
+]
+
+
+def is_read(query):
+    return query.lstrip().split(None, 1)[0].upper() == 'SELECT'
+
+
+def normalize_query(query):
+    return ' '.join(query.split())
+
+
+def table_aliases(query):
+    """Peta alias -> nama tabel dari klausa FROM/JOIN/UPDATE"""
+    aliases = {}
+    for table, alias in _ALIAS_RE.findall(query):
+        if table.lower() in TABLES:
+            aliases[table] = table
+            if alias:
+                aliases[alias] = table
+    return aliases
+
+
+class CapturingCursor:
+    """Cursor pencatat: SELECT diteruskan, statement tulis disimulasikan"""
+
+    def __init__(self, owner, context):
+        self._owner = owner
+        self._context = context
+        self._cursor = None
+        self._simulated = False
+        self.rowcount = -1
+        self.lastrowid = None
+
+    async def __aenter__(self):
+        self._cursor = await self._context.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self._context.__aexit__(exc_type, exc, tb)
+
+    async def execute(self, query, args=None):
+        self._owner.statements.append((query, tuple(args or ())))
+        self._simulated = not is_read(query)
+        if self._simulated:
+            # Anggap satu baris terpengaruh agar alur DAO berjalan normal
+            self.rowcount, self.lastrowid = 1, 1
+            return 1
+        result = await self._cursor.execute(query, args)
+        self.rowcount, self.lastrowid = self._cursor.rowcount, self._cursor.lastrowid
+        return result
+
+    async def fetchone(self):
+        return None if self._simulated else await self._cursor.fetchone()
+
+    async def fetchall(self):
+        return [] if self._simulated else await self._cursor.fetchall()
+
+
+class CapturingConnection:
+    def __init__(self, owner, conn):
+        self._owner = owner
+        self._conn = conn
+
+    def cursor(self, *cursor_classes):
+        return CapturingCursor(self._owner, self._conn.cursor(*cursor_classes))
+
+    async def begin(self):
+        return None
+
+    async def commit(self):
+        return None
+
+    async def rollback(self):
+        return None
+
+
+class _CapturingAcquire:
+    def __init__(self, owner):
+        self._owner = owner
+        self._context = owner.pool.acquire()
+
+    async def __aenter__(self):
+        return CapturingConnection(self._owner, await self._context.__aenter__())
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self._context.__aexit__(exc_type, exc, tb)
+
+
+class CapturingPool:
+    """Bungkus pool DAO; semua statement yang dikirim DAO dicatat di statements"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.statements = []
+
+    def acquire(self, **route):
+        # Plan dibandingkan pada satu database; tujuan replica diabaikan
+        return _CapturingAcquire(self)
+
+
+def dao_set(pool):
+    return SimpleNamespace(
+        book=BookDAO(pool),
+        peminjaman=PeminjamanDAO(pool),
+        report=ReportDAO(pool),
+        popular=PopularBookDAO(pool),
+        user=UserDAO(pool),
+        version=VersionDAO(pool),
+    )
+
+
+def build_cases(sample):
+    week_end = sample['last_date']
+    week_start = week_end - timedelta(days=7)
+    book_id, user_id = sample['book_id'], sample['user_id']
+    archive_cutoff = week_end - timedelta(days=365)
+
+    # (nama, fungsi(dao) -> coroutine)
+    return [
+        ('BookDAO.get_all_books', lambda dao: dao.book.get_all_books(1, 10)),
+        ('BookDAO.get_book_by_id', lambda dao: dao.book.get_book_by_id(book_id)),
+        ('BookDAO.get_book_version', lambda dao: dao.book.get_book_version(book_id)),
+        ('BookDAO.get_books_by_ids', lambda dao: dao.book.get_books_by_ids([book_id, book_id + 1, book_id + 2])),
+        ('BookDAO.search_books', lambda dao: dao.book.search_books(sample['keyword'])),
+        ('BookDAO.get_search_terms', lambda dao: dao.book.get_search_terms()),
+        ('BookDAO.get_catalog_version', lambda dao: dao.book.get_catalog_version()),
+        ('BookDAO.update_book', lambda dao: dao.book.update_book(book_id, expected_version=1, stok=5)),
+        ('BookDAO.adjust_stock', lambda dao: dao.book.adjust_stock(book_id, 1)),
+        ('BookDAO.delete_book', lambda dao: dao.book.delete_book(book_id)),
+        ('PeminjamanDAO.add_peminjaman', lambda dao: dao.peminjaman.add_peminjaman(user_id, book_id)),
+        ('PeminjamanDAO.kembalikan_buku', lambda dao: dao.peminjaman.kembalikan_buku(sample['loan_id'])),
+        ('PeminjamanDAO.get_all_peminjaman', lambda dao: dao.peminjaman.get_all_peminjaman(1, 10)),
+        ('PeminjamanDAO.get_peminjaman_by_id', lambda dao: dao.peminjaman.get_peminjaman_by_id(sample['loan_id'])),
+        ('PeminjamanDAO.get_peminjaman_by_user', lambda dao: dao.peminjaman.get_peminjaman_by_user(user_id)),
+        ('PeminjamanDAO.get_peminjaman_aktif', lambda dao: dao.peminjaman.get_peminjaman_aktif(user_id)),
+        ('PeminjamanDAO.is_book_dipinjam', lambda dao: dao.peminjaman.is_book_dipinjam(user_id, book_id)),
+        ('PeminjamanDAO.get_total_peminjaman', lambda dao: dao.peminjaman.get_total_peminjaman()),
+        ('PeminjamanDAO.get_user_version', lambda dao: dao.peminjaman.get_user_version(user_id)),
+        ('PeminjamanDAO.count_archivable', lambda dao: dao.peminjaman.count_archivable(archive_cutoff)),
+        ('PeminjamanDAO.archive_returned', lambda dao: dao.peminjaman.archive_returned(archive_cutoff, 1000)),
+        ('ReportDAO.generate_report[date_range]',
+         lambda dao: dao.report.generate_report(start_date=week_start, end_date=week_end)),
+        ('ReportDAO.generate_report[status]', lambda dao: dao.report.generate_report(status='dipinjam')),
+        ('ReportDAO.generate_report[date_range+status]',
+         lambda dao: dao.report.generate_report(start_date=week_start, end_date=week_end, status='dikembalikan')),
+        ('ReportDAO.generate_report[book_title]', lambda dao: dao.report.generate_report(book_title=sample['keyword'])),
+        ('ReportDAO.generate_report[username]', lambda dao: dao.report.generate_report(username=sample['username'])),
+        ('ReportDAO.generate_report[all]', lambda dao: dao.report.generate_report()),
+        ('ReportDAO.get_filter_options', lambda dao: dao.report.get_filter_options()),
+        ('PopularBookDAO.get_popular_books', lambda dao: dao.popular.get_popular_books(week_end.year, 10)),
+        ('PopularBookDAO.get_available_years', lambda dao: dao.popular.get_available_years()),
+        ('VersionDAO.latest_update', lambda dao: dao.version.latest_update()),
+        ('VersionDAO.changed_since', lambda dao: dao.version.changed_since(sample['recent'])),
+        ('UserDAO.get_by_id', lambda dao: dao.user.get_by_id(user_id)),
+        ('UserDAO.get_by_username', lambda dao: dao.user.get_by_username(sample['username'])),
+        ('UserDAO.get_users_page', lambda dao: dao.user.get_users_page(user_id, 50)),
+        ('UserDAO.search_users', lambda dao: dao.user.search_users(sample['username'][:4], 50)),
+        ('UserDAO.search_users_by_prefix', lambda dao: dao.user.search_users_by_prefix(sample['username'][:4], 50)),
+    ]
+
+
+async def fetch_rows(pool, query, params=()):
+    if isinstance(pool, SQLitePool):
+        return pool.run(query, params)[0]
+    import aiomysql
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchall()
+
+
+async def load_sample(pool):
+    """Nilai parameter yang benar-benar ada di data seed"""
+    loan = await fetch_rows(
+        pool, "SELECT id, user_id, book_id FROM peminjaman WHERE status = 'dipinjam' LIMIT 1"
+    ) or await fetch_rows(pool, "SELECT id, user_id, book_id FROM peminjaman LIMIT 1")
+    if not loan:
+        raise SystemExit("Tabel peminjaman kosong; seed dulu dengan benchmarks.generate_data")
+    loan = loan[0]
+    user = (await fetch_rows(pool, "SELECT username FROM users WHERE id = %s", (loan['user_id'],)))[0]
+    book = (await fetch_rows(pool, "SELECT judul FROM books WHERE id = %s", (loan['book_id'],)))[0]
+    last = (await fetch_rows(pool, "SELECT MAX(tgl_pinjam) AS last FROM peminjaman"))[0]['last']
+    if isinstance(last, str):
+        last = date.fromisoformat(last[:10])
+    return {
+        'loan_id': loan['id'],
+        'user_id': loan['user_id'],
+        'book_id': loan['book_id'],
+        'username': user['username'],
+        'keyword': book['judul'].split()[0],
+        'last_date': last,
+        # Jendela polling bus invalidasi
+        'recent': datetime.now() - timedelta(seconds=5),
+    }
+
+
+async def table_counts(pool):
+    counts = {}
+    for table in TABLES:
+        rows = await fetch_rows(pool, f"SELECT COUNT(*) AS total FROM {table}")
+        counts[table] = rows[0]['total']
+    return counts
+
+
+async def analyze_tables(pool):
+    if isinstance(pool, SQLitePool):
+        pool.run("ANALYZE")
+        # ANALYZE tidak menulis statistik untuk tabel kosong (mis. arsip yang
+        # belum terisi) sehingga SQLite mengira tabel itu besar; MySQL tahu
+        # tabelnya kosong. Catat ukuran kecil agar plan sebanding.
+        for table in TABLES:
+            if not pool.run(f"SELECT 1 AS found FROM {table} LIMIT 1")[0]:
+                pool.run("DELETE FROM sqlite_stat1 WHERE tbl = %s", (table,))
+                pool.run("INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES (%s, NULL, '1')", (table,))
+        pool.run("ANALYZE sqlite_schema")
+    else:
+        await fetch_rows(pool, f"ANALYZE TABLE {', '.join(TABLES)}")
+
+
+async def explain_mysql(pool, query, params):
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute("EXPLAIN FORMAT=JSON " + query, params)
+            return json.loads((await cursor.fetchone())[0])
+
+
+def _produced_rows(node):
+    """Perkiraan baris yang masuk ke operasi sort/temporary"""
+    rows = 0
+    if isinstance(node, dict):
+        table = node.get('table')
+        if isinstance(table, dict):
+            rows = int(table.get('rows_produced_per_join') or table.get('rows_examined_per_scan') or 0)
+        for value in node.values():
+            rows = max(rows, _produced_rows(value))
+    elif isinstance(node, list):
+        for item in node:
+            rows = max(rows, _produced_rows(item))
+    return rows
+
+
+def mysql_findings(plan, aliases):
+    findings, summary = [], []
+
+    def walk(node):
+        if isinstance(node, list):
+            for item in node:
+                walk(item)
+            return
+        if not isinstance(node, dict):
+            return
+        table = node.get('table')
+        # <derivedN>/<unionN>: hasil subquery yang aksesnya sudah diperiksa sendiri
+        if isinstance(table, dict) and 'table_name' in table and not table['table_name'].startswith('<'):
+            name = aliases.get(table['table_name'], table['table_name'])
+            access = table.get('access_type')
+            rows = int(table.get('rows_examined_per_scan') or 0)
+            summary.append(f"{name}: {access} key={table.get('key')} rows={rows}")
+            if access in MYSQL_SCANS:
+                findings.append(Finding(MYSQL_SCANS[access], name, rows))
+        for key in ('ordering_operation', 'grouping_operation', 'duplicates_removal'):
+            operation = node.get(key)
+            if isinstance(operation, dict):
+                rows = _produced_rows(operation)
+                if operation.get('using_filesort'):
+                    findings.append(Finding('filesort', None, rows))
+                    summary.append(f"filesort rows={rows}")
+                if operation.get('using_temporary_table'):
+                    findings.append(Finding('temporary', None, rows))
+                    summary.append(f"temporary rows={rows}")
+        for value in node.values():
+            walk(value)
+
+    walk(plan)
+    return findings, summary
+
+
+def sqlite_findings(plan, aliases, counts):
+    findings, summary = [], []
+    tables = set()
+    temps = []
+    for row in plan:
+        detail = row['detail']
+        summary.append(detail)
+        access = _SQLITE_ACCESS_RE.match(detail)
+        if access:
+            operation, name, covering, index = access.groups()
+            table = aliases.get(name, name)
+            if table not in counts:
+                continue
+            tables.add(table)
+            if operation == 'SCAN':
+                kind = 'full_index_scan' if index else 'full_scan'
+                findings.append(Finding(kind, table, counts[table]))
+            continue
+        temp = _SQLITE_TEMP_RE.match(detail)
+        if temp:
+            temps.append('filesort' if temp.group(1) == 'ORDER BY' else 'temporary')
+    # Tanpa estimasi baris: anggap sort sebesar tabel terbesar di statement
+    rows = max((counts[table] for table in tables), default=0)
+    findings.extend(Finding(kind, None, rows) for kind in temps)
+    return findings, summary
+
+
+def allowed(case, finding):
+    for entry in ALLOWLIST:
+        if entry.case == case and entry.kind == finding.kind and entry.table in (None, finding.table):
+            return entry
+    return None
+
+
+async def capture(pool, call):
+    """Jalankan satu skenario DAO; kembalikan statement unik yang dikirim"""
+    capturing = CapturingPool(pool)
+    error = None
+    try:
+        await call(dao_set(capturing))
+    except (RecordNotFoundError, OperationNotAllowedError, InvalidDataError, PreconditionFailedError) as e:
+        # Statement sebelum error domain tetap diperiksa
+        error = f"{type(e).__name__}: {e}"
+    unique = {}
+    for query, params in capturing.statements:
+        unique.setdefault(normalize_query(query), (query, params))
+    return list(unique.values()), error
+
+
+async def run(args):
+    if args.sqlite:
+        pool = SQLitePool(args.sqlite)
+    else:
+        from config import get_db_pool
+        pool = unwrap_pool(await get_db_pool())
+    sqlite = isinstance(pool, SQLitePool)
+
+    if args.analyze:
+        await analyze_tables(pool)
+    counts = await table_counts(pool)
+    if counts['peminjaman'] < args.max_rows * 10:
+        print(f"Peringatan: hanya {counts['peminjaman']} baris peminjaman; plan pada data kecil "
+              f"bisa berbeda dari produksi", file=sys.stderr)
+    sample = await load_sample(pool)
+
+    report = {'backend': 'sqlite' if sqlite else 'mysql', 'max_rows': args.max_rows,
+              'tables': counts, 'cases': {}}
+    violations = 0
+    used_allowlist = set()
+
+    for name, call in build_cases(sample):
+        if args.only and args.only not in name:
+            continue
+        statements, error = await capture(pool, call)
+        case = {'error': error, 'statements': []}
+        status = 'OK'
+        for query, params in statements:
+            aliases = table_aliases(query)
+            if sqlite:
+                plan = pool.run("EXPLAIN QUERY PLAN " + query, params)[0]
+                findings, summary = sqlite_findings(plan, aliases, counts)
+            else:
+                plan = await explain_mysql(pool, query, params)
+                findings, summary = mysql_findings(plan, aliases)
+
+            problems = []
+            for finding in findings:
+                if finding.rows <= args.max_rows:
+                    continue
+                entry = allowed(name, finding)
+                if entry:
+                    used_allowlist.add(entry)
+                    problems.append({**finding._asdict(), 'allowed': entry.reason})
+                    if status == 'OK':
+                        status = 'ALLOW'
+                else:
+                    problems.append({**finding._asdict(), 'allowed': None})
+                    status = 'FAIL'
+            case['statements'].append({
+                'query': normalize_query(query), 'plan': summary, 'findings': problems,
+            })
+        report['cases'][name] = case
+        violations += status == 'FAIL'
+        print_case(name, status, case, args.verbose)
+
+    # Plan berbeda antar backend/versi, jadi entry tak terpakai hanya info
+    stale = [entry for entry in ALLOWLIST if entry not in used_allowlist
+             and (not args.only or args.only in entry.case)]
+    for entry in stale if args.verbose else ():
+        print(f"Catatan: allowlist tidak terpakai: {entry.case} {entry.kind} {entry.table or ''}".rstrip())
+
+    pool.close()
+    await pool.wait_closed()
+    return report, violations
+
+
+def print_case(name, status, case, verbose):
+    print(f"{status:<6}{name}" + (f"  ({case['error']})" if case['error'] else ''))
+    for statement in case['statements']:
+        problems = statement['findings']
+        if not verbose and not problems:
+            continue
+        if verbose or any(problem['allowed'] is None for problem in problems):
+            print(f"        {statement['query'][:160]}")
+            for line in statement['plan']:
+                print(f"          {line}")
+        for problem in problems:
+            target = f" {problem['table']}" if problem['table'] else ''
+            verdict = f"diizinkan: {problem['allowed']}" if problem['allowed'] else 'MELEBIHI BATAS'
+            print(f"        - {problem['kind']}{target} rows={problem['rows']} ({verdict})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sqlite', metavar='PATH', help='periksa stand-in SQLite, bukan MySQL dari .env')
+    parser.add_argument('--max-rows', type=int, default=1000,
+                        help='batas baris untuk full scan/filesort sebelum dianggap regresi')
+    parser.add_argument('--analyze', action='store_true', help='ANALYZE tabel dulu (setelah bulk load)')
+    parser.add_argument('--only', help='hanya skenario yang namanya mengandung teks ini')
+    parser.add_argument('--verbose', '-v', action='store_true', help='cetak plan semua statement')
+    parser.add_argument('--output', help='tulis seluruh plan ke file JSON (untuk diff antar commit)')
+    args = parser.parse_args(argv)
+
+    report, violations = asyncio.run(run(args))
+
+    if args.output:
+        output_dir = os.path.dirname(args.output)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\nPlan ditulis ke {args.output}")
+
+    if violations:
+        print(f"\n{violations} skenario memakai full scan/filesort di atas {args.max_rows} baris")
+        sys.exit(1)
+    print(f"\nSemua skenario lolos (batas {args.max_rows} baris)")
+
+
+if __name__ == '__main__':
+    main()
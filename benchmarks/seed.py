@@ -0,0 +1,83 @@
+"""Seed akun benchmark dengan password yang diketahui.
+
+Jalankan dari root repo:
+    python -m benchmarks.seed                     # MySQL dari konfigurasi .env
+    python -m benchmarks.seed --sqlite bench.db   # stand-in SQLite
+"""
+import argparse
+import os
+import re
+
+import pymysql
+
+from config import get_sync_db_config
+from utils.passwords import hash_password
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_USERS = [
+    ('bench_admin', 'BenchAdmin1', 'admin'),
+    ('bench_user', 'BenchUser1', 'user'),
+]
+
+
+def seed_bench_users(connection=None):
+    """Buat/reset akun benchmark dan kembalikan kredensialnya per role"""
+    own_connection = connection is None
+    if own_connection:
+        connection = pymysql.connect(**get_sync_db_config())
+
+    try:
+        with connection.cursor() as cursor:
+            for username, password, role in BENCH_USERS:
+                hashed = hash_password(password)
+                cursor.execute(
+                    """INSERT INTO users (username, password, role)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE password = VALUES(password), role = VALUES(role)""",
+                    (username, hashed, role)
+                )
+        connection.commit()
+    finally:
+        if own_connection:
+            connection.close()
+
+    return {role: (username, password) for username, password, role in BENCH_USERS}
+
+
+def init_sql_books():
+    """Statement INSERT katalog buku dari init.sql"""
+    with open(os.path.join(REPO_ROOT, 'init.sql')) as f:
+        match = re.search(r'INSERT INTO books .*?;', f.read(), re.DOTALL)
+    return match.group(0)
+
+
+def seed_sqlite(path):
+    """Siapkan database SQLite berisi katalog init.sql dan akun benchmark"""
+    from dao.sqlite_pool import SQLitePool
+
+    pool = SQLitePool(path)
+    try:
+        if not pool.run("SELECT COUNT(*) AS total FROM books")[0][0]['total']:
+            pool.executescript(init_sql_books())
+        for username, password, role in BENCH_USERS:
+            hashed = hash_password(password)
+            pool.run(
+                """INSERT INTO users (username, password, role)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE password = VALUES(password), role = VALUES(role)""",
+                (username, hashed, role)
+            )
+    finally:
+        pool.close()
+    return {role: (username, password) for username, password, role in BENCH_USERS}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Seed akun benchmark')
+    parser.add_argument('--sqlite', metavar='PATH', help='seed database SQLite, bukan MySQL')
+    args = parser.parse_args()
+
+    credentials = seed_sqlite(args.sqlite) if args.sqlite else seed_bench_users()
+    for role, (username, _) in credentials.items():
+        print(f"{role}: {username}")
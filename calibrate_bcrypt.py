@@ -0,0 +1,36 @@
+"""Kalibrasi cost factor bcrypt terhadap target latensi login di host ini.
+
+    python calibrate_bcrypt.py --target-ms 250
+
+Cetak nilai BCRYPT_ROUNDS untuk .env. Hash lama dengan cost berbeda
+di-rehash otomatis saat user berhasil login.
+"""
+import argparse
+
+from utils.passwords import MIN_ROUNDS, MAX_ROUNDS, calibrate, configured_rounds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target-ms', type=float, default=250,
+                        help='batas durasi satu hash bcrypt (ms)')
+    parser.add_argument('--min-rounds', type=int, default=MIN_ROUNDS)
+    parser.add_argument('--max-rounds', type=int, default=MAX_ROUNDS)
+    parser.add_argument('--samples', type=int, default=3, help='jumlah pengukuran per cost')
+    args = parser.parse_args(argv)
+
+    rounds, timings = calibrate(args.target_ms, args.min_rounds, args.max_rounds, args.samples)
+
+    print(f"{'cost':>6}{'ms':>10}")
+    for cost, elapsed_ms in timings.items():
+        marker = '  <- dipilih' if cost == rounds else ''
+        print(f"{cost:>6}{elapsed_ms:>10}{marker}")
+
+    if timings[rounds] > args.target_ms:
+        print(f"\nPeringatan: cost minimum {rounds} sudah melebihi target {args.target_ms} ms")
+    print(f"\nCost saat ini: {configured_rounds()}")
+    print(f"BCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == '__main__':
+    main()
@@ -21,6 +21,18 @@ class DatabaseSettings(BaseSettings):
     # ssl_mode: str = Field("require", env="DB_SSL_MODE")
     DB_POOL_MIN: int = os.getenv('DB_POOL_MIN')
     DB_POOL_MAX: int = os.getenv('DB_POOL_MAX')
+    # 'mysql' (default) atau 'sqlite' untuk stand-in in-process (test/benchmark)
+    DB_BACKEND: str = os.getenv('DB_BACKEND', 'mysql')
+    DB_SQLITE_PATH: str = os.getenv('DB_SQLITE_PATH', ':memory:')
+    # Replica baca opsional (MySQL): 'host[:port],host[:port]', kredensial sama dengan primary
+    DB_REPLICA_HOSTS: str = os.getenv('DB_REPLICA_HOSTS', '')
+    # Replica khusus laporan/analitik; kosong = pakai DB_REPLICA_HOSTS
+    DB_ANALYTICS_HOST: str = os.getenv('DB_ANALYTICS_HOST', '')
+    DB_REPLICA_POOL_MAX: int = os.getenv('DB_REPLICA_POOL_MAX', 10)
+    # Setelah user menulis, bacaannya ke primary selama ini (detik)
+    DB_READ_YOUR_WRITES_S: int = os.getenv('DB_READ_YOUR_WRITES_S', 5)
+    # Replica yang gagal dihubungi dilewati selama ini (detik)
+    DB_REPLICA_RETRY_S: int = os.getenv('DB_REPLICA_RETRY_S', 30)
     timeout: int = 30
 
     class Config:
@@ -30,6 +42,9 @@ class JWTSettings(BaseSettings):
     secret: str = os.getenv('JWT_SECRET')
     algorithm: str = os.getenv('JWT_ALGORITHM')
     expire_minutes: int = os.getenv('JWT_EXPIRE_MINUTES')
+    # Access token berumur pendek; sesi diperpanjang lewat refresh token
+    access_expire_minutes: int = os.getenv('JWT_ACCESS_EXPIRE_MINUTES', 15)
+    refresh_expire_days: int = os.getenv('JWT_REFRESH_EXPIRE_DAYS', 30)
     issuer: str = "library-app"
 
     class Config:
@@ -45,10 +60,200 @@ class AppSettings(BaseSettings):
     class Config:
         extra = 'ignore'
 
+class ServerSettings(BaseSettings):
+    # Thread WSGI per worker hypercorn (middlewares/wsgi_threads.py); request
+    # di atas jumlah ini menunggu thread kosong
+    WSGI_THREADS: int = os.getenv('WSGI_THREADS', 64)
+
+    class Config:
+        extra = 'ignore'
+
+class CompressionSettings(BaseSettings):
+    COMPRESS_ENABLED: bool = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    # Response di bawah ukuran ini dikirim apa adanya (byte)
+    COMPRESS_MIN_SIZE: int = os.getenv('COMPRESS_MIN_SIZE', 1024)
+    COMPRESS_GZIP_LEVEL: int = os.getenv('COMPRESS_GZIP_LEVEL', 6)
+    COMPRESS_BROTLI_QUALITY: int = os.getenv('COMPRESS_BROTLI_QUALITY', 4)
+    COMPRESS_ZSTD_LEVEL: int = os.getenv('COMPRESS_ZSTD_LEVEL', 3)
+    COMPRESS_MIMETYPES: str = os.getenv(
+        'COMPRESS_MIMETYPES',
+        'application/json,text/csv,text/plain,text/html'
+    )
+
+    class Config:
+        extra = 'ignore'
+
+class AdmissionSettings(BaseSettings):
+    ADMISSION_ENABLED: bool = os.getenv('ADMISSION_ENABLED', 'true').lower() == 'true'
+    # Maksimum request in-flight dan panjang antrean per kelas rute (per worker)
+    ADMISSION_READS_MAX: int = os.getenv('ADMISSION_READS_MAX', 32)
+    ADMISSION_READS_QUEUE: int = os.getenv('ADMISSION_READS_QUEUE', 64)
+    ADMISSION_WRITES_MAX: int = os.getenv('ADMISSION_WRITES_MAX', 16)
+    ADMISSION_WRITES_QUEUE: int = os.getenv('ADMISSION_WRITES_QUEUE', 32)
+    ADMISSION_AUTH_MAX: int = os.getenv('ADMISSION_AUTH_MAX', 8)
+    ADMISSION_AUTH_QUEUE: int = os.getenv('ADMISSION_AUTH_QUEUE', 16)
+    ADMISSION_REPORTS_MAX: int = os.getenv('ADMISSION_REPORTS_MAX', 2)
+    ADMISSION_REPORTS_QUEUE: int = os.getenv('ADMISSION_REPORTS_QUEUE', 4)
+    # Batas waktu menunggu slot sebelum dijawab 503
+    ADMISSION_QUEUE_TIMEOUT_MS: int = os.getenv('ADMISSION_QUEUE_TIMEOUT_MS', 2000)
+    # Saturasi pool database: tolak request baru saat acquire koneksi yang
+    # menunggu melebihi batas ini, atau penunggu terdepan sudah menunggu
+    # lebih lama dari ADMISSION_POOL_WAIT_MS (0 = nonaktif)
+    ADMISSION_POOL_WAITERS_MAX: int = os.getenv('ADMISSION_POOL_WAITERS_MAX', 16)
+    ADMISSION_POOL_WAIT_MS: int = os.getenv('ADMISSION_POOL_WAIT_MS', 500)
+    ADMISSION_RETRY_AFTER: int = os.getenv('ADMISSION_RETRY_AFTER', 1)
+
+    class Config:
+        extra = 'ignore'
+
+class ResilienceSettings(BaseSettings):
+    # Retry untuk query idempoten (SELECT) dan korban deadlock
+    DB_RETRY_ATTEMPTS: int = os.getenv('DB_RETRY_ATTEMPTS', 3)
+    DB_RETRY_BASE_DELAY_MS: int = os.getenv('DB_RETRY_BASE_DELAY_MS', 50)
+    DB_RETRY_MAX_DELAY_MS: int = os.getenv('DB_RETRY_MAX_DELAY_MS', 1000)
+    # Circuit breaker: buka setelah N kegagalan koneksi berturut-turut
+    DB_BREAKER_FAILURE_THRESHOLD: int = os.getenv('DB_BREAKER_FAILURE_THRESHOLD', 5)
+    DB_BREAKER_RESET_TIMEOUT_S: int = os.getenv('DB_BREAKER_RESET_TIMEOUT_S', 10)
+
+    class Config:
+        extra = 'ignore'
+
+class SearchCacheSettings(BaseSettings):
+    SEARCH_CACHE_ENABLED: bool = os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true'
+    SEARCH_CACHE_MAX_ENTRIES: int = os.getenv('SEARCH_CACHE_MAX_ENTRIES', 1024)
+    SEARCH_CACHE_TTL_S: int = os.getenv('SEARCH_CACHE_TTL_S', 30)
+    # Hasil stale tetap dilayani selama ini sambil di-refresh di background (0 = nonaktif)
+    SEARCH_CACHE_STALE_TTL_S: int = os.getenv('SEARCH_CACHE_STALE_TTL_S', 300)
+
+    class Config:
+        extra = 'ignore'
+
+class SharedCacheSettings(BaseSettings):
+    # L2 bersama antar worker: '' (nonaktif), 'memory://', atau 'redis://host:6379/0'
+    CACHE_L2_URL: str = os.getenv('CACHE_L2_URL', '')
+    CACHE_L2_PREFIX: str = os.getenv('CACHE_L2_PREFIX', 'lbs:cache:')
+    # Timeout per perintah; lebih lama dari ini lebih murah query ke database
+    CACHE_L2_TIMEOUT_MS: int = os.getenv('CACHE_L2_TIMEOUT_MS', 50)
+    CACHE_L2_RETRY_S: int = os.getenv('CACHE_L2_RETRY_S', 30)
+
+    class Config:
+        extra = 'ignore'
+
+class BookCacheSettings(BaseSettings):
+    # Detail buku per (id, version); tidak perlu invalidasi karena version ikut di key
+    BOOK_CACHE_ENABLED: bool = os.getenv('BOOK_CACHE_ENABLED', 'true').lower() == 'true'
+    BOOK_CACHE_MAX_ENTRIES: int = os.getenv('BOOK_CACHE_MAX_ENTRIES', 5000)
+    BOOK_CACHE_TTL_S: int = os.getenv('BOOK_CACHE_TTL_S', 300)
+
+    class Config:
+        extra = 'ignore'
+
+class AnalyticsCacheSettings(BaseSettings):
+    # Buku populer dan opsi filter laporan; dikosongkan setiap katalog/peminjaman berubah
+    ANALYTICS_CACHE_ENABLED: bool = os.getenv('ANALYTICS_CACHE_ENABLED', 'true').lower() == 'true'
+    ANALYTICS_CACHE_MAX_ENTRIES: int = os.getenv('ANALYTICS_CACHE_MAX_ENTRIES', 256)
+    POPULAR_BOOKS_CACHE_TTL_S: int = os.getenv('POPULAR_BOOKS_CACHE_TTL_S', 300)
+    FILTER_OPTIONS_CACHE_TTL_S: int = os.getenv('FILTER_OPTIONS_CACHE_TTL_S', 600)
+
+    class Config:
+        extra = 'ignore'
+
+class SearchIndexSettings(BaseSettings):
+    # Indeks trigram in-memory untuk /books/search?fuzzy=true
+    TRIGRAM_INDEX_ENABLED: bool = os.getenv('TRIGRAM_INDEX_ENABLED', 'true').lower() == 'true'
+    TRIGRAM_INDEX_ON_STARTUP: bool = os.getenv('TRIGRAM_INDEX_ON_STARTUP', 'true').lower() == 'true'
+    TRIGRAM_MIN_SCORE: float = os.getenv('TRIGRAM_MIN_SCORE', 0.4)
+    TRIGRAM_MAX_RESULTS: int = os.getenv('TRIGRAM_MAX_RESULTS', 50)
+
+    class Config:
+        extra = 'ignore'
+
+class UserCacheSettings(BaseSettings):
+    # Cache profil user (id -> username, role) per worker, tanpa hash password
+    USER_CACHE_ENABLED: bool = os.getenv('USER_CACHE_ENABLED', 'true').lower() == 'true'
+    USER_CACHE_MAX_ENTRIES: int = os.getenv('USER_CACHE_MAX_ENTRIES', 10000)
+    USER_CACHE_TTL_S: int = os.getenv('USER_CACHE_TTL_S', 60)
+
+    class Config:
+        extra = 'ignore'
+
+class PasswordSettings(BaseSettings):
+    # Cost factor bcrypt; tentukan dengan calibrate_bcrypt.py
+    BCRYPT_ROUNDS: int = os.getenv('BCRYPT_ROUNDS', 12)
+    # Thread untuk hash/verifikasi bcrypt di luar event loop (0 = jumlah CPU)
+    BCRYPT_THREADS: int = os.getenv('BCRYPT_THREADS', 0)
+
+    class Config:
+        extra = 'ignore'
+
+class RoundTripSettings(BaseSettings):
+    # Budget round trip database per route: 'warn' (log), 'enforce' (test), 'off'
+    DB_ROUND_TRIP_MODE: str = os.getenv('DB_ROUND_TRIP_MODE', 'warn')
+
+    class Config:
+        extra = 'ignore'
+
+class ArchiveSettings(BaseSettings):
+    # Peminjaman dikembalikan yang lebih tua dari ini dipindah ke peminjaman_history
+    ARCHIVE_AFTER_DAYS: int = os.getenv('ARCHIVE_AFTER_DAYS', 365)
+    ARCHIVE_BATCH_SIZE: int = os.getenv('ARCHIVE_BATCH_SIZE', 1000)
+    # Jeda antar batch agar replikasi dan query lain tidak tertahan
+    ARCHIVE_PAUSE_MS: int = os.getenv('ARCHIVE_PAUSE_MS', 100)
+
+    class Config:
+        extra = 'ignore'
+
+class ShardingSettings(BaseSettings):
+    # Cabang -> node: '1,2=db-a:3306;3-5=db-b:3306' (SQLite: path file). Cabang
+    # lain dan data global (users, token, versi) tetap di node DB_HOST
+    DB_SHARD_MAP: str = os.getenv('DB_SHARD_MAP', '')
+    DB_SHARD_POOL_MAX: int = os.getenv('DB_SHARD_POOL_MAX', 10)
+
+    class Config:
+        extra = 'ignore'
+
+class InvalidationSettings(BaseSettings):
+    INVALIDATION_ENABLED: bool = os.getenv('INVALIDATION_ENABLED', 'true').lower() == 'true'
+    # Socket datagram Unix per worker (<pid>.sock); harus sama untuk semua worker satu host
+    INVALIDATION_SOCKET_DIR: str = os.getenv('INVALIDATION_SOCKET_DIR', '/tmp/lbs-invalidation')
+    # Fallback polling entity_versions (0 = nonaktif)
+    INVALIDATION_POLL_MS: int = os.getenv('INVALIDATION_POLL_MS', 2000)
+
+    class Config:
+        extra = 'ignore'
+
+class StockStreamSettings(BaseSettings):
+    # GET /books/stream (Server-Sent Events) untuk kiosk katalog
+    SSE_ENABLED: bool = os.getenv('SSE_ENABLED', 'true').lower() == 'true'
+    SSE_MAX_SUBSCRIBERS: int = os.getenv('SSE_MAX_SUBSCRIBERS', 200)
+    SSE_MAX_IDS: int = os.getenv('SSE_MAX_IDS', 100)
+    # Buku tertunda per subscriber sebelum koneksi lambat diputus
+    SSE_QUEUE_SIZE: int = os.getenv('SSE_QUEUE_SIZE', 256)
+    SSE_KEEPALIVE_S: int = os.getenv('SSE_KEEPALIVE_S', 15)
+
+    class Config:
+        extra = 'ignore'
+
 class Settings(BaseSettings):
     database: DatabaseSettings = DatabaseSettings()
     jwt: JWTSettings = JWTSettings()
     app: AppSettings = AppSettings()
+    server: ServerSettings = ServerSettings()
+    compression: CompressionSettings = CompressionSettings()
+    admission: AdmissionSettings = AdmissionSettings()
+    resilience: ResilienceSettings = ResilienceSettings()
+    search_cache: SearchCacheSettings = SearchCacheSettings()
+    shared_cache: SharedCacheSettings = SharedCacheSettings()
+    book_cache: BookCacheSettings = BookCacheSettings()
+    analytics_cache: AnalyticsCacheSettings = AnalyticsCacheSettings()
+    search_index: SearchIndexSettings = SearchIndexSettings()
+    user_cache: UserCacheSettings = UserCacheSettings()
+    password: PasswordSettings = PasswordSettings()
+    round_trips: RoundTripSettings = RoundTripSettings()
+    archive: ArchiveSettings = ArchiveSettings()
+    sharding: ShardingSettings = ShardingSettings()
+    invalidation: InvalidationSettings = InvalidationSettings()
+    stock_stream: StockStreamSettings = StockStreamSettings()
 
     class Config:
         env_file = ".env"
@@ -67,18 +272,87 @@ def get_ssl_context(ssl_mode: str) -> Optional[SSLContext]:
 async def get_db_pool():
     settings = Settings()
 
+    from dao.round_trips import CountingPool
+    from dao.replicas import ReplicaRouter
+
+    if settings.database.DB_BACKEND == 'sqlite':
+        from dao.sqlite_pool import get_shared_sqlite_pool
+        return CountingPool(ReplicaRouter(get_shared_sqlite_pool(
+            settings.database.DB_SQLITE_PATH,
+            maxsize=settings.database.DB_POOL_MAX or 10
+        )))
+
     ssl_ctx = None
     # if settings.is_production:
     #     ssl_ctx = get_ssl_context(settings.database.DB_SSL_MODE)
 
-    pool = await aiomysql.create_pool(
-        host=settings.database.DB_HOST,
-        port=settings.database.DB_PORT,
+    # Pool primary dibuat sekali per event loop (worker) dan dipakai bersama
+    # antar request, sehingga antrean acquire-nya mencerminkan saturasi pool
+    from dao import loop_pools
+    name = f"{settings.database.DB_HOST}:{settings.database.DB_PORT}"
+    pool = await loop_pools.shared_pool(('primary', name), lambda: _create_primary_pool(settings))
+
+    # Round trip dihitung per request untuk budget per route
+    return CountingPool(_replica_router(settings, pool))
+
+
+async def _create_primary_pool(settings):
+    # Saat database down, run_with_retry gagal cepat (circuit breaker)
+    # tanpa menunggu connect timeout
+    from dao.resilience import run_with_retry
+    pool = await run_with_retry(lambda: _create_mysql_pool(settings), idempotent=True)
+    logger.info(
+        f"Database connection pool created (size {settings.database.DB_POOL_MIN}-{settings.database.DB_POOL_MAX})")
+    return pool
+
+
+async def get_shard_pool(node):
+    """Pool untuk satu node shard ('host[:port]', atau path file untuk SQLite)"""
+    settings = Settings()
+
+    from dao.round_trips import CountingPool
+    from dao.replicas import ReplicaRouter
+
+    if settings.database.DB_BACKEND == 'sqlite':
+        from dao.sqlite_pool import get_shared_sqlite_pool
+        return CountingPool(ReplicaRouter(get_shared_sqlite_pool(
+            node, maxsize=settings.sharding.DB_SHARD_POOL_MAX
+        )))
+
+    from dao.resilience import run_with_retry
+    host, _, port = node.partition(':')
+    pool = await run_with_retry(lambda: _create_mysql_pool(
+        settings, host=host, port=int(port) if port else None,
+        minsize=0, maxsize=settings.sharding.DB_SHARD_POOL_MAX
+    ), idempotent=True)
+    return CountingPool(ReplicaRouter(pool))
+
+
+def _replica_router(settings, primary):
+    """Pool replica dibuat lazily saat query baca pertama diarahkan ke sana"""
+    from dao.replicas import ReplicaRouter, parse_hosts, Replica
+
+    def replica(host, port):
+        name = f"{host}:{port or settings.database.DB_PORT}"
+        return Replica(name, lambda: _create_mysql_pool(
+            settings, host=host, port=port or settings.database.DB_PORT,
+            minsize=0, maxsize=settings.database.DB_REPLICA_POOL_MAX
+        ))
+
+    replicas = [replica(host, port) for host, port in parse_hosts(settings.database.DB_REPLICA_HOSTS)]
+    analytics = [replica(host, port) for host, port in parse_hosts(settings.database.DB_ANALYTICS_HOST)]
+    return ReplicaRouter(primary, replicas, analytics[0] if analytics else None)
+
+
+async def _create_mysql_pool(settings, host=None, port=None, minsize=None, maxsize=None):
+    return await aiomysql.create_pool(
+        host=host or settings.database.DB_HOST,
+        port=port or settings.database.DB_PORT,
         user=settings.database.DB_USER,
         password=settings.database.DB_PASSWORD,
         db=settings.database.DB_NAME,
-        minsize=settings.database.DB_POOL_MIN,
-        maxsize=settings.database.DB_POOL_MAX,
+        minsize=settings.database.DB_POOL_MIN if minsize is None else minsize,
+        maxsize=maxsize or settings.database.DB_POOL_MAX,
         autocommit=True,
         echo=False,
         ssl=None,
@@ -86,13 +360,10 @@ async def get_db_pool():
             "SET sql_mode='STRICT_TRANS_TABLES,NO_ENGINE_SUBSTITUTION';"
             "SET time_zone='+00:00';"
         ),
-        cursorclass=aiomysql.DictCursor
+        cursorclass=aiomysql.DictCursor,
+        connect_timeout=settings.database.timeout
     )
 
-    logger.info(
-        f"Database connection pool created (size {settings.database.DB_POOL_MIN}-{settings.database.DB_POOL_MAX})")
-    return pool
-
 
 # Sync connection pool untuk operasi non-async (opsional)
 def get_sync_db_config():
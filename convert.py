@@ -1,6 +1,7 @@
-import bcrypt
 import re
 
+from utils.passwords import hash_password
+
 # Data pengguna dari database
 data = """
 ('admin', 'admin', 'admin'),
@@ -64,10 +65,10 @@ matches = re.findall(pattern, data)
 
 print("-- Update password untuk admin")
 for username, password in matches[:5]:  # 5 user pertama adalah admin
-    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    hashed = hash_password(password)
     print(f"UPDATE users SET password = '{hashed}' WHERE username = '{username}';")
 
 print("\n-- Update password untuk user biasa")
 for username, password in matches[5:]:  # Sisanya adalah user biasa
-    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    hashed = hash_password(password)
     print(f"UPDATE users SET password = '{hashed}' WHERE username = '{username}';")
\ No newline at end of file
@@ -3,20 +3,47 @@ from utils.exceptions import (
     DatabaseError,
     RecordNotFoundError,
     DuplicateEntryError,
-    InvalidDataError
+    InvalidDataError,
+    OperationNotAllowedError,
+    PreconditionFailedError,
+    ServiceUnavailableError
 )
+from dao.resilience import run_with_retry
+from dao.version_dao import VersionDAO, TABLE_VERSION
+from utils.trigram import book_index
+
+# Cabang untuk buku tanpa branch_id (sama dengan DEFAULT kolom)
+DEFAULT_BRANCH = 1
 
 
 class BookDAO:
     def __init__(self, db_pool):
         self.db_pool = db_pool
+        # Dengan sharding, versi disimpan di node yang sama dengan datanya
+        self.versions = VersionDAO(db_pool)
+
+    async def _execute_query(self, query, params=None, read_only=False, versions=()):
+        """Utility method to handle database operations (retry untuk error transien)
 
-    async def _execute_query(self, query, params=None, read_only=False):
-        """Utility method to handle database operations"""
-        async with self.db_pool.acquire() as conn:
+        versions: key entity_versions yang dinaikkan dalam transaksi yang sama
+        jika statement mengubah baris (diulang utuh jika korban deadlock), atau
+        callable(cursor) yang mengembalikannya (mis. butuh lastrowid)
+        """
+        return await run_with_retry(
+            lambda: self._execute_once(query, params, read_only, versions),
+            idempotent=read_only
+        )
+
+    async def _execute_once(self, query, params=None, read_only=False, versions=()):
+        async with self.db_pool.acquire(read_only=read_only) as conn:
             async with conn.cursor(DictCursor) as cursor:
                 try:
+                    if versions:
+                        await conn.begin()
                     await cursor.execute(query, params or ())
+                    if versions and cursor.rowcount:
+                        keys = versions(cursor) if callable(versions) else versions
+                        await self.versions.bump_in(conn, *keys)
                     if not read_only:
                         await conn.commit()
                     return cursor
@@ -41,12 +68,15 @@ class BookDAO:
         try:
             offset = (page - 1) * per_page
             cursor = await self._execute_query(
-                "SELECT * FROM books LIMIT %s OFFSET %s",
+                # Urutan stabil: halaman konsisten dan bisa digabung lintas shard
+                "SELECT * FROM books ORDER BY id LIMIT %s OFFSET %s",
                 (per_page, offset),
                 read_only=True
             )
             result = await cursor.fetchall()
             return [self._row_to_dict(row) for row in result]
+        except ServiceUnavailableError:
+            raise
         except DatabaseError as e:
             raise DatabaseError(f"Failed to fetch books: {str(e)}")
 
@@ -62,10 +92,12 @@ class BookDAO:
             if not row:
                 raise RecordNotFoundError("Book", book_id)
             return self._row_to_dict(row)
+        except (RecordNotFoundError, ServiceUnavailableError):
+            raise
         except DatabaseError as e:
             raise DatabaseError(f"Failed to fetch book: {str(e)}")
 
-    async def add_book(self, judul, pengarang, stok, tahun_terbit):
+    async def add_book(self, judul, pengarang, stok, tahun_terbit, branch_id=DEFAULT_BRANCH):
         """Add new book to database"""
         try:
             # Validasi dasar sebelum insert
@@ -77,16 +109,25 @@ class BookDAO:
 
             cursor = await self._execute_query(
                 """INSERT INTO books 
-                (judul, pengarang, stok, tahun_terbit)
-                VALUES (%s, %s, %s, %s)""",
-                (judul, pengarang, stok, tahun_terbit)
+                (judul, pengarang, stok, tahun_terbit, branch_id)
+                VALUES (%s, %s, %s, %s, %s)""",
+                (judul, pengarang, stok, tahun_terbit, branch_id),
+                versions=lambda cursor: [('books', TABLE_VERSION), ('book_index', cursor.lastrowid)]
             )
+            book_index.upsert(cursor.lastrowid, judul=judul, pengarang=pengarang)
+            self.versions.publish(('books', TABLE_VERSION), ('book_index', cursor.lastrowid))
             return cursor.lastrowid
+        except ServiceUnavailableError:
+            raise
         except DatabaseError as e:
             raise DatabaseError(f"Failed to add book: {str(e)}")
 
-    async def update_book(self, book_id, **kwargs):
-        """Update book with partial data"""
+    async def update_book(self, book_id, expected_version=None, **kwargs):
+        """Update book with partial data
+
+        Jika expected_version diberikan, update hanya berhasil bila versi
+        di database masih sama (optimistic concurrency).
+        """
         try:
             # Validasi input
             valid_fields = {'judul', 'pengarang', 'stok', 'tahun_terbit'}
@@ -99,32 +140,60 @@ class BookDAO:
             set_clause = ", ".join([f"{field} = %s" for field in update_data.keys()])
             values = list(update_data.values()) + [book_id]
 
+            # Versi per buku untuk indeks trigram dan stream stok: polling
+            # entity_versions menyusul di worker yang kehilangan datagram bus
+            versions = [('books', TABLE_VERSION)]
+            if 'judul' in update_data or 'pengarang' in update_data:
+                versions.append(('book_index', book_id))
+            if 'stok' in update_data:
+                versions.append(('book_stock', book_id))
+
             cursor = await self._execute_query(
                 f"""UPDATE books SET 
-                {set_clause}
-                WHERE id = %s""",
-                tuple(values)
+                {set_clause}, version = version + 1
+                WHERE id = %s{self._version_clause(expected_version)}""",
+                tuple(values + self._version_params(expected_version)),
+                versions=versions
             )
 
             if cursor.rowcount == 0:
-                raise RecordNotFoundError("Book", book_id)
+                await self._raise_write_conflict(book_id, expected_version)
 
+            if 'judul' in update_data or 'pengarang' in update_data:
+                book_index.upsert(
+                    book_id,
+                    judul=update_data.get('judul'),
+                    pengarang=update_data.get('pengarang')
+                )
+            self.versions.publish(*versions)
             return True
+        except (RecordNotFoundError, InvalidDataError, PreconditionFailedError, ServiceUnavailableError):
+            raise
         except DatabaseError as e:
             raise DatabaseError(f"Failed to update book: {str(e)}")
 
     async def delete_book(self, book_id):
-        """Delete book from database"""
+        """Delete book from database; ditolak jika buku punya peminjaman
+        (aktif maupun arsip) agar riwayatnya tidak hilang"""
         try:
             cursor = await self._execute_query(
-                "DELETE FROM books WHERE id = %s",
-                (book_id,)
+                """DELETE FROM books WHERE id = %s
+                AND NOT EXISTS (SELECT 1 FROM peminjaman WHERE book_id = %s)
+                AND NOT EXISTS (SELECT 1 FROM peminjaman_history WHERE book_id = %s)""",
+                (book_id, book_id, book_id),
+                versions=self._deleted_versions(book_id)
             )
 
             if cursor.rowcount == 0:
-                raise RecordNotFoundError("Book", book_id)
+                if await self.get_book_version(book_id) is None:
+                    raise RecordNotFoundError("Book", book_id)
+                raise OperationNotAllowedError("Buku masih memiliki riwayat peminjaman")
 
+            book_index.remove(book_id)
+            self.versions.publish(*self._deleted_versions(book_id))
             return True
+        except (RecordNotFoundError, OperationNotAllowedError, ServiceUnavailableError):
+            raise
         except DatabaseError as e:
             raise DatabaseError(f"Failed to delete book: {str(e)}")
 
@@ -148,27 +217,82 @@ class BookDAO:
             )
             result = await cursor.fetchall()
             return [self._row_to_dict(row) for row in result]
+        except ServiceUnavailableError:
+            raise
         except DatabaseError as e:
             raise DatabaseError(f"Failed to search books: {str(e)}")
 
-    async def adjust_stock(self, book_id, quantity):
+    async def get_search_terms(self):
+        """Kolom teks semua buku untuk membangun indeks trigram"""
+        cursor = await self._execute_query(
+            "SELECT id, judul, pengarang FROM books",
+            read_only=True
+        )
+        return await cursor.fetchall()
+
+    async def get_books_by_ids(self, book_ids):
+        """Ambil beberapa buku via primary key (urutan tidak dijamin)"""
+        if not book_ids:
+            return []
+        placeholders = ", ".join(["%s"] * len(book_ids))
+        cursor = await self._execute_query(
+            f"SELECT * FROM books WHERE id IN ({placeholders})",
+            tuple(book_ids),
+            read_only=True
+        )
+        return [self._row_to_dict(row) for row in await cursor.fetchall()]
+
+    async def adjust_stock(self, book_id, quantity, expected_version=None):
         """Adjust book stock atomically"""
         try:
             if not isinstance(quantity, int):
                 raise InvalidDataError("quantity", quantity, "Harus bilangan bulat")
 
             cursor = await self._execute_query(
-                "UPDATE books SET stok = stok + %s WHERE id = %s",
-                (quantity, book_id)
+                f"""UPDATE books SET stok = stok + %s, version = version + 1
+                WHERE id = %s{self._version_clause(expected_version)}""",
+                tuple([quantity, book_id] + self._version_params(expected_version)),
+                versions=[('books', TABLE_VERSION), ('book_stock', book_id)]
             )
 
             if cursor.rowcount == 0:
-                raise RecordNotFoundError("Book", book_id)
+                await self._raise_write_conflict(book_id, expected_version)
 
+            self.versions.publish(('books', TABLE_VERSION), ('book_stock', book_id))
             return True
+        except (RecordNotFoundError, InvalidDataError, PreconditionFailedError, ServiceUnavailableError):
+            raise
         except DatabaseError as e:
             raise DatabaseError(f"Failed to adjust stock: {str(e)}")
 
+    def _deleted_versions(self, book_id):
+        return [('books', TABLE_VERSION), ('book_index', book_id), ('book_stock', book_id)]
+
+    def _version_clause(self, expected_version):
+        return "" if expected_version is None else " AND version = %s"
+
+    def _version_params(self, expected_version):
+        return [] if expected_version is None else [expected_version]
+
+    async def _raise_write_conflict(self, book_id, expected_version):
+        """Bedakan buku tidak ada (404) dengan versi yang sudah berubah (412)"""
+        current = await self.get_book_version(book_id)
+        if current is None:
+            raise RecordNotFoundError("Book", book_id)
+        raise PreconditionFailedError("Book", book_id, current['version'])
+
+    async def get_catalog_version(self):
+        """Versi katalog (berubah setiap ada penulisan ke tabel books)"""
+        return await self.versions.get('books')
+
+    async def get_book_version(self, book_id):
+        """Versi satu buku via primary key, tanpa mengambil seluruh kolom"""
+        cursor = await self._execute_query(
+            "SELECT version, updated_at FROM books WHERE id = %s",
+            (book_id,),
+            read_only=True
+        )
+        return await cursor.fetchone()
 
     def _row_to_dict(self, row):
         """Convert database row to dictionary menggunakan nama kolom"""
@@ -177,5 +301,7 @@ class BookDAO:
             "judul": row['judul'],
             "pengarang": row['pengarang'],
             "stok": row['stok'],
-            "tahun_terbit": row['tahun_terbit']
+            "tahun_terbit": row['tahun_terbit'],
+            "version": row['version'],
+            "branch_id": row['branch_id']
         }
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""Pool database yang dipakai bersama per event loop.
+
+Pool aiomysql terikat ke event loop tempat ia dibuat. Di hypercorn semua
+view async satu worker berjalan di loop yang sama (middlewares/wsgi_threads.py),
+jadi pool primary, node shard, dan replica dibuat sekali per worker dan dipakai ulang
+antar request, lalu ditutup saat worker berhenti (middlewares/lifespan.py).
+Key berbentuk (jenis, nama), mis. ('shard', 'db-b:3306').
+"""
+import asyncio
+import threading
+
+# event loop -> {key: Task pembuatan pool}
+_loop_pools = {}
+_lock = threading.Lock()
+
+
+def _pools():
+    loop = asyncio.get_running_loop()
+    with _lock:
+        # Loop yang sudah selesai (asyncio.run per panggilan) tidak dipakai lagi
+        for closed in [item for item in _loop_pools if item.is_closed()]:
+            del _loop_pools[closed]
+        return _loop_pools.setdefault(loop, {})
+
+
+def _failed(task):
+    return task.done() and (task.cancelled() or task.exception() is not None)
+
+
+async def shared_pool(key, factory):
+    """Pool untuk key di event loop ini; factory() hanya dipanggil sekali
+    (diulang jika pembuatan sebelumnya gagal)"""
+    pools = _pools()
+    task = pools.get(key)
+    if task is None or _failed(task):
+        task = pools[key] = asyncio.ensure_future(factory())
+    # Request yang dibatalkan tidak boleh ikut membatalkan pool bersama
+    return await asyncio.shield(task)
+
+
+def opened(kind=None):
+    """Pool yang sudah terbuka di event loop ini (semua jenis jika kind None)"""
+    try:
+        pools = _pools()
+    except RuntimeError:
+        # Tanpa event loop berjalan tidak ada pool loop ini
+        return []
+    return [
+        task.result() for key, task in list(pools.items())
+        if (kind is None or key[0] == kind) and task.done() and not _failed(task)
+    ]
+
+
+async def close(kind=None):
+    """Tutup dan lupakan pool di event loop ini"""
+    pools = opened(kind)
+    for pool in pools:
+        pool.close()
+    for pool in pools:
+        await pool.wait_closed()
+    loop = asyncio.get_running_loop()
+    with _lock:
+        entries = _loop_pools.get(loop, {})
+        for key in [key for key in entries if kind is None or key[0] == kind]:
+            del entries[key]
@@ -6,18 +6,58 @@ from utils.exceptions import (
     InvalidDataError,
     OperationNotAllowedError
 )
+from dao.resilience import run_with_retry
+from dao.version_dao import VersionDAO, TABLE_VERSION
+
+LOAN_COLUMNS = "id, user_id, book_id, tgl_pinjam, tgl_kembali, status, branch_id"
+
+
+def all_loans(condition=None, archived=True):
+    """Subquery peminjaman + arsip (peminjaman_history) via UNION ALL.
+
+    condition (kolom tanpa alias) dipasang di kedua sisi agar index
+    masing-masing tabel terpakai; parameternya harus dikirim dua kali.
+    archived=False hanya membaca tabel aktif (parameter sekali).
+    """
+    where = f" WHERE {condition}" if condition else ""
+    if not archived:
+        return f"(SELECT {LOAN_COLUMNS} FROM peminjaman{where})"
+    return (
+        f"(SELECT {LOAN_COLUMNS} FROM peminjaman{where} "
+        f"UNION ALL SELECT {LOAN_COLUMNS} FROM peminjaman_history{where})"
+    )
 
 
 class PeminjamanDAO:
     def __init__(self, db_pool):
         self.db_pool = db_pool
+        # Dengan sharding, versi disimpan di node yang sama dengan datanya
+        self.versions = VersionDAO(db_pool)
 
     async def _execute_query(self, query, params=None, read_only=False):
-        """Utility method untuk handle operasi database"""
-        async with self.db_pool.acquire() as conn:
+        """Utility method untuk handle operasi database (retry untuk error transien)"""
+        return await run_with_retry(
+            lambda: self._execute_once(query, params, read_only),
+            idempotent=read_only
+        )
+
+    async def _execute_once(self, query, params=None, read_only=False):
+        return await self._run_statements([(query, params)], read_only=read_only)
+
+    async def _execute_write(self, statements, versions):
+        """Beberapa statement tulis + kenaikan versi dalam satu transaksi
+        (diulang utuh jika korban deadlock); kembalikan cursor statement terakhir"""
+        return await run_with_retry(lambda: self._run_statements(statements, versions=versions))
+
+    async def _run_statements(self, statements, read_only=False, versions=()):
+        async with self.db_pool.acquire(read_only=read_only) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 try:
-                    await cursor.execute(query, params or ())
+                    if versions:
+                        await conn.begin()
+                    for query, params in statements:
+                        await cursor.execute(query, params or ())
+                    await self.versions.bump_in(conn, *versions)
                     if not read_only:
                         await conn.commit()
                     return cursor
@@ -37,56 +77,45 @@ class PeminjamanDAO:
                     raise DatabaseError("Operasi database gagal") from e
 
     async def _validate_peminjaman_data(self, user_id, book_id):
-        """Validasi data sebelum operasi peminjaman"""
-        # Cek user exists
-        user_check = await self._execute_query(
-            "SELECT id FROM users WHERE id = %s",
-            (user_id,),
+        """Validasi data sebelum operasi peminjaman (satu round trip)"""
+        cursor = await self._execute_query(
+            """SELECT
+                EXISTS (SELECT 1 FROM users WHERE id = %s) AS user_ada,
+                (SELECT stok FROM books WHERE id = %s) AS stok,
+                EXISTS (
+                    SELECT 1 FROM peminjaman
+                    WHERE user_id = %s AND book_id = %s AND status = 'dipinjam'
+                ) AS dipinjam""",
+            (user_id, book_id, user_id, book_id),
             read_only=True
         )
-        if not await user_check.fetchone():
+        check = await cursor.fetchone()
+        if not check['user_ada']:
             raise RecordNotFoundError("User", user_id)
-
-        # Cek book exists
-        book_check = await self._execute_query(
-            "SELECT id, stok FROM books WHERE id = %s",
-            (book_id,),
-            read_only=True
-        )
-        book = await book_check.fetchone()
-        if not book:
+        if check['stok'] is None:
             raise RecordNotFoundError("Book", book_id)
-        if book['stok'] < 1:
+        if check['stok'] < 1:
             raise OperationNotAllowedError("Stok buku habis")
+        # Cek apakah buku sudah dipinjam dan belum dikembalikan
+        if check['dipinjam']:
+            raise OperationNotAllowedError("Buku sedang dipinjam")
 
     async def add_peminjaman(self, user_id, book_id, tgl_pinjam=date.today(), status='dipinjam'):
         try:
             await self._validate_peminjaman_data(user_id, book_id)
 
-            # Cek apakah buku sudah dipinjam dan belum dikembalikan
-            existing = await self._execute_query(
-                """SELECT id FROM peminjaman 
-                WHERE user_id = %s AND book_id = %s AND status = 'dipinjam'""",
-                (user_id, book_id),
-                read_only=True
-            )
-            if await existing.fetchone():
-                raise OperationNotAllowedError("Buku sedang dipinjam")
-
-            # Kurangi stok buku
-            await self._execute_query(
-                "UPDATE books SET stok = stok - 1 WHERE id = %s",
-                (book_id,)
-            )
-
-            # Tambah peminjaman
-            cursor = await self._execute_query(
-                """INSERT INTO peminjaman 
-                (user_id, book_id, tgl_pinjam, status)
-                VALUES (%s, %s, %s, %s)""",
-                (user_id, book_id, tgl_pinjam, status)
-            )
+            cursor = await self._execute_write([
+                # Kurangi stok buku
+                ("UPDATE books SET stok = stok - 1, version = version + 1 WHERE id = %s",
+                 (book_id,)),
+                # Tambah peminjaman (cabang mengikuti buku)
+                ("""INSERT INTO peminjaman 
+                (user_id, book_id, tgl_pinjam, status, branch_id)
+                SELECT %s, %s, %s, %s, branch_id FROM books WHERE id = %s""",
+                 (user_id, book_id, tgl_pinjam, status, book_id)),
+            ], self._version_keys(user_id, book_id))
 
+            self.versions.publish(*self._version_keys(user_id, book_id))
             return cursor.lastrowid
         except DatabaseError as e:
             raise
@@ -99,6 +128,7 @@ class PeminjamanDAO:
                 FROM peminjaman p
                 JOIN books b ON p.book_id = b.id
                 JOIN users u ON p.user_id = u.id
+                ORDER BY p.id
                 LIMIT %s OFFSET %s""",
                 (per_page, offset),
                 read_only=True
@@ -110,12 +140,11 @@ class PeminjamanDAO:
     async def get_peminjaman_by_id(self, peminjaman_id):
         try:
             cursor = await self._execute_query(
-                """SELECT p.*, b.judul AS book_title, u.username AS user_name 
-                FROM peminjaman p
+                f"""SELECT p.*, b.judul AS book_title, u.username AS user_name 
+                FROM {all_loans("id = %s")} p
                 JOIN books b ON p.book_id = b.id
-                JOIN users u ON p.user_id = u.id
-                WHERE p.id = %s""",
-                (peminjaman_id,),
+                JOIN users u ON p.user_id = u.id""",
+                (peminjaman_id, peminjaman_id),
                 read_only=True
             )
             result = await cursor.fetchone()
@@ -133,34 +162,45 @@ class PeminjamanDAO:
             if peminjaman['status'] == 'dikembalikan':
                 raise OperationNotAllowedError("Buku sudah dikembalikan")
 
-            # Update status pengembalian
-            await self._execute_query(
-                """UPDATE peminjaman 
+            await self._execute_write([
+                # Update status pengembalian
+                ("""UPDATE peminjaman 
                 SET tgl_kembali = CURDATE(), status = 'dikembalikan' 
                 WHERE id = %s""",
-                (peminjaman_id,)
-            )
-
-            # Tambah stok buku
-            await self._execute_query(
-                "UPDATE books SET stok = stok + 1 WHERE id = %s",
-                (peminjaman['book_id'],)
-            )
+                 (peminjaman_id,)),
+                # Tambah stok buku
+                ("UPDATE books SET stok = stok + 1, version = version + 1 WHERE id = %s",
+                 (peminjaman['book_id'],)),
+            ], self._version_keys(peminjaman['user_id'], peminjaman['book_id']))
 
+            self.versions.publish(*self._version_keys(peminjaman['user_id'], peminjaman['book_id']))
             return True
         except DatabaseError as e:
             raise
 
+    def _version_keys(self, user_id, book_id):
+        # Stok buku ikut berubah (books.version sudah naik di UPDATE),
+        # jadi versi katalog dan versi stok buku juga dinaikkan
+        return [('books', TABLE_VERSION), ('peminjaman_user', user_id), ('book_stock', book_id)]
+
+    async def get_user_version(self, user_id):
+        """Versi daftar peminjaman user (termasuk judul buku dari katalog)"""
+        return await self.versions.get_many(
+            ('peminjaman_user', user_id),
+            ('books', TABLE_VERSION)
+        )
+
     async def get_peminjaman_by_user(self, user_id, page=1, per_page=10):
         try:
             offset = (page - 1) * per_page
+            # Riwayat lengkap: termasuk peminjaman yang sudah diarsip
             cursor = await self._execute_query(
-                """SELECT p.*, b.judul AS book_title 
-                FROM peminjaman p
+                f"""SELECT p.*, b.judul AS book_title 
+                FROM {all_loans("user_id = %s")} p
                 JOIN books b ON p.book_id = b.id
-                WHERE p.user_id = %s
+                ORDER BY p.id
                 LIMIT %s OFFSET %s""",
-                (user_id, per_page, offset),
+                (user_id, user_id, per_page, offset),
                 read_only=True
             )
             return await cursor.fetchall()
@@ -205,4 +245,58 @@ class PeminjamanDAO:
             result = await cursor.fetchone()
             return result['total']
         except DatabaseError as e:
-            raise
\ No newline at end of file
+            raise
+
+    async def count_archivable(self, cutoff):
+        """Jumlah peminjaman dikembalikan dengan tgl_pinjam < cutoff"""
+        cursor = await self._execute_query(
+            """SELECT COUNT(*) AS total FROM peminjaman
+            WHERE status = 'dikembalikan' AND tgl_pinjam < %s""",
+            (cutoff,),
+            read_only=True
+        )
+        return (await cursor.fetchone())['total']
+
+    async def archive_returned(self, cutoff, batch_size=1000):
+        """Pindahkan satu batch peminjaman dikembalikan (tgl_pinjam < cutoff)
+        ke peminjaman_history; kembalikan jumlah baris yang dipindah"""
+        cursor = await self._execute_query(
+            """SELECT id FROM peminjaman
+            WHERE status = 'dikembalikan' AND tgl_pinjam < %s
+            LIMIT %s""",
+            (cutoff, batch_size),
+            read_only=True
+        )
+        ids = [row['id'] for row in await cursor.fetchall()]
+        if not ids:
+            return 0
+        # Satu transaksi per batch: diulang utuh jika menjadi korban deadlock
+        return await run_with_retry(lambda: self._move_to_history(ids))
+
+    async def _move_to_history(self, ids):
+        placeholders = ", ".join(["%s"] * len(ids))
+        async with self.db_pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                try:
+                    await conn.begin()
+                    await cursor.execute(
+                        f"""INSERT INTO peminjaman_history ({LOAN_COLUMNS})
+                        SELECT {LOAN_COLUMNS} FROM peminjaman
+                        WHERE id IN ({placeholders}) AND status = 'dikembalikan'""",
+                        tuple(ids)
+                    )
+                    moved = cursor.rowcount
+                    await cursor.execute(
+                        f"""DELETE FROM peminjaman
+                        WHERE id IN ({placeholders}) AND status = 'dikembalikan'""",
+                        tuple(ids)
+                    )
+                    if cursor.rowcount != moved:
+                        raise DatabaseError("Jumlah baris arsip dan hapus berbeda")
+                    await conn.commit()
+                    return moved
+                except Exception as e:
+                    await conn.rollback()
+                    if isinstance(e, DatabaseError):
+                        raise
+                    raise DatabaseError(f"Gagal mengarsipkan peminjaman: {str(e)}") from e
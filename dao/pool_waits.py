@@ -0,0 +1,59 @@
+"""Antrean acquire koneksi di pool database worker ini.
+
+CountingPool mencatat setiap acquire yang belum mendapat koneksi. Jumlah
+penunggu dan lama penunggu terdepan menjadi sinyal saturasi pool untuk
+AdmissionController: saat pool penuh, request baru ditolak 503 alih-alih
+ikut menunggu koneksi.
+"""
+import itertools
+import threading
+import time
+
+
+class PoolWaits:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        # token -> waktu mulai menunggu (dict menjaga urutan: terdepan lebih dulu)
+        self._waiting = {}
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def begin(self):
+        with self._lock:
+            token = next(self._ids)
+            self._waiting[token] = time.monotonic()
+        return token
+
+    def end(self, token, acquired=True):
+        with self._lock:
+            started = self._waiting.pop(token, None)
+            if started is None or not acquired:
+                return
+            waited = time.monotonic() - started
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    @property
+    def waiting(self):
+        return len(self._waiting)
+
+    def oldest_wait(self):
+        """Detik yang sudah dihabiskan penunggu terdepan (0 jika tidak ada)"""
+        with self._lock:
+            started = next(iter(self._waiting.values()), None)
+        return 0.0 if started is None else time.monotonic() - started
+
+    def stats(self):
+        return {
+            'waiting': self.waiting,
+            'oldest_wait_ms': round(self.oldest_wait() * 1000, 1),
+            'acquired': self.acquired,
+            'avg_wait_ms': round(self.total_wait / self.acquired * 1000, 2) if self.acquired else 0.0,
+            'max_wait_ms': round(self.max_wait * 1000, 1),
+        }
+
+
+pool_waits = PoolWaits()
@@ -1,6 +1,8 @@
 import aiomysql
 from datetime import date
-from utils.exceptions import DatabaseError, InvalidDataError
+from dao.peminjaman_dao import all_loans
+from dao.resilience import run_with_retry
+from utils.exceptions import DatabaseError, InvalidDataError, ServiceUnavailableError
 
 
 class PopularBookDAO:
@@ -8,8 +10,15 @@ class PopularBookDAO:
         self.db_pool = db_pool
 
     async def _execute_query(self, query, params=None):
-        """Utility method untuk handle operasi database"""
-        async with self.db_pool.acquire() as conn:
+        """Utility method untuk handle operasi database (hanya SELECT, aman di-retry)"""
+        return await run_with_retry(
+            lambda: self._execute_once(query, params),
+            idempotent=True
+        )
+
+    async def _execute_once(self, query, params=None):
+        # Query berat: dipin ke replica analitik bila dikonfigurasi
+        async with self.db_pool.acquire(read_only=True, analytics=True) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 try:
                     await cursor.execute(query, params or ())
@@ -27,7 +36,9 @@ class PopularBookDAO:
             if limit < 1 or limit > 100:
                 raise InvalidDataError('limit', limit, 'Limit harus antara 1-100')
 
-            query = """
+            # Peminjaman aktif + arsip dalam rentang tahun
+            loans = all_loans("tgl_pinjam >= %s AND tgl_pinjam < %s")
+            query = f"""
                 SELECT 
                     b.id AS book_id,
                     b.judul,
@@ -37,18 +48,18 @@ class PopularBookDAO:
                     MAX(p.tgl_pinjam) AS terakhir_pinjam,
                     ROUND((COUNT(p.id) * 100.0) / (
                         SELECT COUNT(*) 
-                        FROM peminjaman 
-                        WHERE YEAR(tgl_pinjam) = %s
+                        FROM {loans} total
                     ), 2) AS persentase
-                FROM peminjaman p
+                FROM {loans} p
                 JOIN books b ON p.book_id = b.id
-                WHERE YEAR(p.tgl_pinjam) = %s
                 GROUP BY b.id, b.judul, b.pengarang
                 ORDER BY total_pinjam DESC
                 LIMIT %s
             """
 
-            result = await self._execute_query(query, (year, year, limit))
+            # Rentang tanggal (bukan YEAR(kolom)) agar index tgl_pinjam terpakai
+            year_range = (date(year, 1, 1), date(year + 1, 1, 1))
+            result = await self._execute_query(query, year_range * 4 + (limit,))
 
             # Konversi tipe data
             for row in result:
@@ -58,18 +69,33 @@ class PopularBookDAO:
                     row['terakhir_pinjam'] = row['terakhir_pinjam'].isoformat()
 
             return result
+        except ServiceUnavailableError:
+            raise
         except Exception as e:
             raise DatabaseError(f"Gagal mendapatkan buku populer: {str(e)}")
 
+    async def count_loans(self, year: int):
+        """Total peminjaman (aktif + arsip) dalam satu tahun"""
+        loans = all_loans("tgl_pinjam >= %s AND tgl_pinjam < %s")
+        year_range = (date(year, 1, 1), date(year + 1, 1, 1))
+        result = await self._execute_query(f"SELECT COUNT(*) AS total FROM {loans} p", year_range * 2)
+        return result[0]['total']
+
     async def get_available_years(self):
         """Mendapatkan tahun-tahun tersedia untuk analisis"""
         try:
+            # UNION menghapus duplikat tahun antara data aktif dan arsip
             query = """
-                SELECT DISTINCT YEAR(tgl_pinjam) AS year 
-                FROM peminjaman 
+                SELECT year FROM (
+                    SELECT DISTINCT YEAR(tgl_pinjam) AS year FROM peminjaman
+                    UNION
+                    SELECT DISTINCT YEAR(tgl_pinjam) AS year FROM peminjaman_history
+                ) years
                 ORDER BY year DESC
             """
             result = await self._execute_query(query)
             return [row['year'] for row in result if row['year'] is not None]
+        except ServiceUnavailableError:
+            raise
         except Exception as e:
             raise DatabaseError(f"Gagal mendapatkan tahun tersedia: {str(e)}")
\ No newline at end of file
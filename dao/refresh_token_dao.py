@@ -0,0 +1,78 @@
+import aiomysql
+from dao.resilience import run_with_retry
+from utils.exceptions import DatabaseError
+
+
+class RefreshTokenDAO:
+    """Penyimpanan refresh token (hanya hash SHA-256, bukan token mentah)"""
+
+    def __init__(self, db_pool):
+        self.db_pool = db_pool
+
+    async def _execute_query(self, query, params=None, read_only=False):
+        """Utility method untuk handle operasi database (retry untuk error transien)"""
+        return await run_with_retry(
+            lambda: self._execute_once(query, params, read_only),
+            idempotent=read_only
+        )
+
+    async def _execute_once(self, query, params=None, read_only=False):
+        async with self.db_pool.acquire(read_only=read_only) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                # Pool berjalan dengan autocommit=True dan setiap operasi token
+                # adalah satu statement: sudah ter-commit tanpa COMMIT terpisah
+                try:
+                    await cursor.execute(query, params or ())
+                    return cursor
+                except aiomysql.Error as e:
+                    raise DatabaseError(f"Database error: {str(e)}") from e
+
+    async def create(self, user_id, token_hash, family_id, expires_at):
+        cursor = await self._execute_query(
+            """INSERT INTO refresh_tokens (user_id, token_hash, family_id, expires_at)
+            VALUES (%s, %s, %s, %s)""",
+            (user_id, token_hash, family_id, expires_at)
+        )
+        return cursor.lastrowid
+
+    async def get_by_hash(self, token_hash):
+        """Token beserta profil pemiliknya dalam satu lookup unique index"""
+        cursor = await self._execute_query(
+            """SELECT rt.id, rt.user_id, rt.family_id, rt.expires_at, rt.revoked_at,
+                u.username, u.role
+            FROM refresh_tokens rt
+            JOIN users u ON u.id = rt.user_id
+            WHERE rt.token_hash = %s""",
+            (token_hash,),
+            read_only=True
+        )
+        return await cursor.fetchone()
+
+    async def revoke(self, token_id):
+        """Tandai token terpakai; False jika sudah dicabut lebih dulu (race/reuse)"""
+        cursor = await self._execute_query(
+            "UPDATE refresh_tokens SET revoked_at = NOW() WHERE id = %s AND revoked_at IS NULL",
+            (token_id,)
+        )
+        return cursor.rowcount > 0
+
+    async def revoke_family(self, family_id):
+        cursor = await self._execute_query(
+            "UPDATE refresh_tokens SET revoked_at = NOW() WHERE family_id = %s AND revoked_at IS NULL",
+            (family_id,)
+        )
+        return cursor.rowcount
+
+    async def revoke_user(self, user_id):
+        cursor = await self._execute_query(
+            "UPDATE refresh_tokens SET revoked_at = NOW() WHERE user_id = %s AND revoked_at IS NULL",
+            (user_id,)
+        )
+        return cursor.rowcount
+
+    async def delete_expired(self):
+        """Bersihkan token kadaluarsa (untuk job maintenance)"""
+        cursor = await self._execute_query(
+            "DELETE FROM refresh_tokens WHERE expires_at < NOW()"
+        )
+        return cursor.rowcount
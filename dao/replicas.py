@@ -0,0 +1,233 @@
+"""Routing query baca ke replica MySQL dengan read-your-writes per sesi.
+
+DAO meminta koneksi lewat pool.acquire(read_only=..., analytics=...):
+
+- tanpa read_only (write, transaksi, autentikasi) -> selalu primary
+- analytics=True (laporan/analitik) -> replica analitik jika dikonfigurasi
+- read_only=True -> salah satu replica, kecuali sesi sedang "dipin" ke
+  primary: request non-GET (baca-lalu-tulis harus melihat data terbaru),
+  request yang sudah menulis, atau user/klien yang menulis dalam
+  DB_READ_YOUR_WRITES_S detik terakhir.
+
+Jendela read-your-writes dicatat per user di memori worker dan dikirim ke
+klien sebagai cookie agar berlaku juga saat request berikutnya dilayani
+worker lain. Replica yang gagal dihubungi dilewati selama
+DB_REPLICA_RETRY_S dan query jatuh ke primary.
+"""
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from config import settings
+from dao import loop_pools
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_session = ContextVar('db_read_session', default=None)
+
+# user_id -> epoch batas read-your-writes (per worker)
+_recent_writers = {}
+# host:port replica -> epoch sampai replica dicoba lagi
+_down_until = {}
+_lock = threading.Lock()
+
+
+class ReadSession:
+    __slots__ = ('user_id', 'primary_until', 'pinned', 'wrote', 'replica_read')
+
+    def __init__(self, primary_until=0.0, pinned=False):
+        self.user_id = None
+        self.primary_until = primary_until
+        self.pinned = pinned
+        self.wrote = False
+        self.replica_read = False
+
+
+def begin(primary_until=0.0, pinned=False):
+    """Mulai sesi baca untuk request ini; kembalikan (session, token untuk end)"""
+    session = ReadSession(primary_until, pinned)
+    return session, _session.set(session)
+
+
+def end(token):
+    _session.reset(token)
+
+
+def current():
+    return _session.get()
+
+
+def identify(user_id):
+    """Dipanggil setelah token divalidasi agar jendela per user berlaku"""
+    session = _session.get()
+    if session is not None:
+        session.user_id = user_id
+
+
+def note_write():
+    session = _session.get()
+    if session is None:
+        return
+    session.wrote = True
+    if session.user_id is not None:
+        with _lock:
+            _recent_writers[session.user_id] = time.time() + settings.database.DB_READ_YOUR_WRITES_S
+
+
+def prefer_primary():
+    session = _session.get()
+    if session is None:
+        return False
+    if session.pinned or session.wrote:
+        return True
+    now = time.time()
+    if session.primary_until > now:
+        return True
+    if session.user_id is None:
+        return False
+    with _lock:
+        deadline = _recent_writers.get(session.user_id)
+        if deadline is not None and deadline <= now:
+            del _recent_writers[session.user_id]
+            deadline = None
+    return deadline is not None
+
+
+def route_key():
+    """Bagian key single-flight: pembaca yang dipin ke primary tidak boleh
+    menunggu hasil leader yang membaca dari replica"""
+    return 'primary' if prefer_primary() else 'any'
+
+
+def read_from_replica():
+    """True jika sesi ini (mungkin) sudah membaca dari replica.
+
+    Tanpa sesi (refresher cache di background) dianggap ya selama ada
+    replica yang dikonfigurasi.
+    """
+    session = _session.get()
+    if session is None:
+        return bool(settings.database.DB_REPLICA_HOSTS or settings.database.DB_ANALYTICS_HOST)
+    return session.replica_read
+
+
+def _note_replica_read():
+    session = _session.get()
+    if session is not None:
+        session.replica_read = True
+
+
+def parse_hosts(value):
+    """'db-r1:3306,db-r2' -> [('db-r1', 3306), ('db-r2', None)]"""
+    hosts = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        hosts.append((host, int(port) if port else None))
+    return hosts
+
+
+def _is_down(name):
+    with _lock:
+        return _down_until.get(name, 0) > time.time()
+
+
+def _mark_down(name, error):
+    with _lock:
+        _down_until[name] = time.time() + settings.database.DB_REPLICA_RETRY_S
+    metrics.incr('db.replica.down')
+    logger.warning(f"Replica {name} tidak tersedia, query baca dialihkan ke primary: {error}")
+
+
+class Replica:
+    """Pool replica dibuat saat pertama kali dipakai lalu dipakai bersama
+    per event loop (dao.loop_pools): get_db_pool() membuat Replica baru
+    setiap request, tapi tidak membuka pool baru setiap request"""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.pool = None
+
+    async def get_pool(self):
+        if self.pool is None:
+            self.pool = await loop_pools.shared_pool(('replica', self.name), self.factory)
+        return self.pool
+
+
+class _RoutedAcquire:
+    def __init__(self, router, read_only, analytics):
+        self._router = router
+        self._read_only = read_only
+        self._analytics = analytics
+        self._context = None
+
+    async def __aenter__(self):
+        replica = self._router.choose(self._read_only, self._analytics)
+        if replica is not None:
+            try:
+                self._context = (await replica.get_pool()).acquire()
+                return await self._context.__aenter__()
+            except Exception as e:
+                _mark_down(replica.name, e)
+                metrics.incr('db.replica.fallback')
+        self._context = self._router.primary.acquire()
+        return await self._context.__aenter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self._context.__aexit__(exc_type, exc, tb)
+
+
+class ReplicaRouter:
+    """Bungkus pool primary; tanpa replica semua acquire langsung ke primary"""
+
+    def __init__(self, primary, replicas=(), analytics=None):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.analytics = analytics
+
+    def choose(self, read_only, analytics):
+        """Replica tujuan, atau None untuk primary"""
+        if not read_only:
+            note_write()
+            metrics.incr('db.route.primary')
+            return None
+        if analytics and self.analytics is not None and not _is_down(self.analytics.name):
+            metrics.incr('db.route.analytics')
+            _note_replica_read()
+            return self.analytics
+        if self.replicas and not prefer_primary():
+            healthy = [replica for replica in self.replicas if not _is_down(replica.name)]
+            if healthy:
+                metrics.incr('db.route.replica')
+                _note_replica_read()
+                return random.choice(healthy)
+        metrics.incr('db.route.primary')
+        return None
+
+    def acquire(self, read_only=False, analytics=False):
+        if not self.replicas and self.analytics is None:
+            if not read_only:
+                note_write()
+            return self.primary.acquire()
+        return _RoutedAcquire(self, read_only, analytics)
+
+    def _pools(self):
+        replicas = self.replicas + ([self.analytics] if self.analytics else [])
+        return [self.primary] + [replica.pool for replica in replicas if replica.pool is not None]
+
+    def close(self):
+        for pool in self._pools():
+            pool.close()
+
+    async def wait_closed(self):
+        for pool in self._pools():
+            await pool.wait_closed()
+
+    def __getattr__(self, name):
+        return getattr(self.primary, name)
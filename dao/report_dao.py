@@ -1,6 +1,8 @@
 import aiomysql
 from datetime import date
-from utils.exceptions import DatabaseError
+from dao.peminjaman_dao import all_loans
+from dao.resilience import run_with_retry
+from utils.exceptions import DatabaseError, ServiceUnavailableError
 
 
 class ReportDAO:
@@ -8,8 +10,15 @@ class ReportDAO:
         self.db_pool = db_pool
 
     async def _execute_query(self, query, params=None):
-        """Utility method untuk handle operasi database"""
-        async with self.db_pool.acquire() as conn:
+        """Utility method untuk handle operasi database (hanya SELECT, aman di-retry)"""
+        return await run_with_retry(
+            lambda: self._execute_once(query, params),
+            idempotent=True
+        )
+
+    async def _execute_once(self, query, params=None):
+        # Query berat: dipin ke replica analitik bila dikonfigurasi
+        async with self.db_pool.acquire(read_only=True, analytics=True) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 try:
                     await cursor.execute(query, params or ())
@@ -29,26 +38,33 @@ class ReportDAO:
                     p.tgl_kembali,
                     p.status,
                     DATEDIFF(p.tgl_kembali, p.tgl_pinjam) AS lama_peminjaman
-                FROM peminjaman p
+                FROM {loans} p
                 JOIN users u ON p.user_id = u.id
                 JOIN books b ON p.book_id = b.id
             """
 
+            # Filter kolom peminjaman dipasang di dalam UNION (aktif + arsip)
+            loan_clauses = []
+            loan_params = []
             where_clauses = []
             params = []
 
             # Handle date filters
             if filters.get('start_date'):
-                where_clauses.append("p.tgl_pinjam >= %s")
-                params.append(filters['start_date'])
+                loan_clauses.append("tgl_pinjam >= %s")
+                loan_params.append(filters['start_date'])
             if filters.get('end_date'):
-                where_clauses.append("p.tgl_pinjam <= %s")
-                params.append(filters['end_date'])
+                loan_clauses.append("tgl_pinjam <= %s")
+                loan_params.append(filters['end_date'])
+
+            if filters.get('branch_id'):
+                loan_clauses.append("branch_id = %s")
+                loan_params.append(filters['branch_id'])
 
             # Handle other filters
             if filters.get('status'):
-                where_clauses.append("p.status = %s")
-                params.append(filters['status'])
+                loan_clauses.append("status = %s")
+                loan_params.append(filters['status'])
             if filters.get('book_title'):
                 where_clauses.append("b.judul LIKE %s")
                 params.append(f"%{filters['book_title']}%")
@@ -56,11 +72,16 @@ class ReportDAO:
                 where_clauses.append("u.username LIKE %s")
                 params.append(f"%{filters['username']}%")
 
+            # Arsip hanya berisi peminjaman yang sudah dikembalikan
+            archived = filters.get('status') != 'dipinjam'
+            base_query = base_query.format(loans=all_loans(" AND ".join(loan_clauses), archived))
             if where_clauses:
                 base_query += " WHERE " + " AND ".join(where_clauses)
 
-            return await self._execute_query(base_query, params)
+            return await self._execute_query(base_query, loan_params * (2 if archived else 1) + params)
 
+        except ServiceUnavailableError:
+            raise
         except Exception as e:
             raise DatabaseError(f"Failed to generate report: {str(e)}")
 
@@ -89,5 +110,7 @@ class ReportDAO:
             options['usernames'] = [row['username'] for row in user_result]
 
             return options
+        except ServiceUnavailableError:
+            raise
         except Exception as e:
             raise DatabaseError(f"Failed to get filter options: {str(e)}")
\ No newline at end of file
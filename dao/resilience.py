@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+
+import aiomysql
+
+from config import settings
+from utils.exceptions import ServiceUnavailableError
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Koneksi gagal / terputus: server kemungkinan tidak tersedia
+CONNECTION_ERRORS = {
+    2003,  # Can't connect to MySQL server
+    2006,  # MySQL server has gone away
+    2013,  # Lost connection to MySQL server during query
+    2055,  # Lost connection (system error)
+    1040,  # Too many connections
+    1053,  # Server shutdown in progress
+}
+
+# Transaksi dibatalkan server dan aman diulang
+DEADLOCK_ERRORS = {
+    1213,  # Deadlock found when trying to get lock
+    1205,  # Lock wait timeout exceeded
+}
+
+
+def mysql_error_code(error):
+    """Cari kode error MySQL di rantai exception (DAO membungkus error aiomysql)"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, aiomysql.Error) and error.args and isinstance(error.args[0], int):
+            return error.args[0]
+        if isinstance(error, (ConnectionError, asyncio.TimeoutError)):
+            return 2003
+        error = error.__cause__ or error.__context__
+    return None
+
+
+class CircuitBreaker:
+    """Circuit breaker closed -> open -> half-open, aman dipakai lintas thread"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def retry_after(self):
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        return max(int(remaining + 0.999), 1)
+
+    def is_open(self):
+        """True jika request sebaiknya ditolak tanpa menyentuh database"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at < self.reset_timeout
+            return self._probe_busy()
+
+    def _probe_busy(self):
+        # Probe yang tidak pernah melapor (hilang/dibatalkan) kedaluwarsa setelah
+        # reset_timeout agar breaker tidak terkunci di half-open selamanya
+        return self._probe_in_flight and time.monotonic() - self._probe_started < self.reset_timeout
+
+    def before_call(self):
+        """Izinkan satu panggilan; pemanggil wajib melapor lewat record_success,
+        record_failure, atau release_probe"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise ServiceUnavailableError(self.retry_after())
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            # Half-open: hanya satu probe yang boleh lewat; penolakan tidak
+            # mengambil slot probe
+            if self._probe_busy():
+                raise ServiceUnavailableError(self.retry_after())
+            self._probe_in_flight = True
+            self._probe_started = time.monotonic()
+
+    def release_probe(self):
+        """Probe selesai tanpa hasil (mis. dibatalkan): beri kesempatan probe lain"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit breaker database tertutup kembali")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error(f"Circuit breaker database terbuka setelah {self.failures} kegagalan")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {'state': self.state, 'consecutive_failures': self.failures}
+
+
+breaker = CircuitBreaker(
+    settings.resilience.DB_BREAKER_FAILURE_THRESHOLD,
+    settings.resilience.DB_BREAKER_RESET_TIMEOUT_S
+)
+metrics.register_collector('db_breaker', breaker.stats)
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Full jitter exponential backoff (detik)"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+async def run_with_retry(operation, idempotent=False):
+    """Jalankan operation() dengan retry untuk error transien.
+
+    Query idempoten diulang saat koneksi gagal; semua query diulang saat
+    menjadi korban deadlock/lock wait timeout (statement autocommit sudah
+    di-rollback oleh server). Kegagalan koneksi dihitung oleh circuit breaker.
+    """
+    config = settings.resilience
+    attempts = max(config.DB_RETRY_ATTEMPTS, 1)
+    base_delay = config.DB_RETRY_BASE_DELAY_MS / 1000.0
+    max_delay = config.DB_RETRY_MAX_DELAY_MS / 1000.0
+
+    for attempt in range(1, attempts + 1):
+        breaker.before_call()
+        try:
+            result = await operation()
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            code = mysql_error_code(e)
+            if code in CONNECTION_ERRORS:
+                breaker.record_failure()
+            else:
+                # Server menjawab (mis. error SQL/validasi): koneksi sehat
+                breaker.record_success()
+
+            retryable = code in DEADLOCK_ERRORS or (idempotent and code in CONNECTION_ERRORS)
+            if not retryable or attempt == attempts:
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logger.warning(f"Error database transien ({code}), retry {attempt}/{attempts - 1} dalam {delay:.3f}s")
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
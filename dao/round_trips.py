@@ -0,0 +1,141 @@
+"""Penghitung round trip database per request.
+
+get_db_pool() membungkus pool dengan CountingPool; setiap statement,
+COMMIT, ROLLBACK, dan BEGIN yang dikirim DAO dicatat ke RoundTrips milik
+request yang sedang berjalan (ContextVar). Di luar request yang dilacak
+(mis. refresh cache di background) pencatatan dilewati.
+"""
+from contextvars import ContextVar
+
+from dao.pool_waits import pool_waits
+
+# Ringkasan statement yang disimpan per request untuk log/pesan error
+MAX_STATEMENTS = 50
+STATEMENT_PREVIEW = 120
+
+_current = ContextVar('db_round_trips', default=None)
+
+
+class RoundTrips:
+    __slots__ = ('route', 'budget', 'count', 'statements')
+
+    def __init__(self, route, budget):
+        self.route = route
+        self.budget = budget
+        self.count = 0
+        self.statements = []
+
+    def record(self, statement):
+        self.count += 1
+        if len(self.statements) < MAX_STATEMENTS:
+            self.statements.append(' '.join(statement.split())[:STATEMENT_PREVIEW])
+
+    @property
+    def exceeded(self):
+        return self.count > self.budget
+
+
+def start(route, budget):
+    """Mulai melacak request ini; kembalikan (counter, token untuk stop)"""
+    counter = RoundTrips(route, budget)
+    return counter, _current.set(counter)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def record(statement):
+    counter = _current.get()
+    if counter is not None:
+        counter.record(statement)
+
+
+class CountingCursor:
+    def __init__(self, context):
+        self._context = context
+        self._cursor = None
+
+    async def __aenter__(self):
+        self._cursor = await self._context.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self._context.__aexit__(exc_type, exc, tb)
+
+    async def execute(self, query, args=None):
+        record(query)
+        return await self._cursor.execute(query, args)
+
+    async def executemany(self, query, args):
+        record(query)
+        return await self._cursor.executemany(query, args)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class CountingConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *cursor_classes):
+        return CountingCursor(self._conn.cursor(*cursor_classes))
+
+    async def begin(self):
+        record('BEGIN')
+        return await self._conn.begin()
+
+    async def commit(self):
+        record('COMMIT')
+        return await self._conn.commit()
+
+    async def rollback(self):
+        record('ROLLBACK')
+        return await self._conn.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class _CountingAcquire:
+    def __init__(self, context):
+        self._context = context
+
+    async def __aenter__(self):
+        # Waktu menunggu koneksi dicatat sebagai sinyal saturasi pool
+        token = pool_waits.begin()
+        acquired = False
+        try:
+            conn = await self._context.__aenter__()
+            acquired = True
+        finally:
+            pool_waits.end(token, acquired)
+        return CountingConnection(conn)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self._context.__aexit__(exc_type, exc, tb)
+
+
+class CountingPool:
+    """Bungkus pool aiomysql/SQLite; atribut lain diteruskan ke pool asli"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def acquire(self, **route):
+        return _CountingAcquire(self.pool.acquire(**route))
+
+    def __getattr__(self, name):
+        return getattr(self.pool, name)
+
+
+def unwrap_pool(pool):
+    """Pool primary di balik CountingPool/ReplicaRouter (untuk pemeriksaan tipe backend)"""
+    from dao.replicas import ReplicaRouter
+    pool = pool.pool if isinstance(pool, CountingPool) else pool
+    return pool.primary if isinstance(pool, ReplicaRouter) else pool
@@ -0,0 +1,312 @@
+"""Sharding per cabang (branch_id) di depan lapisan DAO.
+
+DB_SHARD_MAP memetakan cabang ke node MySQL; buku dan peminjamannya selalu
+berada di node cabang buku tersebut sehingga pinjam/kembali adalah transaksi
+satu node dan throughput tulis bertambah dengan jumlah node. Cabang yang
+tidak dipetakan serta data global (users, refresh_tokens) berada di node
+default (DB_HOST). Setiap node menyimpan counter entity_versions-nya sendiri
+(versi ditulis di node yang sama dengan datanya); versi katalog/peminjaman
+user untuk ETag adalah jumlah versi semua node.
+
+Syarat di sisi database:
+- tabel users direplikasi dari node default ke setiap node shard (FK dan
+  JOIN peminjaman -> users tetap lokal);
+- id books/peminjaman unik lintas node, mis. auto_increment_increment =
+  jumlah node dan auto_increment_offset berbeda per node.
+
+Pencarian id, katalog, laporan, dan analitik di-fan-out paralel ke semua
+node lalu digabung. Paginasi gabungan mengambil page * per_page baris dari
+setiap node, jadi halaman dalam makin mahal. Tanpa DB_SHARD_MAP, factory
+book_dao()/peminjaman_dao()/... mengembalikan DAO biasa.
+"""
+import asyncio
+
+from config import settings, get_shard_pool
+from dao import loop_pools
+from dao.book_dao import BookDAO, DEFAULT_BRANCH
+from dao.peminjaman_dao import PeminjamanDAO
+from dao.popular_book_dao import PopularBookDAO
+from dao.report_dao import ReportDAO
+from dao.version_dao import VersionDAO, TABLE_VERSION
+from utils.exceptions import RecordNotFoundError
+from utils.metrics import metrics
+
+
+def parse_shard_map(value):
+    """'1,2=db-a:3306;3-5=db-b' -> {1: 'db-a:3306', 2: 'db-a:3306', 3: 'db-b', ...}"""
+    branches = {}
+    for entry in (value or '').split(';'):
+        if not entry.strip():
+            continue
+        ids, separator, node = entry.partition('=')
+        if not separator or not node.strip():
+            raise ValueError(f"Entri DB_SHARD_MAP tidak valid: {entry!r}")
+        for item in ids.split(','):
+            start, _, end = item.strip().partition('-')
+            for branch_id in range(int(start), int(end or start) + 1):
+                branches[branch_id] = node.strip()
+    return branches
+
+
+def is_sharded():
+    return bool(settings.sharding.DB_SHARD_MAP)
+
+
+def node_count():
+    """Jumlah node termasuk node default (pengali budget round trip fan-out)"""
+    return 1 + len(set(parse_shard_map(settings.sharding.DB_SHARD_MAP).values()))
+
+
+class ShardRouter:
+    """Pool per node dibuat lazily dan dipakai bersama per event loop;
+    node default memakai pool dari get_db_pool()"""
+
+    def __init__(self, default_pool, shard_map=None):
+        self.default_pool = default_pool
+        self.branches = parse_shard_map(settings.sharding.DB_SHARD_MAP) if shard_map is None else shard_map
+        self.nodes = sorted(set(self.branches.values()))
+
+    async def node_pool(self, node):
+        return await loop_pools.shared_pool(('shard', node), lambda: get_shard_pool(node))
+
+    async def pool_for_branch(self, branch_id):
+        node = self.branches.get(branch_id)
+        return self.default_pool if node is None else await self.node_pool(node)
+
+    async def all_pools(self):
+        return [self.default_pool] + list(await asyncio.gather(*(self.node_pool(node) for node in self.nodes)))
+
+    async def gather(self, call):
+        """Jalankan call(pool) paralel di setiap node; hasil berurutan per node"""
+        metrics.incr('db.shard.fan_out')
+        return await asyncio.gather(*(call(pool) for pool in await self.all_pools()))
+
+    async def locate(self, call):
+        """(pool, hasil) dari node pertama yang hasil call-nya bukan None"""
+        async def attempt(pool):
+            try:
+                return await call(pool)
+            except RecordNotFoundError:
+                return None
+
+        pools = await self.all_pools()
+        metrics.incr('db.shard.fan_out')
+        for pool, result in zip(pools, await asyncio.gather(*(attempt(pool) for pool in pools))):
+            if result is not None:
+                return pool, result
+        return None, None
+
+    def close(self):
+        """Tutup pool shard event loop ini (skrip CLI saat selesai)"""
+        for pool in loop_pools.opened('shard'):
+            pool.close()
+
+    async def wait_closed(self):
+        await loop_pools.close('shard')
+
+
+def merge_page(results, page, per_page, key):
+    rows = sorted((row for rows in results for row in rows), key=key)
+    offset = (page - 1) * per_page
+    return rows[offset:offset + per_page]
+
+
+def merge_unique(results):
+    """Gabung daftar dari setiap node tanpa duplikat, urutan kemunculan pertama"""
+    return list(dict.fromkeys(item for items in results for item in items))
+
+
+class ShardedVersionDAO:
+    """Gabungan counter entity_versions semua node.
+
+    Jumlah versi tetap naik setiap kali versi di node mana pun naik, jadi
+    bisa dipakai sebagai ETag; updated_at diambil yang terbaru.
+    """
+
+    def __init__(self, router):
+        self.router = router
+
+    async def get_many(self, *keys):
+        results = await self.router.gather(lambda pool: VersionDAO(pool).get_many(*keys))
+        merged = []
+        for rows in zip(*results):
+            updated = [row['updated_at'] for row in rows if row['updated_at'] is not None]
+            merged.append({
+                'version': sum(row['version'] for row in rows),
+                'updated_at': max(updated) if updated else None
+            })
+        return merged
+
+    async def get(self, entity, entity_id=TABLE_VERSION):
+        return (await self.get_many((entity, entity_id)))[0]
+
+
+class ShardedBookDAO:
+    def __init__(self, db_pool):
+        self.router = ShardRouter(db_pool)
+        self.versions = ShardedVersionDAO(self.router)
+
+    def _dao(self, pool):
+        return BookDAO(pool)
+
+    async def _locate(self, book_id):
+        pool, _ = await self.router.locate(lambda pool: self._dao(pool).get_book_version(book_id))
+        if pool is None:
+            raise RecordNotFoundError("Book", book_id)
+        return self._dao(pool)
+
+    async def get_all_books(self, page=1, per_page=10):
+        results = await self.router.gather(lambda pool: self._dao(pool).get_all_books(1, page * per_page))
+        return merge_page(results, page, per_page, key=lambda book: book['id'])
+
+    async def get_book_by_id(self, book_id):
+        # Satu fan-out (bukan cari node lalu baca): BookDAO.get_book_by_id
+        # membungkus not found sebagai DatabaseError
+        books = await self.get_books_by_ids([book_id])
+        if not books:
+            raise RecordNotFoundError("Book", book_id)
+        return books[0]
+
+    async def add_book(self, judul, pengarang, stok, tahun_terbit, branch_id=DEFAULT_BRANCH):
+        dao = self._dao(await self.router.pool_for_branch(branch_id))
+        return await dao.add_book(judul, pengarang, stok, tahun_terbit, branch_id=branch_id)
+
+    async def update_book(self, book_id, expected_version=None, **kwargs):
+        return await (await self._locate(book_id)).update_book(book_id, expected_version, **kwargs)
+
+    async def delete_book(self, book_id):
+        return await (await self._locate(book_id)).delete_book(book_id)
+
+    async def adjust_stock(self, book_id, quantity, expected_version=None):
+        return await (await self._locate(book_id)).adjust_stock(book_id, quantity, expected_version)
+
+    async def search_books(self, keyword, search_fields=['judul', 'pengarang']):
+        results = await self.router.gather(lambda pool: self._dao(pool).search_books(keyword, search_fields))
+        return sorted((book for books in results for book in books), key=lambda book: book['id'])
+
+    async def get_search_terms(self):
+        results = await self.router.gather(lambda pool: self._dao(pool).get_search_terms())
+        return [row for rows in results for row in rows]
+
+    async def get_books_by_ids(self, book_ids):
+        if not book_ids:
+            return []
+        results = await self.router.gather(lambda pool: self._dao(pool).get_books_by_ids(book_ids))
+        return [book for books in results for book in books]
+
+    async def get_catalog_version(self):
+        return await self.versions.get('books')
+
+    async def get_book_version(self, book_id):
+        _, version = await self.router.locate(lambda pool: self._dao(pool).get_book_version(book_id))
+        return version
+
+
+class ShardedPeminjamanDAO:
+    def __init__(self, db_pool):
+        self.router = ShardRouter(db_pool)
+        self.versions = ShardedVersionDAO(self.router)
+
+    def _dao(self, pool):
+        return PeminjamanDAO(pool)
+
+    async def add_peminjaman(self, user_id, book_id, **kwargs):
+        # Peminjaman ditulis di node cabang buku
+        pool, _ = await self.router.locate(lambda pool: BookDAO(pool).get_book_version(book_id))
+        if pool is None:
+            raise RecordNotFoundError("Book", book_id)
+        return await self._dao(pool).add_peminjaman(user_id, book_id, **kwargs)
+
+    async def get_all_peminjaman(self, page=1, per_page=10):
+        results = await self.router.gather(lambda pool: self._dao(pool).get_all_peminjaman(1, page * per_page))
+        return merge_page(results, page, per_page, key=lambda row: row['id'])
+
+    async def get_total_peminjaman(self):
+        return sum(await self.router.gather(lambda pool: self._dao(pool).get_total_peminjaman()))
+
+    async def get_peminjaman_by_id(self, peminjaman_id):
+        _, peminjaman = await self.router.locate(lambda pool: self._dao(pool).get_peminjaman_by_id(peminjaman_id))
+        if peminjaman is None:
+            raise RecordNotFoundError("Peminjaman", peminjaman_id)
+        return peminjaman
+
+    async def kembalikan_buku(self, peminjaman_id):
+        pool, _ = await self.router.locate(lambda pool: self._dao(pool).get_peminjaman_by_id(peminjaman_id))
+        if pool is None:
+            raise RecordNotFoundError("Peminjaman", peminjaman_id)
+        return await self._dao(pool).kembalikan_buku(peminjaman_id)
+
+    async def get_peminjaman_by_user(self, user_id, page=1, per_page=10):
+        results = await self.router.gather(
+            lambda pool: self._dao(pool).get_peminjaman_by_user(user_id, 1, page * per_page)
+        )
+        return merge_page(results, page, per_page, key=lambda row: row['id'])
+
+    async def get_user_version(self, user_id):
+        return await self.versions.get_many(
+            ('peminjaman_user', user_id),
+            ('books', TABLE_VERSION)
+        )
+
+    async def get_peminjaman_aktif(self, user_id):
+        results = await self.router.gather(lambda pool: self._dao(pool).get_peminjaman_aktif(user_id))
+        return [row for rows in results for row in rows]
+
+    async def is_book_dipinjam(self, user_id, book_id):
+        return any(await self.router.gather(lambda pool: self._dao(pool).is_book_dipinjam(user_id, book_id)))
+
+
+class ShardedReportDAO:
+    def __init__(self, db_pool):
+        self.router = ShardRouter(db_pool)
+
+    async def generate_report(self, **filters):
+        if filters.get('branch_id'):
+            return await ReportDAO(await self.router.pool_for_branch(filters['branch_id'])).generate_report(**filters)
+        results = await self.router.gather(lambda pool: ReportDAO(pool).generate_report(**filters))
+        return sorted((row for rows in results for row in rows), key=lambda row: row['peminjaman_id'])
+
+    async def get_filter_options(self):
+        results = await self.router.gather(lambda pool: ReportDAO(pool).get_filter_options())
+        return {
+            name: merge_unique(options[name] for options in results)
+            for name in ('status', 'book_titles', 'usernames')
+        }
+
+
+class ShardedPopularBookDAO:
+    def __init__(self, db_pool):
+        self.router = ShardRouter(db_pool)
+
+    async def get_popular_books(self, year: int, limit: int = 10):
+        async def shard_top(pool):
+            dao = PopularBookDAO(pool)
+            return await dao.get_popular_books(year, limit), await dao.count_loans(year)
+
+        results = await self.router.gather(shard_top)
+        # Setiap buku hanya ada di satu node: top-N global ada di gabungan top-N per node
+        total = sum(count for _, count in results)
+        rows = sorted((row for rows, _ in results for row in rows), key=lambda row: -row['total_pinjam'])[:limit]
+        for row in rows:
+            row['persentase'] = round(row['total_pinjam'] * 100.0 / total, 2) if total else 0.0
+        return rows
+
+    async def get_available_years(self):
+        results = await self.router.gather(lambda pool: PopularBookDAO(pool).get_available_years())
+        return sorted(set(year for years in results for year in years), reverse=True)
+
+
+def book_dao(pool):
+    return ShardedBookDAO(pool) if is_sharded() else BookDAO(pool)
+
+
+def peminjaman_dao(pool):
+    return ShardedPeminjamanDAO(pool) if is_sharded() else PeminjamanDAO(pool)
+
+
+def report_dao(pool):
+    return ShardedReportDAO(pool) if is_sharded() else ReportDAO(pool)
+
+
+def popular_book_dao(pool):
+    return ShardedPopularBookDAO(pool) if is_sharded() else PopularBookDAO(pool)
@@ -0,0 +1,373 @@
+"""Pengganti in-process untuk pool aiomysql berbasis SQLite.
+
+Mengimplementasikan bagian interface pool yang dipakai DAO:
+
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute("... WHERE id = %s", (1,))
+            row = await cursor.fetchone()      # dict
+        await conn.commit()
+
+Query ditulis dalam dialek MySQL yang dipakai DAO (placeholder %s,
+ON DUPLICATE KEY UPDATE, CURDATE(), YEAR(), DATEDIFF()) dan diterjemahkan
+ke SQLite. Error SQLite dipetakan ke exception aiomysql/pymysql sehingga
+error handling di DAO tetap sama. Semua statement pada satu pool
+diserialisasi dengan lock; transaksi eksplisit tidak diisolasi antar
+coroutine, jadi stand-in ini ditujukan untuk test dan benchmark, bukan
+produksi.
+"""
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+
+from aiomysql import IntegrityError, DataError, OperationalError, ProgrammingError
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(50) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    role TEXT NOT NULL CHECK (role IN ('admin', 'user'))
+);
+
+CREATE TABLE IF NOT EXISTS books (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    judul VARCHAR(100) NOT NULL,
+    pengarang VARCHAR(50) NOT NULL,
+    stok INTEGER NOT NULL,
+    tahun_terbit INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    branch_id INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE INDEX IF NOT EXISTS idx_books_judul ON books (judul);
+CREATE INDEX IF NOT EXISTS idx_books_pengarang ON books (pengarang);
+
+CREATE TRIGGER IF NOT EXISTS books_updated_at AFTER UPDATE ON books
+FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE books SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+CREATE TABLE IF NOT EXISTS peminjaman (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    book_id INTEGER NOT NULL REFERENCES books (id),
+    tgl_pinjam DATE NOT NULL,
+    tgl_kembali DATE DEFAULT NULL,
+    status TEXT NOT NULL CHECK (status IN ('dipinjam', 'dikembalikan')),
+    branch_id INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_peminjaman_user_status ON peminjaman (user_id, status, book_id);
+CREATE INDEX IF NOT EXISTS peminjaman_book_id ON peminjaman (book_id);
+CREATE INDEX IF NOT EXISTS idx_peminjaman_status_tgl ON peminjaman (status, tgl_pinjam);
+CREATE INDEX IF NOT EXISTS idx_peminjaman_tgl_pinjam ON peminjaman (tgl_pinjam);
+
+CREATE TABLE IF NOT EXISTS peminjaman_history (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    book_id INTEGER NOT NULL REFERENCES books (id),
+    tgl_pinjam DATE NOT NULL,
+    tgl_kembali DATE DEFAULT NULL,
+    status TEXT NOT NULL CHECK (status IN ('dipinjam', 'dikembalikan')),
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    branch_id INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_peminjaman_history_user ON peminjaman_history (user_id, tgl_pinjam);
+CREATE INDEX IF NOT EXISTS idx_peminjaman_history_book ON peminjaman_history (book_id);
+CREATE INDEX IF NOT EXISTS idx_peminjaman_history_tgl_pinjam ON peminjaman_history (tgl_pinjam);
+CREATE INDEX IF NOT EXISTS idx_peminjaman_history_status_tgl ON peminjaman_history (status, tgl_pinjam);
+
+CREATE TABLE IF NOT EXISTS entity_versions (
+    entity VARCHAR(32) NOT NULL,
+    entity_id INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (entity, entity_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_entity_versions_updated_at ON entity_versions (updated_at);
+
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    token_hash CHAR(64) NOT NULL UNIQUE,
+    family_id CHAR(32) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    revoked_at DATETIME DEFAULT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS refresh_tokens_family_id ON refresh_tokens (family_id);
+CREATE INDEX IF NOT EXISTS refresh_tokens_user_id ON refresh_tokens (user_id);
+
+CREATE TRIGGER IF NOT EXISTS entity_versions_updated_at AFTER UPDATE ON entity_versions
+FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE entity_versions SET updated_at = CURRENT_TIMESTAMP
+    WHERE entity = NEW.entity AND entity_id = NEW.entity_id;
+END;
+"""
+
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_DATETIME_RE = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$')
+_VALUES_FN_RE = re.compile(r'VALUES\((\w+)\)', re.IGNORECASE)
+_UNIQUE_RE = re.compile(r'UNIQUE constraint failed: (\w+)\.(\w+)')
+
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+@lru_cache(maxsize=1024)
+def translate(query):
+    """Terjemahkan dialek MySQL yang dipakai DAO ke SQLite"""
+    sql = re.sub(r'^\s*INSERT IGNORE\b', 'INSERT OR IGNORE', query.replace('%s', '?'))
+    head, sep, tail = sql.partition('ON DUPLICATE KEY UPDATE')
+    if sep:
+        sql = head + 'ON CONFLICT DO UPDATE SET' + _VALUES_FN_RE.sub(r'excluded.\1', tail)
+    return re.sub(r'\s+FOR UPDATE\b', '', sql)
+
+
+def _to_date(value):
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _year(value):
+    return _to_date(value).year if value else None
+
+
+def _month(value):
+    return _to_date(value).month if value else None
+
+
+def _datediff(end, start):
+    if end is None or start is None:
+        return None
+    return (_to_date(end) - _to_date(start)).days
+
+
+def _mysql_value(value):
+    # SQLite menyimpan DATE/TIMESTAMP sebagai teks; kembalikan tipe seperti aiomysql
+    if isinstance(value, str):
+        if _DATE_RE.match(value):
+            return date.fromisoformat(value)
+        if _DATETIME_RE.match(value):
+            return datetime.fromisoformat(value)
+    return value
+
+
+def _map_error(error):
+    message = str(error)
+    if isinstance(error, sqlite3.IntegrityError):
+        unique = _UNIQUE_RE.search(message)
+        if unique:
+            table, column = unique.groups()
+            return IntegrityError(1062, f"Duplicate entry '{column}' for key '{table}.{column}'")
+        if 'FOREIGN KEY' in message:
+            return IntegrityError(
+                1452, "Cannot add or update a child row: a foreign key constraint fails"
+            )
+        if 'CHECK constraint' in message:
+            return DataError(1265, f"Data truncated: {message}")
+        return IntegrityError(1048, message)
+    if isinstance(error, sqlite3.OperationalError):
+        if 'syntax error' in message or 'no such' in message:
+            return ProgrammingError(1064, message)
+        return OperationalError(2013, message)
+    return OperationalError(2013, message)
+
+
+class SQLiteCursor:
+    """Cursor bergaya aiomysql.DictCursor; hasil diambil penuh saat execute"""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._rows = []
+        self._position = 0
+        self.rowcount = -1
+        self.lastrowid = None
+        self.description = None
+
+    async def execute(self, query, args=None):
+        result = self._pool.run(query, args)
+        self._rows, self.description, self.rowcount, self.lastrowid = result
+        self._position = 0
+        return self.rowcount
+
+    async def executemany(self, query, args):
+        total = 0
+        for params in args:
+            total += max(await self.execute(query, params), 0)
+        self.rowcount = total
+        return total
+
+    async def fetchone(self):
+        if self._position >= len(self._rows):
+            return None
+        row = self._rows[self._position]
+        self._position += 1
+        return row
+
+    async def fetchmany(self, size=None):
+        size = size or 1
+        rows = self._rows[self._position:self._position + size]
+        self._position += len(rows)
+        return rows
+
+    async def fetchall(self):
+        rows = self._rows[self._position:]
+        self._position = len(self._rows)
+        return rows
+
+    async def close(self):
+        # Seperti aiomysql, baris yang sudah dibuffer tetap bisa di-fetch setelah close
+        return None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+class SQLiteConnection:
+    def __init__(self, pool):
+        self._pool = pool
+
+    def cursor(self, *cursor_classes):
+        # Kelas cursor diabaikan: baris selalu dikembalikan sebagai dict
+        return SQLiteCursor(self._pool)
+
+    async def begin(self):
+        self._pool.run("BEGIN")
+
+    async def commit(self):
+        self._pool.end_transaction("COMMIT")
+
+    async def rollback(self):
+        self._pool.end_transaction("ROLLBACK")
+
+    async def ping(self, reconnect=True):
+        return True
+
+
+class _AcquireContext:
+    def __init__(self, pool):
+        self._pool = pool
+
+    async def __aenter__(self):
+        with self._pool.lock:
+            self._pool.in_use += 1
+        return SQLiteConnection(self._pool)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        with self._pool.lock:
+            self._pool.in_use -= 1
+
+    def __await__(self):
+        return self.__aenter__().__await__()
+
+
+class SQLitePool:
+    """Pool stand-in: satu koneksi SQLite bersama, aman dipakai lintas thread"""
+
+    def __init__(self, database=':memory:', maxsize=10, create_schema=True):
+        self.database = database
+        self.minsize = 1
+        self.maxsize = maxsize
+        self.in_use = 0
+        self.lock = threading.RLock()
+        self._closed = False
+
+        self._db = sqlite3.connect(database, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        if database != ':memory:':
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute("PRAGMA busy_timeout = 5000")
+        self._db.create_function("CURDATE", 0, lambda: datetime.utcnow().date().isoformat())
+        self._db.create_function("NOW", 0, lambda: datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
+        self._db.create_function("YEAR", 1, _year, deterministic=True)
+        self._db.create_function("MONTH", 1, _month, deterministic=True)
+        self._db.create_function("DATEDIFF", 2, _datediff, deterministic=True)
+        if create_schema:
+            self.executescript(SCHEMA)
+
+    @property
+    def size(self):
+        return self.maxsize
+
+    @property
+    def freesize(self):
+        return max(self.maxsize - self.in_use, 0)
+
+    def acquire(self):
+        return _AcquireContext(self)
+
+    def release(self, conn):
+        with self.lock:
+            self.in_use -= 1
+
+    def run(self, query, args=None):
+        """Eksekusi sinkron; mengembalikan (rows, description, rowcount, lastrowid)"""
+        sql = translate(query)
+        with self.lock:
+            try:
+                cursor = self._db.execute(sql, tuple(args or ()))
+                description = cursor.description
+                rows = []
+                if description:
+                    names = [column[0] for column in description]
+                    rows = [
+                        {name: _mysql_value(value) for name, value in zip(names, row)}
+                        for row in cursor.fetchall()
+                    ]
+                return rows, description, cursor.rowcount, cursor.lastrowid
+            except sqlite3.Error as e:
+                raise _map_error(e) from e
+
+    def run_many(self, query, rows):
+        """executemany sinkron, dipakai untuk seed data benchmark/test"""
+        with self.lock:
+            try:
+                self._db.executemany(translate(query), rows)
+            except sqlite3.Error as e:
+                raise _map_error(e) from e
+
+    def end_transaction(self, statement):
+        with self.lock:
+            if self._db.in_transaction:
+                self._db.execute(statement)
+
+    def executescript(self, script):
+        with self.lock:
+            self._db.executescript(script)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._db.close()
+
+    async def wait_closed(self):
+        return None
+
+
+async def create_sqlite_pool(database=':memory:', maxsize=10, create_schema=True):
+    """Padanan aiomysql.create_pool untuk backend SQLite"""
+    return SQLitePool(database, maxsize=maxsize, create_schema=create_schema)
+
+
+_shared_pools = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_sqlite_pool(database=':memory:', maxsize=10):
+    """Pool per path yang dipakai ulang antar request (database in-memory tetap hidup)"""
+    with _shared_lock:
+        pool = _shared_pools.get(database)
+        if pool is None:
+            pool = _shared_pools[database] = SQLitePool(database, maxsize=maxsize)
+        return pool
@@ -1,6 +1,11 @@
+import logging
+import secrets
+
 import aiomysql
-import bcrypt
 from aiomysql import IntegrityError, DataError
+from dao.resilience import run_with_retry
+from dao.version_dao import VersionDAO
+from utils.passwords import hash_password_async, check_password_async, needs_rehash
 from utils.exceptions import (
     DatabaseError,
     DuplicateEntryError,
@@ -10,33 +15,83 @@ from utils.exceptions import (
 )
 
 
+# Kolom profil; hash password hanya diambil saat verifikasi login
+PROFILE_COLUMNS = "id, username, role"
+AUTH_COLUMNS = "id, username, password, role"
+
+
+_dummy = None
+
+
+async def _dummy_hash():
+    """Hash bcrypt pembanding untuk username yang tidak ada (cost BCRYPT_ROUNDS)"""
+    global _dummy
+    if _dummy is None:
+        _dummy = await hash_password_async(secrets.token_urlsafe(16))
+    return _dummy
+
+
+def escape_like(value):
+    """Escape wildcard LIKE agar input diperlakukan sebagai teks biasa"""
+    return value.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
 
 class UserDAO:
     def __init__(self, db_pool):
         self.db_pool = db_pool
 
 
-    async def _execute_query(self, query, params=None):
-        async with self.db_pool.acquire() as conn:
+    async def _execute_query(self, query, params=None, read_only=False, versions=()):
+        """versions: key entity_versions yang dinaikkan dalam transaksi yang
+        sama jika statement mengubah baris"""
+        return await run_with_retry(
+            lambda: self._execute_once(query, params, read_only, versions),
+            idempotent=read_only
+        )
+
+    async def _execute_once(self, query, params=None, read_only=False, versions=()):
+        async with self.db_pool.acquire(read_only=read_only) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
+                if not versions:
+                    return await self._execute_statement(cursor, query, params)
                 try:
-                    await cursor.execute(query, params or ())
+                    await conn.begin()
+                    await self._execute_statement(cursor, query, params)
+                    if cursor.rowcount:
+                        await VersionDAO(self.db_pool).bump_in(conn, *versions)
+                    await conn.commit()
                     return cursor
-                except DataError as e:
-                    raise ValueError("Invalid data format") from e
-                except IntegrityError as e:
-                    if "Duplicate entry" in str(e):
-                        raise ValueError("Username already exists") from e
+                except Exception:
+                    await conn.rollback()
                     raise
-                except Exception as e:
-                    raise RuntimeError("Database operation failed") from e
 
-    async def get_by_username(self, username):
+    async def _execute_statement(self, cursor, query, params):
+        try:
+            await cursor.execute(query, params or ())
+            return cursor
+        except DataError as e:
+            raise ValueError("Invalid data format") from e
+        except IntegrityError as e:
+            if "Duplicate entry" in str(e):
+                raise ValueError("Username already exists") from e
+            raise
+        except Exception as e:
+            raise RuntimeError("Database operation failed") from e
+
+    async def get_by_username(self, username, with_password=False):
+        return await run_with_retry(
+            lambda: self._fetch_by_username(username, with_password),
+            idempotent=True
+        )
+
+    async def _fetch_by_username(self, username, with_password=False):
+        columns = AUTH_COLUMNS if with_password else PROFILE_COLUMNS
+        # Autentikasi selalu dari primary (user/password baru belum tentu sampai di replica)
         async with self.db_pool.acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 await self._handle_db_operation(
                     cursor.execute,
-                    "SELECT id, username, password, role FROM users WHERE username = %s",
+                    f"SELECT {columns} FROM users WHERE username = %s",
                     (username,)
                 )
                 result = await cursor.fetchone()
@@ -46,33 +101,63 @@ class UserDAO:
 
     async def create_user(self, username, password, role='user'):
         if len(username) < 3 or len(username) > 20:
-            raise InvalidDataError("username", username)
+            raise InvalidDataError("username", username, "3-20 karakter")
 
         if len(password) < 8:
-            raise InvalidDataError("password", "too short")
+            raise InvalidDataError("password", "****", "minimal 8 karakter")
 
-        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed = await hash_password_async(password)
 
+        versions = VersionDAO(self.db_pool)
         async with self.db_pool.acquire() as conn:
             try:
                 async with conn.cursor() as cursor:
+                    await conn.begin()
                     await self._handle_db_operation(
                         cursor.execute,
                         """INSERT INTO users (username, password, role)
                         VALUES (%s, %s, %s)""",
                         (username, hashed, role)
                     )
+                    user_id = cursor.lastrowid
+                    await versions.bump_in(conn, ('users', user_id))
                     await conn.commit()
-                    return cursor.lastrowid
             except Exception as e:
                 await conn.rollback()
                 raise TransactionError("user creation") from e
+        # Buang cache negatif untuk id yang baru dipakai (semua worker)
+        versions.publish(('users', user_id))
+        return user_id
 
     async def verify_password(self, username, password):
-        user = await self.get_by_username(username)
-        if user and bcrypt.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
-            return user
-        return None
+        """User tanpa hash password jika cocok; None jika username tidak ada
+        atau password salah (keduanya dijawab sama oleh login)"""
+        try:
+            user = await self.get_by_username(username, with_password=True)
+        except RecordNotFoundError:
+            # Tetap jalankan bcrypt agar waktu respons tidak membocorkan username
+            await check_password_async(password, await _dummy_hash())
+            return None
+        hashed = user.pop('password')
+        if not await check_password_async(password, hashed):
+            return None
+
+        # Password plaintext hanya tersedia saat login: perbarui hash
+        # yang cost-nya berbeda dari BCRYPT_ROUNDS
+        if needs_rehash(hashed):
+            await self._rehash_password(user['id'], hashed, password)
+        return user
+
+    async def _rehash_password(self, user_id, old_hash, password):
+        try:
+            new_hash = await hash_password_async(password)
+            # Bersyarat pada hash lama agar tidak menimpa password yang baru diganti
+            await self._execute_query(
+                "UPDATE users SET password = %s WHERE id = %s AND password = %s",
+                (new_hash, user_id, old_hash)
+            )
+        except Exception as e:
+            logging.warning(f"Rehash password user {user_id} gagal: {str(e)}")
 
     async def update_user(self, user_id, username, password, role):
         # Validasi sebelum update
@@ -81,52 +166,78 @@ class UserDAO:
             raise ValueError("User not found")
 
         if username != existing_user['username']:
-            existing = await self.get_by_username(username)
-            if existing:
+            try:
+                await self.get_by_username(username)
+            except RecordNotFoundError:
+                pass
+            else:
                 raise ValueError("Username already exists")
 
-        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed = await hash_password_async(password)
 
         cursor = await self._execute_query(
             """UPDATE users SET
             username = %s, password = %s, role = %s
             WHERE id = %s""",
-            (username, hashed, role, user_id)
+            (username, hashed, role, user_id),
+            versions=[('users', user_id)]
         )
-
-        async with self.db_pool.acquire() as conn:
-            await conn.commit()
-
+        VersionDAO.publish(('users', user_id))
         return cursor.rowcount > 0
 
     async def delete_user(self, user_id):
         cursor = await self._execute_query(
             "DELETE FROM users WHERE id = %s",
-            (user_id,)
+            (user_id,),
+            versions=[('users', user_id)]
         )
-
-        async with self.db_pool.acquire() as conn:
-            await conn.commit()
-
+        VersionDAO.publish(('users', user_id))
         return cursor.rowcount > 0
 
-    async def get_by_id(self, user_id):
+    async def get_by_id(self, user_id, with_password=False):
+        columns = AUTH_COLUMNS if with_password else PROFILE_COLUMNS
         cursor = await self._execute_query(
-            "SELECT id, username, password, role FROM users WHERE id = %s",
-            (user_id,)
+            f"SELECT {columns} FROM users WHERE id = %s",
+            (user_id,),
+            read_only=True
         )
         return await cursor.fetchone()
 
     async def get_all_users(self):
         cursor = await self._execute_query(
-            "SELECT id, username, role FROM users"
+            "SELECT id, username, role FROM users",
+            read_only=True
+        )
+        return await cursor.fetchall()
+
+    async def get_users_page(self, after_id=0, limit=50):
+        """Keyset pagination via primary key (tidak memakai OFFSET)"""
+        cursor = await self._execute_query(
+            "SELECT id, username, role FROM users WHERE id > %s ORDER BY id LIMIT %s",
+            (after_id, limit),
+            read_only=True
+        )
+        return await cursor.fetchall()
+
+    async def search_users(self, keyword, limit=50, after_id=0):
+        """Pencarian substring (full scan), dibatasi limit"""
+        cursor = await self._execute_query(
+            """SELECT id, username, role FROM users
+            WHERE username LIKE %s ESCAPE '!' AND id > %s
+            ORDER BY id LIMIT %s""",
+            (f"%{escape_like(keyword)}%", after_id, limit),
+            read_only=True
         )
         return await cursor.fetchall()
 
-    async def search_users(self, keyword):
+    async def search_users_by_prefix(self, prefix, limit=50, after_username=''):
+        """Pencarian prefix memakai unique index username (range scan)"""
         cursor = await self._execute_query(
-            "SELECT id, username, role FROM users WHERE username LIKE %s",
-            (f"%{keyword}%",)
+            """SELECT id, username, role FROM users
+            WHERE username LIKE %s ESCAPE '!' AND username > %s
+            ORDER BY username LIMIT %s""",
+            (f"{escape_like(prefix)}%", after_username, limit),
+            read_only=True
         )
         return await cursor.fetchall()
 
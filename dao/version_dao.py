@@ -0,0 +1,98 @@
+import aiomysql
+from dao.resilience import run_with_retry
+from utils.invalidation import bus, version_events
+from utils.exceptions import DatabaseError
+
+# entity_id untuk versi level tabel (bukan per baris)
+TABLE_VERSION = 0
+
+
+class VersionDAO:
+    """Counter versi per tabel/per baris untuk validasi cache HTTP (ETag)"""
+
+    def __init__(self, db_pool):
+        self.db_pool = db_pool
+
+    async def _execute_query(self, query, params=None, read_only=False):
+        """Utility method untuk handle operasi database (retry untuk error transien)"""
+        return await run_with_retry(
+            lambda: self._execute_once(query, params, read_only),
+            idempotent=read_only
+        )
+
+    async def _execute_once(self, query, params=None, read_only=False):
+        async with self.db_pool.acquire(read_only=read_only) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                try:
+                    await cursor.execute(query, params or ())
+                    if not read_only:
+                        await conn.commit()
+                    return cursor
+                except aiomysql.Error as e:
+                    if not read_only:
+                        await conn.rollback()
+                    raise DatabaseError(f"Database error: {str(e)}") from e
+
+    @staticmethod
+    def _bump_statement(keys):
+        placeholders = ", ".join(["(%s, %s)"] * len(keys))
+        params = [value for key in keys for value in key]
+        return (
+            f"""INSERT INTO entity_versions (entity, entity_id)
+            VALUES {placeholders}
+            ON DUPLICATE KEY UPDATE version = version + 1""",
+            tuple(params)
+        )
+
+    async def bump_in(self, conn, *keys):
+        """Naikkan versi di transaksi penulis (conn), sehingga versi dan
+        datanya ter-commit (atau di-rollback) bersama. Setelah COMMIT,
+        pemanggil mengirim invalidasi dengan publish()."""
+        if not keys:
+            return
+        async with conn.cursor() as cursor:
+            await cursor.execute(*self._bump_statement(keys))
+
+    @staticmethod
+    def publish(*keys):
+        """Kirim event bus untuk versi yang baru naik (versi level tabel ->
+        seluruh namespace, versi baris -> satu key, mis. ('book_stock', id))"""
+        bus.publish(*version_events(keys))
+
+    async def get_many(self, *keys):
+        """Ambil versi beberapa key sekaligus; key yang belum pernah ditulis bernilai 0"""
+        conditions = " OR ".join(["(entity = %s AND entity_id = %s)"] * len(keys))
+        params = [value for key in keys for value in key]
+        cursor = await self._execute_query(
+            f"""SELECT entity, entity_id, version, updated_at
+            FROM entity_versions
+            WHERE {conditions}""",
+            tuple(params),
+            read_only=True
+        )
+        rows = {(row['entity'], row['entity_id']): row for row in await cursor.fetchall()}
+        return [
+            rows.get(key, {'version': 0, 'updated_at': None})
+            for key in keys
+        ]
+
+    async def latest_update(self):
+        """updated_at terbaru (awal polling bus invalidasi)"""
+        cursor = await self._execute_query(
+            "SELECT MAX(updated_at) AS latest FROM entity_versions",
+            read_only=True
+        )
+        return (await cursor.fetchone())['latest']
+
+    async def changed_since(self, since):
+        """Versi yang berubah sejak since (inklusif; resolusi updated_at 1 detik)"""
+        cursor = await self._execute_query(
+            """SELECT entity, entity_id, version, updated_at
+            FROM entity_versions WHERE updated_at >= %s""",
+            (since,),
+            read_only=True
+        )
+        return await cursor.fetchall()
+
+    async def get(self, entity, entity_id=TABLE_VERSION):
+        return (await self.get_many((entity, entity_id)))[0]
@@ -19,7 +19,12 @@ CREATE TABLE `books` (
     `pengarang` varchar(50) NOT NULL,
     `stok` int NOT NULL,
     `tahun_terbit` int NOT NULL,
-    PRIMARY KEY (`id`)
+    `version` int NOT NULL DEFAULT 1,
+    `updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    `branch_id` int NOT NULL DEFAULT 1,
+    PRIMARY KEY (`id`),
+    KEY `idx_books_judul` (`judul`),
+    KEY `idx_books_pengarang` (`pengarang`)
 );
 
 CREATE TABLE `peminjaman` (
@@ -29,17 +34,87 @@ CREATE TABLE `peminjaman` (
     `tgl_pinjam` date NOT NULL,
     `tgl_kembali` date DEFAULT NULL,
     `status` enum('dipinjam','dikembalikan') NOT NULL,
+    `branch_id` int NOT NULL DEFAULT 1,
     PRIMARY KEY (`id`),
-    KEY `user_id` (`user_id`),
+    KEY `idx_peminjaman_user_status` (`user_id`, `status`, `book_id`),
     KEY `book_id` (`book_id`),
+    KEY `idx_peminjaman_status_tgl` (`status`, `tgl_pinjam`),
+    KEY `idx_peminjaman_tgl_pinjam` (`tgl_pinjam`),
     CONSTRAINT `fk_peminjaman_books` FOREIGN KEY (`book_id`)
-        REFERENCES `books` (`id`) ON DELETE CASCADE,
+        REFERENCES `books` (`id`),
     CONSTRAINT `peminjaman_ibfk_1` FOREIGN KEY (`user_id`)
-        REFERENCES `users` (`id`),
-    CONSTRAINT `peminjaman_ibfk_2` FOREIGN KEY (`book_id`)
-        REFERENCES `books` (`id`)
+        REFERENCES `users` (`id`)
+);
+
+-- Arsip peminjaman dikembalikan (lihat migrations/0007_peminjaman_history.sql)
+CREATE TABLE `peminjaman_history` (
+    `id` int NOT NULL,
+    `user_id` int NOT NULL,
+    `book_id` int NOT NULL,
+    `tgl_pinjam` date NOT NULL,
+    `tgl_kembali` date DEFAULT NULL,
+    `status` enum('dipinjam','dikembalikan') NOT NULL,
+    `archived_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    `branch_id` int NOT NULL DEFAULT 1,
+    PRIMARY KEY (`id`),
+    KEY `idx_peminjaman_history_user` (`user_id`, `tgl_pinjam`),
+    KEY `idx_peminjaman_history_book` (`book_id`),
+    KEY `idx_peminjaman_history_tgl_pinjam` (`tgl_pinjam`),
+    KEY `idx_peminjaman_history_status_tgl` (`status`, `tgl_pinjam`),
+    CONSTRAINT `fk_peminjaman_history_books` FOREIGN KEY (`book_id`)
+        REFERENCES `books` (`id`),
+    CONSTRAINT `fk_peminjaman_history_users` FOREIGN KEY (`user_id`)
+        REFERENCES `users` (`id`)
 );
 
+CREATE TABLE `entity_versions` (
+    `entity` varchar(32) NOT NULL,
+    `entity_id` int NOT NULL DEFAULT 0,
+    `version` bigint NOT NULL DEFAULT 1,
+    `updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (`entity`, `entity_id`),
+    KEY `idx_entity_versions_updated_at` (`updated_at`)
+);
+
+CREATE TABLE `refresh_tokens` (
+    `id` bigint NOT NULL AUTO_INCREMENT,
+    `user_id` int NOT NULL,
+    `token_hash` char(64) NOT NULL,
+    `family_id` char(32) NOT NULL,
+    `expires_at` datetime NOT NULL,
+    `revoked_at` datetime DEFAULT NULL,
+    `created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `token_hash` (`token_hash`),
+    KEY `family_id` (`family_id`),
+    KEY `user_id` (`user_id`),
+    CONSTRAINT `fk_refresh_tokens_users` FOREIGN KEY (`user_id`)
+        REFERENCES `users` (`id`) ON DELETE CASCADE
+);
+
+-- Skema di atas sudah mencakup semua file migrations/; perubahan skema
+-- berikutnya ditambahkan sebagai migrasi baru (python migrate.py up)
+CREATE TABLE `schema_migrations` (
+    `version` char(4) NOT NULL,
+    `name` varchar(100) NOT NULL,
+    `checksum` char(64) DEFAULT NULL,
+    `applied_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    `duration_ms` int DEFAULT NULL,
+    PRIMARY KEY (`version`)
+);
+
+INSERT INTO schema_migrations (version, name) VALUES
+    ('0001', 'entity_versions'),
+    ('0002', 'books_row_version'),
+    ('0003', 'refresh_tokens'),
+    ('0004', 'peminjaman_indexes'),
+    ('0005', 'books_indexes'),
+    ('0006', 'drop_duplicate_book_fk'),
+    ('0007', 'peminjaman_history'),
+    ('0008', 'branch_id'),
+    ('0009', 'entity_versions_updated_at'),
+    ('0010', 'restrict_book_fks');
+
 FLUSH PRIVILEGES;
 
 INSERT INTO books (judul, pengarang, stok, tahun_terbit) VALUES
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+
+from config import settings
+from dao.pool_waits import pool_waits
+from dao.resilience import breaker
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ROUTE_CLASSES = ('reads', 'writes', 'auth', 'reports')
+
+AUTH_PATHS = ('/login', '/token/refresh', '/logout')
+REPORT_PREFIXES = ('/reports', '/analytics')
+BYPASS_PATHS = ('/health',)
+
+
+def classify(method, path):
+    """Kelompokkan request ke kelas rute untuk pembatasan concurrency"""
+    if path in AUTH_PATHS:
+        return 'auth'
+    if path.startswith(REPORT_PREFIXES):
+        return 'reports'
+    if method in ('GET', 'HEAD', 'OPTIONS'):
+        return 'reads'
+    return 'writes'
+
+
+class RouteClassLimiter:
+    """Batas request in-flight dengan antrean pendek ber-deadline"""
+
+    def __init__(self, name, max_in_flight, max_queue, queue_timeout):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def acquire(self):
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return self._admit()
+
+        # Antrean sudah penuh: tolak langsung tanpa menunggu
+        if self.waiting >= self.max_queue:
+            self.shed += 1
+            return False
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            return False
+        finally:
+            self.waiting -= 1
+        return self._admit()
+
+    def _admit(self):
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self):
+        return {
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'max_in_flight': self.max_in_flight,
+            'max_queue': self.max_queue,
+            'admitted': self.admitted,
+            'shed': self.shed,
+            'timed_out': self.timed_out,
+        }
+
+
+class AdmissionController:
+    """ASGI middleware: membatasi request per kelas rute sebelum masuk ke Flask.
+
+    Request yang datang saat pool database jenuh (antrean acquire melebihi
+    ADMISSION_POOL_WAITERS_MAX atau penunggu terdepan lebih lama dari
+    ADMISSION_POOL_WAIT_MS), yang tidak mendapat slot dalam
+    ADMISSION_QUEUE_TIMEOUT_MS, atau yang datang saat antrean kelasnya penuh,
+    langsung dijawab 503 + Retry-After sehingga worker tidak menumpuk request
+    yang menunggu database.
+    """
+
+    def __init__(self, app, config=None):
+        self.app = app
+        self.config = config or settings.admission
+        timeout = self.config.ADMISSION_QUEUE_TIMEOUT_MS / 1000.0
+        self.limiters = {
+            name: RouteClassLimiter(
+                name,
+                getattr(self.config, f'ADMISSION_{name.upper()}_MAX'),
+                getattr(self.config, f'ADMISSION_{name.upper()}_QUEUE'),
+                timeout
+            )
+            for name in ROUTE_CLASSES
+        }
+        self.pool_shed = 0
+        metrics.register_collector('admission', self.stats)
+        metrics.register_collector('db_pool', pool_waits.stats)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope['type'] != 'http'
+            or not self.config.ADMISSION_ENABLED
+            or scope['path'] in BYPASS_PATHS
+        ):
+            return await self.app(scope, receive, send)
+
+        # Database sedang down: jawab 503 tanpa memakai slot/worker
+        if breaker.is_open():
+            return await self._reject(
+                send, 'Database sedang tidak tersedia, silakan coba lagi', breaker.retry_after()
+            )
+
+        limiter = self.limiters[classify(scope['method'], scope['path'])]
+        if self.pool_saturated():
+            self.pool_shed += 1
+            limiter.shed += 1
+            logger.warning(
+                f"Load shedding {scope['method']} {scope['path']} "
+                f"(pool database jenuh: {pool_waits.waiting} menunggu koneksi)"
+            )
+            return await self._reject(send)
+
+        if not await limiter.acquire():
+            logger.warning(
+                f"Load shedding {scope['method']} {scope['path']} "
+                f"(kelas {limiter.name}: {limiter.in_flight} in-flight, {limiter.waiting} antre)"
+            )
+            return await self._reject(send)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    def pool_saturated(self):
+        waiters_max = self.config.ADMISSION_POOL_WAITERS_MAX
+        wait_ms = self.config.ADMISSION_POOL_WAIT_MS
+        if waiters_max and pool_waits.waiting > waiters_max:
+            return True
+        return bool(wait_ms) and pool_waits.oldest_wait() * 1000 > wait_ms
+
+    async def _reject(self, send, message='Server sedang sibuk, silakan coba lagi', retry_after=None):
+        if retry_after is None:
+            retry_after = self.config.ADMISSION_RETRY_AFTER
+        body = json.dumps({
+            'error': 'Service Unavailable',
+            'message': message
+        }).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': 503,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'retry-after', str(retry_after).encode()),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    def stats(self):
+        return {
+            **{name: limiter.stats() for name, limiter in self.limiters.items()},
+            'pool_shed': self.pool_shed,
+        }
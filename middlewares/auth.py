@@ -3,6 +3,8 @@ import jwt
 from functools import wraps
 from config import settings  # Menggunakan settings terpusat
 from jwt import PyJWTError
+from dao import replicas
+from utils.exceptions import ServiceUnavailableError
 
 
 def token_required(roles=None):
@@ -33,8 +35,18 @@ def token_required(roles=None):
                 if roles and payload.get('role') not in roles:
                     return jsonify({"error": "Akses ditolak"}), 403
 
+                # Role di token bisa sudah berubah/user dihapus: cocokkan
+                # dengan profil terkini (di-cache per worker)
+                if roles:
+                    from services.user_service import get_user_profile
+                    profile = await get_user_profile(payload.get('id'))
+                    if not profile or profile['role'] not in roles:
+                        return jsonify({"error": "Akses ditolak"}), 403
+
                 # Simpan payload di context request
                 request.user = payload
+                # Jendela read-your-writes replica berlaku per user
+                replicas.identify(payload.get('id'))
 
             except jwt.ExpiredSignatureError:
                 return jsonify({"error": "Token kadaluarsa"}), 401
@@ -42,6 +54,8 @@ def token_required(roles=None):
                 return jsonify({"error": "Issuer token tidak valid"}), 401
             except PyJWTError as e:
                 return jsonify({"error": f"Error validasi token: {str(e)}"}), 401
+            except ServiceUnavailableError:
+                raise
             except Exception as e:
                 return jsonify({"error": "Error internal server"}), 500
 
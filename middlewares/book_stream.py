@@ -0,0 +1,130 @@
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from config import settings
+from services.stock_stream import hub
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = '/books/stream'
+# Jeda reconnect yang disarankan ke EventSource (ms)
+RETRY_MS = 3000
+
+
+class BookStream:
+    """ASGI endpoint GET /books/stream?ids=1,2,3 (Server-Sent Events).
+
+    Dilayani langsung di event loop hypercorn: lewat WsgiToAsgi satu koneksi
+    yang terbuka lama akan menahan thread WSGI worker, dan lewat admission
+    control akan menahan slot 'reads'. Tanpa ids, semua perubahan stok dikirim.
+    """
+
+    def __init__(self, app, config=None):
+        self.app = app
+        self.config = config or settings.stock_stream
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope['type'] != 'http'
+            or scope['path'] != STREAM_PATH
+            or not self.config.SSE_ENABLED
+        ):
+            return await self.app(scope, receive, send)
+        if scope['method'] != 'GET':
+            return await self._error(send, 405, 'Method Not Allowed', 'Gunakan GET')
+
+        try:
+            book_ids = self._parse_ids(scope)
+        except ValueError as e:
+            return await self._error(send, 400, 'Validation Error', str(e))
+
+        subscriber = hub.subscribe(book_ids)
+        if subscriber is None:
+            return await self._error(
+                send, 503, 'Service Unavailable', 'Terlalu banyak stream aktif, silakan coba lagi',
+                retry_after=self.config.SSE_KEEPALIVE_S
+            )
+        try:
+            await self._stream(subscriber, receive, send)
+        finally:
+            hub.unsubscribe(subscriber)
+
+    def _parse_ids(self, scope):
+        query = parse_qs(scope.get('query_string', b'').decode('latin1'))
+        raw = ','.join(query.get('ids', []))
+        if not raw.strip():
+            return None
+        try:
+            book_ids = {int(item) for item in raw.split(',') if item.strip()}
+        except ValueError:
+            raise ValueError("ids harus daftar id buku, mis. ids=1,2,3")
+        if len(book_ids) > self.config.SSE_MAX_IDS:
+            raise ValueError(f"Maksimal {self.config.SSE_MAX_IDS} id per stream")
+        return book_ids
+
+    async def _stream(self, subscriber, receive, send):
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ]
+        })
+        await self._send(send, f"retry: {RETRY_MS}\n\n")
+
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        closed = False
+        try:
+            while True:
+                wakeup = asyncio.ensure_future(subscriber.wakeup.wait())
+                done, _ = await asyncio.wait(
+                    {wakeup, disconnected},
+                    timeout=self.config.SSE_KEEPALIVE_S,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                wakeup.cancel()
+                if disconnected in done:
+                    closed = True
+                    break
+                if subscriber.lagging:
+                    # Klien terlalu lambat: putus dan minta muat ulang
+                    metrics.incr('sse.dropped')
+                    await self._send(send, "event: reset\ndata: {}\n\n")
+                    break
+                events = subscriber.drain()
+                if not events:
+                    await self._send(send, ": keep-alive\n\n")
+                    continue
+                await self._send(send, ''.join(
+                    f"event: stock\ndata: {json.dumps(event)}\n\n" for event in events
+                ))
+                metrics.incr('sse.events', len(events))
+        except OSError as e:
+            closed = True
+            logger.info(f"Stream stok terputus: {str(e)}")
+        finally:
+            disconnected.cancel()
+        if not closed:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    async def _wait_disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def _send(self, send, text):
+        await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+
+    async def _error(self, send, status, error, message, retry_after=None):
+        headers = [(b'content-type', b'application/json')]
+        if retry_after is not None:
+            headers.append((b'retry-after', str(retry_after).encode('ascii')))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({
+            'type': 'http.response.body',
+            'body': json.dumps({'error': error, 'message': message}).encode('utf-8')
+        })
@@ -0,0 +1,150 @@
+import gzip
+import zlib
+
+from flask import request
+
+from config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli opsional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard opsional
+    zstandard = None
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits 31 = format gzip (header + trailer)
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        return self._obj.compress(chunk) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk):
+        return self._obj.process(chunk) + self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk):
+        return self._obj.compress(chunk) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class Compress:
+    """Kompresi response (br/zstd/gzip) berdasarkan header Accept-Encoding"""
+
+    def __init__(self, app=None, config=None):
+        self.config = config or settings.compression
+        self.mimetypes = {
+            m.strip() for m in self.config.COMPRESS_MIMETYPES.split(',') if m.strip()
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if self.config.COMPRESS_ENABLED:
+            app.after_request(self.after_request)
+
+    def available_encodings(self):
+        """Urutan preferensi server, hanya untuk library yang terpasang"""
+        encodings = []
+        if brotli is not None:
+            encodings.append('br')
+        if zstandard is not None:
+            encodings.append('zstd')
+        encodings.append('gzip')
+        return encodings
+
+    def choose_encoding(self, accept_encodings):
+        best, best_quality = None, 0
+        for encoding in self.available_encodings():
+            quality = accept_encodings[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def after_request(self, response):
+        if not self._should_compress(response):
+            return response
+
+        encoding = self.choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.config.COMPRESS_MIN_SIZE:
+                return response
+            response.set_data(self._compress_body(data, encoding))
+
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+
+        # Representasi terkompresi tidak identik per byte
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _should_compress(self, response):
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if request.method == 'HEAD' or response.direct_passthrough:
+            return False
+        if 'Content-Encoding' in response.headers:
+            return False
+        if 'no-transform' in response.headers.get('Cache-Control', ''):
+            return False
+        return response.mimetype in self.mimetypes
+
+    def _new_stream(self, encoding):
+        if encoding == 'br':
+            return _BrotliStream(self.config.COMPRESS_BROTLI_QUALITY)
+        if encoding == 'zstd':
+            return _ZstdStream(self.config.COMPRESS_ZSTD_LEVEL)
+        return _GzipStream(self.config.COMPRESS_GZIP_LEVEL)
+
+    def _compress_body(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.config.COMPRESS_BROTLI_QUALITY)
+        if encoding == 'zstd':
+            return zstandard.ZstdCompressor(level=self.config.COMPRESS_ZSTD_LEVEL).compress(data)
+        return gzip.compress(data, compresslevel=self.config.COMPRESS_GZIP_LEVEL, mtime=0)
+
+    def _compress_stream(self, chunks, encoding):
+        """Flush per chunk agar endpoint export tetap terkirim bertahap"""
+        stream = self._new_stream(encoding)
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                if chunk:
+                    yield stream.compress(chunk)
+            yield stream.finish()
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
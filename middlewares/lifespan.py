@@ -0,0 +1,28 @@
+import logging
+
+from dao import loop_pools
+
+logger = logging.getLogger(__name__)
+
+
+class Lifespan:
+    """ASGI lifespan: pool bersama event loop worker (shard, replica) ditutup
+    saat worker hypercorn berhenti. Scope lain diteruskan apa adanya."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await self.app(scope, receive, send)
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                try:
+                    await loop_pools.close()
+                except Exception as e:
+                    logger.warning(f"Gagal menutup pool database: {str(e)}")
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
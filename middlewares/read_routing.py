@@ -0,0 +1,59 @@
+import math
+import time
+
+from flask import g, request
+
+from config import settings
+from dao import replicas
+
+# Batas waktu (epoch) bacaan klien ini harus ke primary setelah ia menulis
+COOKIE_NAME = 'db_primary_until'
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class ReadRouting:
+    """Sesi read-your-writes per request untuk routing replica (dao/replicas.py).
+
+    Hanya aktif jika DB_REPLICA_HOSTS/DB_ANALYTICS_HOST diisi. Cookie hanya
+    mengarahkan bacaan ke primary, jadi tidak perlu ditandatangani.
+    """
+
+    def __init__(self, app=None, config=None):
+        self.config = config or settings.database
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if self.config.DB_REPLICA_HOSTS or self.config.DB_ANALYTICS_HOST:
+            app.before_request(self.before_request)
+            app.after_request(self.after_request)
+            app.teardown_request(self.teardown_request)
+
+    def before_request(self):
+        try:
+            primary_until = float(request.cookies.get(COOKIE_NAME, 0))
+        except ValueError:
+            primary_until = 0.0
+        # Klien tidak boleh memperpanjang pin ke primary melebihi satu jendela
+        if not math.isfinite(primary_until):
+            primary_until = 0.0
+        primary_until = min(primary_until, time.time() + self.config.DB_READ_YOUR_WRITES_S)
+        g.read_session, g.read_session_token = replicas.begin(
+            primary_until,
+            pinned=request.method not in SAFE_METHODS
+        )
+
+    def after_request(self, response):
+        session = g.get('read_session')
+        if session is not None and session.wrote:
+            window = self.config.DB_READ_YOUR_WRITES_S
+            response.set_cookie(
+                COOKIE_NAME, f"{time.time() + window:.3f}",
+                max_age=window, httponly=True, samesite='Lax'
+            )
+        return response
+
+    def teardown_request(self, exc):
+        token = g.pop('read_session_token', None)
+        if token is not None:
+            replicas.end(token)
@@ -0,0 +1,89 @@
+import logging
+import threading
+from functools import wraps
+
+from flask import make_response, request
+
+from config import settings
+from dao import round_trips
+from dao.sharding import node_count
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# endpoint -> statistik round trip (per worker)
+_routes = {}
+_lock = threading.Lock()
+
+
+def _observe(counter):
+    with _lock:
+        route = _routes.setdefault(counter.route, {
+            'budget': counter.budget,
+            'requests': 0,
+            'round_trips': 0,
+            'max': 0,
+            'over_budget': 0,
+        })
+        route['requests'] += 1
+        route['round_trips'] += counter.count
+        route['max'] = max(route['max'], counter.count)
+        route['over_budget'] += counter.exceeded
+    metrics.incr('db.round_trips', counter.count)
+    if counter.exceeded:
+        metrics.incr('db.round_trips.over_budget')
+
+
+def stats():
+    with _lock:
+        return {
+            route: {**item, 'avg': round(item['round_trips'] / item['requests'], 2)}
+            for route, item in _routes.items()
+        }
+
+
+metrics.register_collector('round_trips', stats)
+
+
+def round_trip_budget(budget):
+    """Batasi jumlah round trip database per request untuk route ini.
+
+    Dipasang tepat di bawah @bp.route agar query autentikasi ikut dihitung.
+    Mode DB_ROUND_TRIP_MODE: 'warn' (log, default), 'enforce' (test: header
+    X-DB-Round-Trips/X-DB-Round-Trip-Budget dikirim dan pelanggaran dicatat
+    sebagai error; tests/test_round_trip_budgets.py gagal karenanya), 'off'.
+    Response tidak diubah menjadi error: saat hitungan selesai, tulis handler
+    sudah di-commit. Budget dihitung untuk satu node; dengan sharding dikalikan
+    jumlah node karena query di-fan-out.
+    """
+    budget *= node_count()
+
+    def decorator(f):
+        @wraps(f)
+        async def wrapped(*args, **kwargs):
+            mode = settings.round_trips.DB_ROUND_TRIP_MODE
+            if mode == 'off':
+                return await f(*args, **kwargs)
+
+            counter, token = round_trips.start(request.endpoint or f.__name__, budget)
+            try:
+                response = await f(*args, **kwargs)
+            finally:
+                round_trips.stop(token)
+                _observe(counter)
+
+            if counter.exceeded:
+                logger.log(
+                    logging.ERROR if mode == 'enforce' else logging.WARNING,
+                    f"Round trip database {counter.route}: {counter.count} melebihi budget {budget}; "
+                    f"statement: {counter.statements}"
+                )
+            if mode == 'enforce':
+                response = make_response(response)
+                response.headers['X-DB-Round-Trips'] = str(counter.count)
+                response.headers['X-DB-Round-Trip-Budget'] = str(budget)
+            return response
+
+        return wrapped
+
+    return decorator
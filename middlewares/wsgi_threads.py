@@ -0,0 +1,39 @@
+"""Jembatan ASGI -> Flask (WSGI) dengan beberapa thread per worker.
+
+asgiref WsgiToAsgi menjalankan aplikasi WSGI lewat sync_to_async yang
+thread-sensitive: semua request satu worker hypercorn berbagi satu thread
+dan dilayani bergiliran. ThreadedWsgiToAsgi memberi setiap request thread
+dari executor berukuran WSGI_THREADS. Async view Flask (async_to_sync)
+tetap dijalankan di event loop worker, jadi request yang berjalan
+bersamaan benar-benar tumpang tindih di loop yang sama: pool per loop
+(dao.sharding, replica) dipakai bersama dan single-flight menggabungkan
+query identik.
+"""
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+# Fungsi sinkron asli di balik @sync_to_async pada WsgiToAsgiInstance.run_wsgi_app
+_run_wsgi_app = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    def __init__(self, wsgi_application, threads):
+        super().__init__(wsgi_application)
+        self.threads = threads
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        await _ThreadedInstance(self.wsgi_application, self.executor)(scope, receive, send)
+
+
+class _ThreadedInstance(WsgiToAsgiInstance):
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        run = functools.partial(_run_wsgi_app, self)
+        return await sync_to_async(run, thread_sensitive=False, executor=self.executor)(body)
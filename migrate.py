@@ -0,0 +1,266 @@
+"""Runner migrasi skema MySQL berversi (folder migrations/).
+
+File migrasi bernama NNNN_deskripsi.sql dan diterapkan berurutan; versi
+yang sudah diterapkan dicatat di tabel schema_migrations. DDL MySQL tidak
+transaksional: statement dijalankan satu per satu dan versi dicatat setelah
+seluruh file berhasil. Jika satu statement gagal, periksa statement yang
+sudah terlanjur diterapkan sebelum menjalankan ulang.
+
+    python migrate.py status
+    python migrate.py up [--to 0005] [--dry-run]
+    python migrate.py baseline 0003   # database lama yang sudah sesuai s/d 0003
+
+Selama ALTER TABLE berjalan, progres dibaca dari performance_schema
+(stage/innodb/alter%) lewat koneksi kedua. Setiap statement berjalan di
+koneksi baru; statement SET SESSION dalam file berlaku untuk statement
+berikutnya di file yang sama.
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+
+import pymysql
+
+from config import get_sync_db_config
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+FILENAME_RE = re.compile(r'^(\d{4})_(\w+)\.sql$')
+SESSION_RE = re.compile(r'^SET\s+SESSION\s', re.IGNORECASE)
+
+SCHEMA_TABLE = """
+CREATE TABLE IF NOT EXISTS `schema_migrations` (
+    `version` char(4) NOT NULL,
+    `name` varchar(100) NOT NULL,
+    `checksum` char(64) DEFAULT NULL,
+    `applied_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    `duration_ms` int DEFAULT NULL,
+    PRIMARY KEY (`version`)
+)
+"""
+
+PROGRESS_QUERY = """
+SELECT s.EVENT_NAME, s.WORK_COMPLETED, s.WORK_ESTIMATED
+FROM performance_schema.events_stages_current s
+JOIN performance_schema.threads t ON t.THREAD_ID = s.THREAD_ID
+WHERE t.PROCESSLIST_ID = %s
+"""
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, encoding='utf-8') as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode('utf-8')).hexdigest()
+
+    def statements(self):
+        """Pecah per ';' di akhir baris, abaikan komentar '--'"""
+        lines = [line for line in self.sql.splitlines() if not line.strip().startswith('--')]
+        return [
+            statement.strip()
+            for statement in re.split(r';\s*$', '\n'.join(lines), flags=re.MULTILINE)
+            if statement.strip()
+        ]
+
+
+def load_migrations():
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = FILENAME_RE.match(filename)
+        if match:
+            migrations.append(Migration(match.group(1), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise SystemExit("Versi migrasi duplikat di folder migrations/")
+    return migrations
+
+
+def connect(**overrides):
+    return pymysql.connect(**{**get_sync_db_config(), 'autocommit': True, **overrides})
+
+
+def applied_versions(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(SCHEMA_TABLE)
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+        return dict(cursor.fetchall())
+
+
+def enable_stage_instruments(connection):
+    """Aktifkan instrumen progres ALTER; butuh hak UPDATE pada performance_schema"""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE performance_schema.setup_instruments SET ENABLED = 'YES', TIMED = 'YES' "
+                "WHERE NAME LIKE 'stage/innodb/alter%'"
+            )
+            cursor.execute(
+                "UPDATE performance_schema.setup_consumers SET ENABLED = 'YES' "
+                "WHERE NAME LIKE 'events_stages_%'"
+            )
+        return True
+    except pymysql.MySQLError as e:
+        print(f"  (progres performance_schema tidak tersedia: {e.args[-1]})")
+        return False
+
+
+def execute_with_progress(statement, lock_wait_timeout, poll_interval, monitor, session=()):
+    """Jalankan statement di koneksi sendiri; cetak progres dari koneksi monitor"""
+    worker = connect()
+    with worker.cursor() as cursor:
+        # Jangan menahan antrean query aplikasi terlalu lama menunggu metadata lock
+        cursor.execute("SET SESSION lock_wait_timeout = %s", (lock_wait_timeout,))
+        for setting in session:
+            cursor.execute(setting)
+
+    result = {}
+
+    def run():
+        try:
+            with worker.cursor() as cursor:
+                cursor.execute(statement)
+        except Exception as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=run)
+    started = time.perf_counter()
+    thread.start()
+    last_line = None
+    while thread.is_alive():
+        thread.join(poll_interval)
+        if not thread.is_alive():
+            break
+        line = f"  ... {time.perf_counter() - started:.0f}s"
+        if monitor is not None:
+            try:
+                with monitor.cursor() as cursor:
+                    cursor.execute(PROGRESS_QUERY, (worker.thread_id(),))
+                    stage = cursor.fetchone()
+            except pymysql.MySQLError:
+                monitor, stage = None, None
+            if stage:
+                event, completed, estimated = stage
+                line += f" {event.rsplit('/', 1)[-1]}"
+                if estimated:
+                    line += f" {100.0 * (completed or 0) / estimated:.1f}% ({completed}/{estimated})"
+        if line != last_line:
+            print(line, flush=True)
+            last_line = line
+    worker.close()
+
+    if 'error' in result:
+        raise result['error']
+    return time.perf_counter() - started
+
+
+def record(connection, migration, duration_ms=None):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """INSERT INTO schema_migrations (version, name, checksum, duration_ms)
+            VALUES (%s, %s, %s, %s)""",
+            (migration.version, migration.name, migration.checksum, duration_ms)
+        )
+
+
+def warn_changed(migrations, applied):
+    for migration in migrations:
+        checksum = applied.get(migration.version)
+        if checksum and checksum != migration.checksum:
+            print(f"Peringatan: {migration.version}_{migration.name}.sql berubah setelah diterapkan")
+
+
+def command_status(args):
+    migrations = load_migrations()
+    connection = connect()
+    applied = applied_versions(connection)
+    for migration in migrations:
+        state = 'applied' if migration.version in applied else 'pending'
+        print(f"{migration.version}  {state:<8} {migration.name}")
+    warn_changed(migrations, applied)
+    connection.close()
+
+
+def command_up(args):
+    migrations = load_migrations()
+    connection = connect()
+    applied = applied_versions(connection)
+    warn_changed(migrations, applied)
+
+    pending = [
+        migration for migration in migrations
+        if migration.version not in applied and (not args.to or migration.version <= args.to)
+    ]
+    if not pending:
+        print("Skema sudah terbaru")
+        return
+
+    monitor = None
+    if not args.dry_run and enable_stage_instruments(connection):
+        monitor = connection
+
+    for migration in pending:
+        print(f"== {migration.version}_{migration.name}")
+        total = 0.0
+        session = []
+        for statement in migration.statements():
+            print(statement if args.dry_run else f"  {statement.splitlines()[0]} ...")
+            if SESSION_RE.match(statement):
+                session.append(statement)
+                continue
+            if args.dry_run:
+                continue
+            try:
+                total += execute_with_progress(
+                    statement, args.lock_wait_timeout, args.poll_interval, monitor, session
+                )
+            except pymysql.MySQLError as e:
+                print(f"Gagal pada {migration.version}: {e}", file=sys.stderr)
+                raise SystemExit(1)
+        if not args.dry_run:
+            record(connection, migration, int(total * 1000))
+            print(f"   selesai dalam {total:.1f}s")
+    connection.close()
+
+
+def command_baseline(args):
+    """Tandai migrasi s/d versi tertentu sebagai sudah diterapkan tanpa menjalankannya"""
+    migrations = load_migrations()
+    connection = connect()
+    applied = applied_versions(connection)
+    for migration in migrations:
+        if migration.version <= args.version and migration.version not in applied:
+            record(connection, migration)
+            print(f"{migration.version}  ditandai applied")
+    connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('status', help='daftar migrasi dan statusnya').set_defaults(func=command_status)
+
+    up = commands.add_parser('up', help='terapkan migrasi yang belum dijalankan')
+    up.add_argument('--to', help='berhenti setelah versi ini')
+    up.add_argument('--dry-run', action='store_true', help='cetak statement tanpa menjalankan')
+    up.add_argument('--lock-wait-timeout', type=int, default=10,
+                    help='detik menunggu metadata lock sebelum ALTER dibatalkan')
+    up.add_argument('--poll-interval', type=float, default=2.0, help='interval laporan progres (detik)')
+    up.set_defaults(func=command_up)
+
+    baseline = commands.add_parser('baseline', help='tandai migrasi s/d VERSION sebagai applied')
+    baseline.add_argument('version')
+    baseline.set_defaults(func=command_baseline)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
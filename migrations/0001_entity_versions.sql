@@ -0,0 +1,8 @@
+-- Counter versi per entitas untuk ETag/Last-Modified (VersionDAO)
+CREATE TABLE IF NOT EXISTS `entity_versions` (
+    `entity` varchar(32) NOT NULL,
+    `entity_id` int NOT NULL DEFAULT 0,
+    `version` bigint NOT NULL DEFAULT 1,
+    `updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (`entity`, `entity_id`)
+);
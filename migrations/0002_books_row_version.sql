@@ -0,0 +1,5 @@
+-- Versi baris buku untuk If-Match (optimistic concurrency)
+ALTER TABLE `books`
+    ADD COLUMN `version` int NOT NULL DEFAULT 1,
+    ADD COLUMN `updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    ALGORITHM=INPLACE, LOCK=NONE;
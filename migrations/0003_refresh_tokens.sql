@@ -0,0 +1,16 @@
+-- Refresh token (hash SHA-256) dengan family untuk deteksi pemakaian ulang
+CREATE TABLE IF NOT EXISTS `refresh_tokens` (
+    `id` bigint NOT NULL AUTO_INCREMENT,
+    `user_id` int NOT NULL,
+    `token_hash` char(64) NOT NULL,
+    `family_id` char(32) NOT NULL,
+    `expires_at` datetime NOT NULL,
+    `revoked_at` datetime DEFAULT NULL,
+    `created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `token_hash` (`token_hash`),
+    KEY `family_id` (`family_id`),
+    KEY `user_id` (`user_id`),
+    CONSTRAINT `fk_refresh_tokens_users` FOREIGN KEY (`user_id`)
+        REFERENCES `users` (`id`) ON DELETE CASCADE
+);
@@ -0,0 +1,14 @@
+-- Index untuk query panas peminjaman, dibangun online tanpa mengunci tulis:
+--   (user_id, status, book_id): pinjaman aktif user & cek buku sedang dipinjam;
+--     menggantikan index user_id (tetap bisa dipakai FK user_id)
+--   (status, tgl_pinjam): laporan dengan filter status + rentang tanggal
+--   (tgl_pinjam): laporan rentang tanggal & buku populer per tahun
+ALTER TABLE `peminjaman`
+    ADD INDEX `idx_peminjaman_user_status` (`user_id`, `status`, `book_id`),
+    ADD INDEX `idx_peminjaman_status_tgl` (`status`, `tgl_pinjam`),
+    ADD INDEX `idx_peminjaman_tgl_pinjam` (`tgl_pinjam`),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE `peminjaman`
+    DROP INDEX `user_id`,
+    ALGORITHM=INPLACE, LOCK=NONE;
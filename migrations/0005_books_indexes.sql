@@ -0,0 +1,6 @@
+-- Index judul/pengarang: pencarian prefix, DISTINCT judul pada filter
+-- laporan, dan pengurutan katalog
+ALTER TABLE `books`
+    ADD INDEX `idx_books_judul` (`judul`),
+    ADD INDEX `idx_books_pengarang` (`pengarang`),
+    ALGORITHM=INPLACE, LOCK=NONE;
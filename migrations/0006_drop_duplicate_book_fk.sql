@@ -0,0 +1,6 @@
+-- peminjaman.book_id punya dua FK ke books (fk_peminjaman_books dengan
+-- ON DELETE CASCADE dan peminjaman_ibfk_2 tanpa aksi); setiap tulis
+-- memeriksa keduanya. Hapus yang duplikat.
+ALTER TABLE `peminjaman`
+    DROP FOREIGN KEY `peminjaman_ibfk_2`,
+    ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,29 @@
+-- Arsip peminjaman yang sudah dikembalikan; diisi archive_peminjaman.py
+-- secara batch sehingga tabel peminjaman hanya berisi data baru dan query
+-- pinjaman aktif tidak melewati riwayat bertahun-tahun.
+--
+-- Partisi RANGE (tgl_pinjam) pada peminjaman tidak dipakai: InnoDB tidak
+-- mendukung partisi pada tabel yang memiliki foreign key, dan kolom partisi
+-- harus menjadi bagian dari setiap unique key (PRIMARY KEY id).
+--
+-- id menyimpan id asli peminjaman (bukan AUTO_INCREMENT). Butuh MySQL 8
+-- (counter AUTO_INCREMENT persisten) agar id yang sudah diarsip tidak
+-- dipakai ulang setelah restart.
+CREATE TABLE IF NOT EXISTS `peminjaman_history` (
+    `id` int NOT NULL,
+    `user_id` int NOT NULL,
+    `book_id` int NOT NULL,
+    `tgl_pinjam` date NOT NULL,
+    `tgl_kembali` date DEFAULT NULL,
+    `status` enum('dipinjam','dikembalikan') NOT NULL,
+    `archived_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (`id`),
+    KEY `idx_peminjaman_history_user` (`user_id`, `tgl_pinjam`),
+    KEY `idx_peminjaman_history_book` (`book_id`),
+    KEY `idx_peminjaman_history_tgl_pinjam` (`tgl_pinjam`),
+    KEY `idx_peminjaman_history_status_tgl` (`status`, `tgl_pinjam`),
+    CONSTRAINT `fk_peminjaman_history_books` FOREIGN KEY (`book_id`)
+        REFERENCES `books` (`id`) ON DELETE CASCADE,
+    CONSTRAINT `fk_peminjaman_history_users` FOREIGN KEY (`user_id`)
+        REFERENCES `users` (`id`)
+);
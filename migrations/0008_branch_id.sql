@@ -0,0 +1,13 @@
+-- Dimensi cabang: kunci sharding (dao/sharding.py). Buku dan peminjamannya
+-- selalu berada di node yang sama; data lama masuk cabang 1. Query di dalam
+-- satu node tidak memfilter kolom ini sehingga tidak perlu index.
+-- ALGORITHM=INSTANT (MySQL 8.0.12+): hanya mengubah metadata, tanpa rebuild.
+ALTER TABLE `books`
+    ADD COLUMN `branch_id` int NOT NULL DEFAULT 1,
+    ALGORITHM=INSTANT;
+ALTER TABLE `peminjaman`
+    ADD COLUMN `branch_id` int NOT NULL DEFAULT 1,
+    ALGORITHM=INSTANT;
+ALTER TABLE `peminjaman_history`
+    ADD COLUMN `branch_id` int NOT NULL DEFAULT 1,
+    ALGORITHM=INSTANT;
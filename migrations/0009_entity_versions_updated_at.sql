@@ -0,0 +1,6 @@
+-- Polling fallback bus invalidasi cache (utils/invalidation.py) membaca
+-- entity_versions WHERE updated_at >= ? setiap beberapa detik di setiap worker.
+-- Online DDL: index sekunder dibangun tanpa mengunci tulis.
+ALTER TABLE `entity_versions`
+    ADD INDEX `idx_entity_versions_updated_at` (`updated_at`),
+    ALGORITHM=INPLACE, LOCK=NONE;
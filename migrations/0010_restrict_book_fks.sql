@@ -0,0 +1,21 @@
+-- 0006 menghapus FK yang salah: yang tersisa fk_peminjaman_books dengan
+-- ON DELETE CASCADE, sehingga menghapus buku ikut menghapus peminjaman
+-- aktif; peminjaman_history (0007) punya cascade yang sama. Ganti keduanya
+-- dengan FK tanpa aksi (RESTRICT): buku yang punya peminjaman tidak bisa
+-- dihapus (BookDAO.delete_book menolaknya lebih dulu).
+--
+-- ADD FOREIGN KEY hanya bisa INPLACE jika foreign_key_checks=0; data yang
+-- ada sudah memenuhi FK lama sehingga tidak perlu diperiksa ulang.
+SET SESSION foreign_key_checks = 0;
+ALTER TABLE `peminjaman`
+    DROP FOREIGN KEY `fk_peminjaman_books`,
+    ALGORITHM=INPLACE, LOCK=NONE;
+ALTER TABLE `peminjaman`
+    ADD CONSTRAINT `fk_peminjaman_books` FOREIGN KEY (`book_id`) REFERENCES `books` (`id`),
+    ALGORITHM=INPLACE, LOCK=NONE;
+ALTER TABLE `peminjaman_history`
+    DROP FOREIGN KEY `fk_peminjaman_history_books`,
+    ALGORITHM=INPLACE, LOCK=NONE;
+ALTER TABLE `peminjaman_history`
+    ADD CONSTRAINT `fk_peminjaman_history_books` FOREIGN KEY (`book_id`) REFERENCES `books` (`id`),
+    ALGORITHM=INPLACE, LOCK=NONE;
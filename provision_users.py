@@ -0,0 +1,210 @@
+"""Provisioning user massal dari CSV dengan hashing bcrypt paralel.
+
+CSV wajib memiliki header username,password dan opsional role
+(default 'user'). Hash dibuat di process pool (semua core secara default)
+dengan cost BCRYPT_ROUNDS.
+
+    python provision_users.py members.csv --tsv members.tsv   # file untuk LOAD DATA
+    python provision_users.py members.csv --insert            # batch INSERT ke MySQL
+    python provision_users.py members.csv --insert --sqlite bench.db
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.passwords import hash_password, configured_rounds
+
+USERNAME_RE = re.compile(r'^[a-zA-Z0-9_]{3,20}$')
+ROLES = ('user', 'admin')
+# bcrypt hanya memakai 72 byte pertama password
+MAX_PASSWORD_BYTES = 72
+
+
+def read_users(path):
+    """Baca dan validasi CSV; kembalikan (rows, errors)"""
+    rows, errors, seen = [], [], set()
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        missing = {'username', 'password'} - set(reader.fieldnames or ())
+        if missing:
+            raise SystemExit(f"Kolom CSV tidak ditemukan: {', '.join(sorted(missing))}")
+
+        for line, record in enumerate(reader, start=2):
+            username = (record.get('username') or '').strip()
+            password = record.get('password') or ''
+            role = (record.get('role') or 'user').strip() or 'user'
+
+            if not USERNAME_RE.match(username):
+                errors.append((line, username, 'username harus 3-20 karakter alfanumerik/underscore'))
+            elif not password or len(password.encode('utf-8')) > MAX_PASSWORD_BYTES:
+                errors.append((line, username, f'password harus 1-{MAX_PASSWORD_BYTES} byte'))
+            elif role not in ROLES:
+                errors.append((line, username, 'role harus user atau admin'))
+            elif username.lower() in seen:
+                errors.append((line, username, 'username duplikat dalam file'))
+            else:
+                seen.add(username.lower())
+                rows.append((username, password, role))
+    return rows, errors
+
+
+def _hash_row(args):
+    username, password, role, rounds = args
+    return username, hash_password(password, rounds), role
+
+
+def hash_users(rows, workers=None, rounds=None):
+    rounds = rounds or configured_rounds()
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(len(rows) // (workers * 8), 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            _hash_row,
+            [(username, password, role, rounds) for username, password, role in rows],
+            chunksize=chunksize
+        ))
+
+
+def _tsv_escape(value):
+    # Escape default LOAD DATA (FIELDS ESCAPED BY '\\')
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+def write_tsv(path, hashed_rows):
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        for row in hashed_rows:
+            f.write('\t'.join(_tsv_escape(value) for value in row) + '\n')
+    return len(hashed_rows)
+
+
+def load_data_statement(path, upsert):
+    """Statement LOAD DATA untuk file TSV.
+
+    Upsert tidak memakai LOAD DATA ... REPLACE: REPLACE menghapus lalu
+    menyisipkan ulang baris users (id berubah, gagal karena FK peminjaman,
+    refresh_tokens ikut terhapus). File dimuat ke tabel staging lalu
+    digabung dengan INSERT ... SELECT ... ON DUPLICATE KEY UPDATE.
+    """
+    load = (
+        "LOAD DATA LOCAL INFILE '{path}' {mode} INTO TABLE {table}\n"
+        "    CHARACTER SET utf8mb4\n"
+        "    FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'\n"
+        "    (username, password, role);"
+    )
+    path = os.path.abspath(path)
+    if not upsert:
+        return load.format(path=path, mode='IGNORE', table='users')
+    return "\n".join([
+        "CREATE TEMPORARY TABLE users_provision LIKE users;",
+        load.format(path=path, mode='IGNORE', table='users_provision'),
+        "INSERT INTO users (username, password, role)\n"
+        "    SELECT username, password, role FROM users_provision\n"
+        "    ON DUPLICATE KEY UPDATE password = VALUES(password), role = VALUES(role);",
+        "DROP TEMPORARY TABLE users_provision;",
+    ])
+
+
+def insert_statement(count, upsert):
+    values = ", ".join(["(%s, %s, %s)"] * count)
+    if upsert:
+        return (f"INSERT INTO users (username, password, role) VALUES {values} "
+                "ON DUPLICATE KEY UPDATE password = VALUES(password), role = VALUES(role)")
+    return f"INSERT IGNORE INTO users (username, password, role) VALUES {values}"
+
+
+def insert_batches(execute, commit, hashed_rows, batch_size, upsert):
+    """Multi-row INSERT per batch, satu commit per batch; kembalikan baris terpengaruh"""
+    affected = 0
+    for start in range(0, len(hashed_rows), batch_size):
+        batch = hashed_rows[start:start + batch_size]
+        affected += execute(
+            insert_statement(len(batch), upsert),
+            [value for row in batch for value in row]
+        )
+        commit()
+    return affected
+
+
+def insert_mysql(hashed_rows, batch_size, upsert):
+    import pymysql
+    from config import get_sync_db_config
+
+    connection = pymysql.connect(**get_sync_db_config())
+    try:
+        with connection.cursor() as cursor:
+            return insert_batches(cursor.execute, connection.commit, hashed_rows, batch_size, upsert)
+    finally:
+        connection.close()
+
+
+def insert_sqlite(path, hashed_rows, batch_size, upsert):
+    from dao.sqlite_pool import SQLitePool
+
+    pool = SQLitePool(path)
+    try:
+        return insert_batches(
+            lambda query, params: pool.run(query, params)[2],
+            lambda: None, hashed_rows, batch_size, upsert
+        )
+    finally:
+        pool.close()
+
+
+def rate(count, seconds):
+    return round(count / seconds, 1) if seconds else count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv_path')
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--tsv', metavar='PATH', help='tulis file TSV untuk LOAD DATA')
+    output.add_argument('--insert', action='store_true', help='batch INSERT langsung ke database')
+    parser.add_argument('--sqlite', metavar='PATH', help='dengan --insert: tulis ke SQLite, bukan MySQL')
+    parser.add_argument('--upsert', action='store_true',
+                        help='perbarui password/role username yang sudah ada (default: dilewati)')
+    parser.add_argument('--workers', type=int, help='jumlah proses hashing (default: semua core)')
+    parser.add_argument('--rounds', type=int, help='cost bcrypt (default: BCRYPT_ROUNDS)')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    rows, errors = read_users(args.csv_path)
+    for line, username, reason in errors:
+        print(f"baris {line} ({username or '-'}): {reason}", file=sys.stderr)
+    if not rows:
+        raise SystemExit("Tidak ada user valid untuk diproses")
+
+    workers = args.workers or os.cpu_count() or 1
+    rounds = args.rounds or configured_rounds()
+    print(f"Hashing {len(rows)} user (cost {rounds}, {workers} proses)...")
+    hash_started = time.perf_counter()
+    hashed_rows = hash_users(rows, workers, rounds)
+    hash_seconds = time.perf_counter() - hash_started
+
+    write_started = time.perf_counter()
+    if args.tsv:
+        written = write_tsv(args.tsv, hashed_rows)
+        print(f"{written} baris ditulis ke {args.tsv}; muat dengan (dalam satu sesi mysql):\n")
+        print(load_data_statement(args.tsv, args.upsert) + "\n")
+    elif args.sqlite:
+        written = insert_sqlite(args.sqlite, hashed_rows, args.batch_size, args.upsert)
+        print(f"{written} baris terpengaruh di {args.sqlite}")
+    else:
+        written = insert_mysql(hashed_rows, args.batch_size, args.upsert)
+        print(f"{written} baris terpengaruh di MySQL")
+    write_seconds = time.perf_counter() - write_started
+    total_seconds = time.perf_counter() - started
+
+    print(f"hashing : {hash_seconds:.2f}s ({rate(len(rows), hash_seconds)} user/detik)")
+    print(f"menulis : {write_seconds:.2f}s ({rate(len(rows), write_seconds)} user/detik)")
+    print(f"total   : {total_seconds:.2f}s ({rate(len(rows), total_seconds)} user/detik), "
+          f"{len(errors)} baris ditolak")
+
+
+if __name__ == '__main__':
+    main()
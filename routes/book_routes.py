@@ -1,14 +1,27 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
 from config import get_db_pool
-from dao.book_dao import BookDAO
+from dao.book_dao import DEFAULT_BRANCH
+from dao.sharding import book_dao
 from middlewares.auth import token_required
+from middlewares.round_trip_budget import round_trip_budget
 from services.book_services import BookService
+from utils.http_cache import (
+    build_etag,
+    latest_modified,
+    is_not_modified,
+    not_modified_response,
+    set_validators,
+    if_match_version
+)
 from utils.exceptions import (
     DatabaseError,
     RecordNotFoundError,
     DuplicateEntryError,
-    InvalidDataError
+    InvalidDataError,
+    OperationNotAllowedError,
+    PreconditionFailedError,
+    ServiceUnavailableError
 )
 import logging
 
@@ -17,7 +30,7 @@ book_bp = Blueprint('books', __name__)
 
 async def _get_service():
     pool = await get_db_pool()
-    dao = BookDAO(pool)
+    dao = book_dao(pool)
     return BookService(dao)
 
 
@@ -34,6 +47,12 @@ def validate_book_data(data, is_update=False):
         if not isinstance(data['stok'], int) or data['stok'] < 0:
             raise InvalidDataError('stok', data['stok'], 'Harus bilangan bulat positif')
 
+    if 'branch_id' in data:
+        if is_update:
+            raise InvalidDataError('branch_id', data['branch_id'], 'Cabang buku tidak dapat diubah')
+        if not isinstance(data['branch_id'], int) or data['branch_id'] < 1:
+            raise InvalidDataError('branch_id', data['branch_id'], 'Harus bilangan bulat positif')
+
     if 'tahun_terbit' in data:
         current_year = datetime.now().year
         if not (1900 < data['tahun_terbit'] <= current_year + 1):
@@ -41,21 +60,49 @@ def validate_book_data(data, is_update=False):
                                    f'Tahun antara 1900-{current_year + 1}')
 
 
+def _updated_response(body, book_id, expected_version):
+    response = jsonify(body)
+    # Versi baru hanya pasti diketahui pada conditional update
+    if expected_version is not None:
+        response.set_etag(build_etag("book", book_id, expected_version + 1))
+    return response, 200
+
+
+def _precondition_failed(e):
+    response = jsonify({
+        "error": "Precondition Failed",
+        "message": str(e),
+        "current_version": e.current_version
+    })
+    response.set_etag(build_etag("book", e.identifier, e.current_version))
+    return response, 412
+
+
 @book_bp.route('/books', methods=['GET'])
+@round_trip_budget(2)
 async def get_books():
     # try:
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
 
     service = await _get_service()
+
+    # Koleksi memakai weak ETag dari versi katalog
+    version = await service.get_catalog_version()
+    etag = build_etag("books", version['version'], page, per_page)
+    last_modified = latest_modified(version)
+    if is_not_modified(etag, last_modified):
+        return not_modified_response(etag, last_modified, weak=True)
+
     books = await service.get_all_books(page, per_page)
-    return jsonify({
+    response = jsonify({
         "data": books,
         "meta": {
             "page": page,
             "per_page": per_page
         }
-    }),200
+    })
+    return set_validators(response, etag, last_modified, weak=True), 200
     # except DatabaseError as e:
     #     logging.error(f"Database error: {str(e)}")
     #     return jsonify({
@@ -71,16 +118,28 @@ async def get_books():
 
 
 @book_bp.route('/books/<int:book_id>', methods=['GET'])
+@round_trip_budget(2)
 async def get_book(book_id):
     try:
         service = await _get_service()
-        book = await service.get_book_by_id(book_id)
-        return jsonify(book)
+
+        version = await service.get_book_version(book_id)
+        if version:
+            etag = build_etag("book", book_id, version['version'])
+            last_modified = latest_modified(version)
+            if is_not_modified(etag, last_modified):
+                return not_modified_response(etag, last_modified)
+
+        book = await service.get_book_by_id(book_id, version['version'] if version else None)
+        etag = build_etag("book", book_id, book['version'])
+        return set_validators(jsonify(book), etag, latest_modified(version or {}))
     except RecordNotFoundError as e:
         return jsonify({
             "error": "Not Found",
             "message": str(e)
         }), 404
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         return jsonify({
             "error": "Database Error",
@@ -94,6 +153,7 @@ async def get_book(book_id):
 
 
 @book_bp.route('/books', methods=['POST'])
+@round_trip_budget(5)
 @token_required(roles=['admin'])
 async def create_book():
     try:
@@ -105,7 +165,8 @@ async def create_book():
             data['judul'],
             data['pengarang'],
             data['stok'],
-            data['tahun_terbit']
+            data['tahun_terbit'],
+            branch_id=data.get('branch_id', DEFAULT_BRANCH)
         )
 
         return jsonify({
@@ -125,6 +186,8 @@ async def create_book():
             "field": e.field,
             "message": e.message
         }), 400
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         return jsonify({
             "error": "Database Error",
@@ -138,20 +201,25 @@ async def create_book():
 
 
 @book_bp.route('/books/<int:book_id>', methods=['PUT'])
+@round_trip_budget(5)
 @token_required(roles=['admin'])
 async def update_book(book_id):
     try:
         data = request.get_json()
         validate_book_data(data, is_update=True)
 
+        expected_version = if_match_version("book", book_id)
+
         service = await _get_service()
-        updated = await service.update_book(book_id, **data)
+        await service.update_book(book_id, data, expected_version=expected_version)
 
-        return jsonify({
+        return _updated_response({
             "message": "Buku berhasil diperbarui",
             "book_id": book_id
-        }), 200
+        }, book_id, expected_version)
 
+    except PreconditionFailedError as e:
+        return _precondition_failed(e)
     except RecordNotFoundError as e:
         return jsonify({
             "error": "Not Found",
@@ -169,6 +237,8 @@ async def update_book(book_id):
             "field": e.field,
             "message": e.message
         }), 400
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         return jsonify({
             "error": "Database Error",
@@ -182,6 +252,7 @@ async def update_book(book_id):
 
 
 @book_bp.route('/books/<int:book_id>', methods=['DELETE'])
+@round_trip_budget(5)
 @token_required(roles=['admin'])
 async def delete_book(book_id):
     try:
@@ -198,6 +269,13 @@ async def delete_book(book_id):
             "error": "Not Found",
             "message": str(e)
         }), 404
+    except OperationNotAllowedError as e:
+        return jsonify({
+            "error": "Conflict",
+            "message": str(e)
+        }), 409
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         return jsonify({
             "error": "Database Error",
@@ -211,20 +289,31 @@ async def delete_book(book_id):
 
 
 @book_bp.route('/books/search', methods=['GET'])
+@round_trip_budget(1)
 async def search_books():
     try:
         keyword = request.args.get('q', '').strip()
         if len(keyword) < 2:
             raise InvalidDataError('query', keyword, 'Minimal 2 karakter')
 
+        fuzzy = request.args.get('fuzzy', 'false').lower() == 'true'
+        limit = request.args.get('limit', default=20, type=int)
+        if limit < 1:
+            raise InvalidDataError('limit', limit, 'Minimal 1')
+
         service = await _get_service()
-        results = await service.search_books(keyword)
+        results = await service.fuzzy_search_books(keyword, limit) if fuzzy else None
+        if results is None:
+            # Indeks trigram belum siap: pakai pencarian LIKE
+            fuzzy = False
+            results = await service.search_books(keyword)
 
         return jsonify({
             "data": results,
             "meta": {
                 "search_term": keyword,
-                "result_count": len(results)
+                "result_count": len(results),
+                "fuzzy": fuzzy
             }
         })
     except InvalidDataError as e:
@@ -233,6 +322,8 @@ async def search_books():
             "field": e.field,
             "message": e.message
         }), 400
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         return jsonify({
             "error": "Database Error",
@@ -246,6 +337,7 @@ async def search_books():
 
 
 @book_bp.route('/books/<int:book_id>/stock', methods=['PATCH'])
+@round_trip_budget(5)
 @token_required(roles=['admin'])
 async def adjust_stock(book_id):
     try:
@@ -253,15 +345,19 @@ async def adjust_stock(book_id):
         if 'quantity' not in data or not isinstance(data['quantity'], int):
             raise InvalidDataError('quantity', None, 'Harus bilangan bulat')
 
+        expected_version = if_match_version("book", book_id)
+
         service = await _get_service()
-        await service.adjust_stock(book_id, data['quantity'])
+        await service.adjust_stock(book_id, data['quantity'], expected_version=expected_version)
 
-        return jsonify({
+        return _updated_response({
             "message": "Stok berhasil diupdate",
             "book_id": book_id,
             "new_quantity": data['quantity']
-        }), 200
+        }, book_id, expected_version)
 
+    except PreconditionFailedError as e:
+        return _precondition_failed(e)
     except RecordNotFoundError as e:
         return jsonify({
             "error": "Not Found",
@@ -273,6 +369,8 @@ async def adjust_stock(book_id):
             "field": e.field,
             "message": e.message
         }), 400
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         return jsonify({
             "error": "Database Error",
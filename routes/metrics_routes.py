@@ -0,0 +1,26 @@
+import logging
+import os
+
+from flask import Blueprint, jsonify
+
+from middlewares.auth import token_required
+from utils.metrics import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@token_required(roles=['admin'])
+async def get_metrics():
+    try:
+        # Metrik bersifat per proses worker
+        return jsonify({
+            'meta': {'pid': os.getpid()},
+            'data': metrics.snapshot()
+        }), 200
+    except Exception as e:
+        logging.error(f"Unexpected error: {str(e)}")
+        return jsonify({
+            'error': 'Server Error',
+            'message': 'Gagal mengambil metrik'
+        }), 500
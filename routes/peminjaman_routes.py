@@ -1,13 +1,22 @@
 from flask import Blueprint, request, jsonify
 from config import get_db_pool
 from middlewares.auth import token_required
+from middlewares.round_trip_budget import round_trip_budget
 from services.peminjaman_service import PeminjamanService
-from dao.peminjaman_dao import PeminjamanDAO
+from dao.sharding import peminjaman_dao
+from utils.http_cache import (
+    build_etag,
+    latest_modified,
+    is_not_modified,
+    not_modified_response,
+    set_validators
+)
 from utils.exceptions import (
     DatabaseError,
     RecordNotFoundError,
     InvalidDataError,
-    OperationNotAllowedError
+    OperationNotAllowedError,
+    ServiceUnavailableError
 )
 import logging
 
@@ -16,7 +25,7 @@ peminjaman_bp = Blueprint('peminjaman', __name__)
 
 async def get_service():
     pool = await get_db_pool()
-    dao = PeminjamanDAO(pool)
+    dao = peminjaman_dao(pool)
     return PeminjamanService(dao)
 
 
@@ -31,6 +40,7 @@ def validate_peminjaman_data(data, is_admin=False):
 
 
 @peminjaman_bp.route('/peminjaman', methods=['POST'])
+@round_trip_budget(7)
 @token_required(roles=['user', 'admin'])
 async def pinjam_buku():
     try:
@@ -70,6 +80,8 @@ async def pinjam_buku():
             "error": "Not Found",
             "message": str(e)
         }), 404
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         logging.error(f"Database error: {str(e)}")
         return jsonify({
@@ -85,6 +97,7 @@ async def pinjam_buku():
 
 
 @peminjaman_bp.route('/peminjaman', methods=['GET'])
+@round_trip_budget(3)
 @token_required(roles=['admin'])
 async def get_all_peminjaman():
     try:
@@ -104,6 +117,8 @@ async def get_all_peminjaman():
             "field": e.field,
             "message": e.message
         }), 400
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         logging.error(f"Database error: {str(e)}")
         return jsonify({
@@ -119,6 +134,7 @@ async def get_all_peminjaman():
 
 
 @peminjaman_bp.route('/peminjaman/<int:peminjaman_id>', methods=['GET'])
+@round_trip_budget(1)
 @token_required()
 async def get_peminjaman(peminjaman_id):
     try:
@@ -141,6 +157,8 @@ async def get_peminjaman(peminjaman_id):
             "error": "Forbidden",
             "message": str(e)
         }), 403
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         logging.error(f"Database error: {str(e)}")
         return jsonify({
@@ -156,6 +174,7 @@ async def get_peminjaman(peminjaman_id):
 
 
 @peminjaman_bp.route('/peminjaman/<int:peminjaman_id>/kembalikan', methods=['POST'])
+@round_trip_budget(7)
 @token_required()
 async def kembalikan_buku(peminjaman_id):
     try:
@@ -183,6 +202,8 @@ async def kembalikan_buku(peminjaman_id):
             "error": "Forbidden",
             "message": str(e)
         }), 403
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         logging.error(f"Database error: {str(e)}")
         return jsonify({
@@ -198,6 +219,7 @@ async def kembalikan_buku(peminjaman_id):
 
 
 @peminjaman_bp.route('/users/<int:user_id>/peminjaman', methods=['GET'])
+@round_trip_budget(2)
 @token_required()
 async def get_user_peminjaman(user_id):
     try:
@@ -209,12 +231,23 @@ async def get_user_peminjaman(user_id):
         per_page = request.args.get('per_page', 10, type=int)
 
         service = await get_service()
+
+        user_version, catalog_version = await service.get_user_peminjaman_version(user_id)
+        etag = build_etag(
+            "peminjaman", user_id, user_version['version'],
+            catalog_version['version'], page, per_page
+        )
+        last_modified = latest_modified(user_version, catalog_version)
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified, weak=True, private=True)
+
         result = await service.get_user_peminjaman(user_id, page, per_page)
 
-        return jsonify({
+        response = jsonify({
             "data": result['data'],
             "pagination": result['pagination']
         })
+        return set_validators(response, etag, last_modified, weak=True, private=True)
     except OperationNotAllowedError as e:
         return jsonify({
             "error": "Forbidden",
@@ -225,6 +258,8 @@ async def get_user_peminjaman(user_id):
             "error": "Not Found",
             "message": str(e)
         }), 404
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         logging.error(f"Database error: {str(e)}")
         return jsonify({
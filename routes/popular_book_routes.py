@@ -2,9 +2,10 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 from config import get_db_pool
 from middlewares.auth import token_required
+from middlewares.round_trip_budget import round_trip_budget
 from services.popular_book_service import PopularBookService
-from dao.popular_book_dao import PopularBookDAO
-from utils.exceptions import DatabaseError, InvalidDataError
+from dao.sharding import popular_book_dao
+from utils.exceptions import DatabaseError, InvalidDataError, ServiceUnavailableError
 import logging
 
 popular_book_bp = Blueprint('popular_books', __name__)
@@ -12,11 +13,12 @@ popular_book_bp = Blueprint('popular_books', __name__)
 
 async def get_service():
     pool = await get_db_pool()
-    dao = PopularBookDAO(pool)
+    dao = popular_book_dao(pool)
     return PopularBookService(dao)
 
 
 @popular_book_bp.route('/analytics/popular-books', methods=['GET'])
+@round_trip_budget(2)
 @token_required(roles=['admin'])
 async def get_popular_books():
     try:
@@ -45,6 +47,8 @@ async def get_popular_books():
             "field": e.field,
             "message": e.message
         }), 400
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         logging.error(f"Database error: {str(e)}")
         return jsonify({
@@ -60,6 +64,7 @@ async def get_popular_books():
 
 
 @popular_book_bp.route('/analytics/available-years', methods=['GET'])
+@round_trip_budget(2)
 @token_required(roles=['admin'])
 async def get_available_years():
     try:
@@ -69,6 +74,8 @@ async def get_available_years():
             "data": years,
             "count": len(years)
         })
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         logging.error(f"Database error: {str(e)}")
         return jsonify({
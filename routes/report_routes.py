@@ -2,9 +2,10 @@ from datetime import date
 from flask import Blueprint, request, jsonify
 from config import get_db_pool
 from middlewares.auth import token_required
+from middlewares.round_trip_budget import round_trip_budget
 from services.report_service import ReportService
-from dao.report_dao import ReportDAO
-from utils.exceptions import DatabaseError, InvalidDataError
+from dao.sharding import report_dao
+from utils.exceptions import DatabaseError, InvalidDataError, ServiceUnavailableError
 import logging
 
 report_bp = Blueprint('reports', __name__)
@@ -12,7 +13,7 @@ report_bp = Blueprint('reports', __name__)
 
 async def get_service():
     pool = await get_db_pool()
-    dao = ReportDAO(pool)
+    dao = report_dao(pool)
     return ReportService(dao)
 
 
@@ -25,6 +26,7 @@ def validate_date(date_str):
 
 
 @report_bp.route('/reports', methods=['GET'])
+@round_trip_budget(2)
 @token_required(roles=['admin'])
 async def get_report():
     try:
@@ -33,7 +35,9 @@ async def get_report():
             "end_date": request.args.get('end_date'),
             "status": request.args.get('status'),
             "book_title": request.args.get('book_title'),
-            "username": request.args.get('username')
+            "username": request.args.get('username'),
+            # Satu cabang: hanya shard cabang itu yang di-query
+            "branch_id": request.args.get('branch_id', type=int)
         }
 
         # Validasi dan konversi tanggal
@@ -76,6 +80,8 @@ async def get_report():
             "field": e.field,
             "message": e.message
         }), 400
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         logging.error(f"Report generation failed: {str(e)}")
         return jsonify({
@@ -91,12 +97,15 @@ async def get_report():
 
 
 @report_bp.route('/reports/filter-options', methods=['GET'])
+@round_trip_budget(4)
 @token_required(roles=['admin'])
 async def get_filter_options():
     try:
         service = await get_service()
         options = await service.get_filter_options()
         return jsonify(options)
+    except ServiceUnavailableError:
+        raise
     except DatabaseError as e:
         logging.error(f"Filter options error: {str(e)}")
         return jsonify({
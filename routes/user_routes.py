@@ -1,20 +1,24 @@
 import logging
 import re
 from config import settings, get_db_pool  # Menggunakan settings terpusat
-import bcrypt
-import jwt
-from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
 from middlewares.auth import token_required
-from services.user_service import UserService
+from middlewares.round_trip_budget import round_trip_budget
+from services.user_service import UserService, get_user_profile
+from services.auth_service import AuthService
 from dao.user_dao import UserDAO
+from dao.refresh_token_dao import RefreshTokenDAO
+from utils.pagination import decode_cursor, pagination_headers, parse_limit
+from utils.passwords import hash_password_async, check_password_async
 
 from utils.exceptions import (
     DatabaseError,
     DuplicateEntryError,
     RecordNotFoundError,
     InvalidDataError,
-    TransactionError
+    TransactionError,
+    ServiceUnavailableError,
+    AuthenticationError
 )
 
 user_bp = Blueprint('users', __name__)
@@ -25,6 +29,11 @@ async def get_service():
     return UserService(dao)
 
 
+async def get_auth_service(pool=None):
+    pool = pool or await get_db_pool()
+    return AuthService(RefreshTokenDAO(pool))
+
+
 # Helper Functions
 def validate_username(username):
     if not re.match(r'^[a-zA-Z0-9_]{3,20}$', username):
@@ -76,12 +85,20 @@ def handle_database_error(e):
         })
         return jsonify(response), 400
 
+    if isinstance(e, AuthenticationError):
+        response.update({
+            'error': 'Unauthorized',
+            'status': 401
+        })
+        return jsonify(response), 401
+
     response['status'] = 500
     return jsonify(response), 500
 
 
 # Routes
 @user_bp.route('/login', methods=['POST'])
+@round_trip_budget(3)
 async def login():
     try:
         data = request.get_json()
@@ -92,18 +109,14 @@ async def login():
         user = await service.dao.verify_password(data['username'], data['password'])
 
         if not user:
-            raise InvalidDataError('credentials', None, 'kombinasi username/password salah')
+            raise AuthenticationError('Kombinasi username/password salah')
 
-        token_payload = {
-            'user_id': user['id'],
-            'username': user['username'],
-            'role': user['role'],
-            'exp': datetime.utcnow() + timedelta(hours=8)
-        }
-        token = jwt.encode(token_payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+        auth_service = await get_auth_service(service.dao.db_pool)
+        tokens = await auth_service.issue_tokens(user)
 
         return jsonify({
-            'token': token,
+            'token': tokens['access_token'],
+            **tokens,
             'user': {
                 'id': user['id'],
                 'username': user['username'],
@@ -120,6 +133,15 @@ async def login():
             'requirement': e.requirement
         }), 400
 
+    except AuthenticationError as e:
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': str(e)
+        }), 401
+
+    except ServiceUnavailableError:
+        raise
+
     except Exception as e:
         logging.error("Login error:", exc_info=True)  # <-- Tambahkan ini
         return jsonify({
@@ -128,17 +150,63 @@ async def login():
             'internal_error': str(e)  # Hanya untuk development!
         }), 500
 
+@user_bp.route('/token/refresh', methods=['POST'])
+@round_trip_budget(3)
+async def refresh_token():
+    try:
+        data = request.get_json(silent=True) or {}
+        if not data.get('refresh_token'):
+            raise InvalidDataError('refresh_token', None, 'refresh_token diperlukan')
+
+        # Satu lookup index, tanpa verifikasi bcrypt
+        auth_service = await get_auth_service()
+        user, tokens = await auth_service.refresh(data['refresh_token'])
+
+        return jsonify({
+            'token': tokens['access_token'],
+            **tokens,
+            'user': user
+        })
+    except DatabaseError as e:
+        raise e
+
+
+@user_bp.route('/logout', methods=['POST'])
+@round_trip_budget(2)
+async def logout():
+    try:
+        data = request.get_json(silent=True) or {}
+        if not data.get('refresh_token'):
+            raise InvalidDataError('refresh_token', None, 'refresh_token diperlukan')
+
+        auth_service = await get_auth_service()
+        await auth_service.logout(data['refresh_token'])
+
+        return jsonify({'message': 'Logout berhasil'}), 200
+    except DatabaseError as e:
+        raise e
+
+
 @user_bp.route('/me', methods=['GET'])
+@round_trip_budget(1)
 @token_required()
 async def get_current_user():
-    return jsonify({
-        'id': request.user['id'],
-        'username': request.user['username'],
-        'role': request.user['role']
-    })
+    try:
+        user = await get_user_profile(request.user['id'])
+        if not user:
+            raise RecordNotFoundError('User', request.user['id'])
+
+        return jsonify({
+            'id': user['id'],
+            'username': user['username'],
+            'role': user['role']
+        })
+    except DatabaseError as e:
+        raise e
 
 
 @user_bp.route('/users', methods=['POST'])
+@round_trip_budget(5)
 @token_required(roles=['admin'])
 async def create_user():
     try:
@@ -178,16 +246,22 @@ async def create_user():
 
 
 @user_bp.route('/users', methods=['GET'])
+@round_trip_budget(2)
 @token_required(roles=['admin'])
 async def get_all_users():
     try:
+        limit = parse_limit(request.args.get('limit', type=int))
+        after_id = decode_cursor(request.args.get('cursor'))
+
         service = await get_service()
-        users = await service.get_all_users()
+        result = await service.get_users_page(after_id, limit)
         return jsonify([{
             'id': u['id'],
             'username': u['username'],
             'role': u['role']
-        } for u in users])
+        } for u in result['data']]), 200, pagination_headers(
+            result['pagination'], request.base_url, request.args
+        )
     except DatabaseError as e:
         raise e
     except Exception as e:
@@ -195,21 +269,21 @@ async def get_all_users():
 
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
+@round_trip_budget(1)
 @token_required()
 async def get_user(user_id):
     try:
-        service = await get_service()
-        user = await service.dao.get_by_id(user_id)
-
-        if not user:
-            raise RecordNotFoundError('User', user_id)
-
         if request.user['role'] != 'admin' and request.user['id'] != user_id:
             return jsonify({
                 'error': 'Forbidden',
                 'message': 'Akses ke resource ini ditolak'
             }), 403
 
+        user = await get_user_profile(user_id)
+
+        if not user:
+            raise RecordNotFoundError('User', user_id)
+
         return jsonify({
             'id': user['id'],
             'username': user['username'],
@@ -220,6 +294,7 @@ async def get_user(user_id):
 
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
+@round_trip_budget(8)
 @token_required(roles=['admin'])
 async def update_user(user_id):
     try:
@@ -255,6 +330,10 @@ async def update_user(user_id):
         if not updated:
             raise DatabaseError('Gagal memperbarui user')
 
+        # Password/role berubah: sesi lama tidak boleh diperpanjang
+        auth_service = await get_auth_service(service.dao.db_pool)
+        await auth_service.revoke_user(user_id)
+
         return jsonify({
             'id': user_id,
             'username': data['username'],
@@ -265,6 +344,7 @@ async def update_user(user_id):
 
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
+@round_trip_budget(5)
 @token_required(roles=['admin'])
 async def delete_user(user_id):
     try:
@@ -289,6 +369,7 @@ async def delete_user(user_id):
 
 
 @user_bp.route('/users/search', methods=['GET'])
+@round_trip_budget(2)
 @token_required(roles=['admin'])
 async def search_users():
     try:
@@ -296,23 +377,35 @@ async def search_users():
         if len(keyword) < 2:
             raise InvalidDataError('query', keyword, 'Minimal 2 karakter')
 
+        mode = request.args.get('mode', 'contains')
+        if mode not in ('contains', 'prefix'):
+            raise InvalidDataError('mode', mode, 'Harus contains atau prefix')
+        limit = parse_limit(request.args.get('limit', type=int))
+        after = decode_cursor(request.args.get('cursor'), str if mode == 'prefix' else int)
+
         service = await get_service()
-        results = await service.search_users(keyword)
+        if mode == 'prefix':
+            result = await service.search_users_by_prefix(keyword, limit, after)
+        else:
+            result = await service.search_users(keyword, limit, after)
 
         return jsonify([{
             'id': u['id'],
             'username': u['username'],
             'role': u['role']
-        } for u in results])
+        } for u in result['data']]), 200, pagination_headers(
+            result['pagination'], request.base_url, request.args
+        )
     except DatabaseError as e:
         raise e
 
 @user_bp.route('/users/test-bcrypt', methods=['POST'])
+@round_trip_budget(0)
 async def test_bcrypt():
     data = request.get_json()
     password = data['password']
-    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-    valid = bcrypt.checkpw(password.encode(), hashed.encode())
+    hashed = await hash_password_async(password)
+    valid = await check_password_async(password, hashed)
     return jsonify({
         "hashed": hashed,
         "valid": valid
@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta
+
+import jwt
+
+from config import settings
+from utils.exceptions import AuthenticationError
+
+logger = logging.getLogger(__name__)
+
+
+def hash_refresh_token(token):
+    # Token acak 256-bit: SHA-256 cukup, tidak perlu hash lambat seperti bcrypt
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def create_access_token(user, now=None):
+    now = now or datetime.utcnow()
+    payload = {
+        'id': user['id'],
+        'username': user['username'],
+        'role': user['role'],
+        'iss': settings.jwt.issuer,
+        'iat': now,
+        'exp': now + timedelta(minutes=settings.jwt.access_expire_minutes)
+    }
+    return jwt.encode(payload, settings.jwt.secret, algorithm=settings.jwt.algorithm)
+
+
+class AuthService:
+    """Access token JWT berumur pendek + refresh token yang dirotasi.
+
+    Setiap refresh token hanya bisa dipakai sekali. Token yang sudah
+    dirotasi lalu dipakai lagi dianggap bocor: seluruh family (rantai
+    rotasi dari satu login) dicabut.
+    """
+
+    def __init__(self, dao):
+        self.dao = dao
+
+    async def issue_tokens(self, user, family_id=None):
+        now = datetime.utcnow()
+        refresh_token = secrets.token_urlsafe(32)
+        await self.dao.create(
+            user['id'],
+            hash_refresh_token(refresh_token),
+            family_id or secrets.token_hex(16),
+            now + timedelta(days=settings.jwt.refresh_expire_days)
+        )
+        return {
+            'access_token': create_access_token(user, now),
+            'refresh_token': refresh_token,
+            'token_type': 'Bearer',
+            'expires_in': settings.jwt.access_expire_minutes * 60
+        }
+
+    async def refresh(self, refresh_token):
+        record = await self.dao.get_by_hash(hash_refresh_token(refresh_token))
+        if not record:
+            raise AuthenticationError("Refresh token tidak valid")
+
+        if record['revoked_at'] is not None:
+            await self._reuse_detected(record)
+
+        if record['expires_at'] <= datetime.utcnow():
+            raise AuthenticationError("Refresh token kadaluarsa")
+
+        # Revoke bersyarat: dua request dengan token yang sama tidak bisa
+        # sama-sama berhasil
+        if not await self.dao.revoke(record['id']):
+            await self._reuse_detected(record)
+
+        user = {'id': record['user_id'], 'username': record['username'], 'role': record['role']}
+        return user, await self.issue_tokens(user, record['family_id'])
+
+    async def _reuse_detected(self, record):
+        revoked = await self.dao.revoke_family(record['family_id'])
+        logger.warning(
+            f"Refresh token dipakai ulang untuk user {record['user_id']}; "
+            f"{revoked} token dalam family dicabut"
+        )
+        raise AuthenticationError("Refresh token sudah dipakai")
+
+    async def logout(self, refresh_token):
+        record = await self.dao.get_by_hash(hash_refresh_token(refresh_token))
+        if record:
+            await self.dao.revoke_family(record['family_id'])
+        return record is not None
+
+    async def revoke_user(self, user_id):
+        """Cabut semua sesi user (mis. setelah password/role diubah)"""
+        return await self.dao.revoke_user(user_id)
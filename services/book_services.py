@@ -1,7 +1,77 @@
+from config import settings
+from dao.book_dao import DEFAULT_BRANCH
+from utils.cache import TTLCache, STALE, refresher
+from utils.invalidation import bus
+from utils.singleflight import single_flight
+from utils.trigram import book_index
+
+search_cache = TTLCache(
+    'books.search',
+    maxsize=settings.search_cache.SEARCH_CACHE_MAX_ENTRIES,
+    ttl=settings.search_cache.SEARCH_CACHE_TTL_S,
+    stale_ttl=settings.search_cache.SEARCH_CACHE_STALE_TTL_S,
+    namespaces=('books',),
+    shared=True
+)
+
+# Key (id, version): entry lama tidak pernah terbaca lagi setelah buku diubah
+book_cache = TTLCache(
+    'books.detail',
+    maxsize=settings.book_cache.BOOK_CACHE_MAX_ENTRIES,
+    ttl=settings.book_cache.BOOK_CACHE_TTL_S,
+    shared=True
+)
+
+
+def normalize_keyword(keyword):
+    """Case-fold dan rapikan spasi agar variasi ketikan berbagi entry cache"""
+    return " ".join(keyword.split()).casefold()
+
+
+def schedule_index_build():
+    """Bangun indeks trigram di thread background (tidak memblokir request)"""
+    if not settings.search_index.TRIGRAM_INDEX_ENABLED or not book_index.start_build():
+        return False
+
+    async def build(pool):
+        from dao.sharding import book_dao
+        try:
+            book_index.finish_build(await book_dao(pool).get_search_terms())
+        except Exception:
+            book_index.fail_build()
+            raise
+
+    refresher.submit('trigram_index.build', build)
+    return True
+
+
+def _sync_index_entry(namespace, book_id):
+    """Buku diubah di worker lain: ambil ulang judul/pengarang ke indeks lokal"""
+    if namespace != 'book_index' or book_id is None:
+        return
+    if not (book_index.ready or book_index.building):
+        return
+
+    async def sync(pool):
+        from dao.sharding import book_dao
+        books = await book_dao(pool).get_books_by_ids([book_id])
+        if books:
+            book_index.upsert(book_id, judul=books[0]['judul'], pengarang=books[0]['pengarang'])
+        else:
+            book_index.remove(book_id)
+
+    refresher.submit(('book_index', book_id), sync)
+
+
+# Worker penulis sudah memperbarui indeksnya sendiri di BookDAO
+bus.subscribe(_sync_index_entry, remote_only=True)
+
+
 class BookService:
     def __init__(self, dao):
         self.dao = dao
 
+    @single_flight('books.get_all_books')
     async def get_all_books(self, page=1, per_page=10):
         return await self.dao.get_all_books(page, per_page)
 
@@ -13,12 +83,14 @@ class BookService:
             judul=data['judul'],
             pengarang=data['pengarang'],
             stok=data['stok'],
-            tahun_terbit=data['tahun_terbit']
+            tahun_terbit=data['tahun_terbit'],
+            branch_id=data.get('branch_id', DEFAULT_BRANCH)
         )
 
-    async def update_book(self, book_id, data):
+    async def update_book(self, book_id, data, expected_version=None):
         return await self.dao.update_book(
             book_id=book_id,
+            expected_version=expected_version,
             **{k: v for k, v in data.items() if k in ['judul', 'pengarang', 'stok', 'tahun_terbit']}
         )
 
@@ -26,20 +98,78 @@ class BookService:
         return await self.dao.delete_book(book_id)
 
     async def search_books(self, keyword, search_fields=['judul', 'pengarang']):
-        return await self.dao.search_books(
+        keyword = normalize_keyword(keyword)
+        if not settings.search_cache.SEARCH_CACHE_ENABLED:
+            return await self._search_books(keyword, tuple(search_fields))
+
+        key = (keyword, tuple(search_fields))
+        results, state = await search_cache.get(key)
+        if state is None:
+            results = await self._search_books(*key)
+        elif state == STALE:
+            dao_class = type(self.dao)
+            refresher.submit(key, lambda pool: BookService(dao_class(pool))._search_books(*key))
+        return [dict(row) for row in results]
+
+    async def fuzzy_search_books(self, keyword, limit=20):
+        """Pencarian toleran typo via indeks trigram; None jika indeks belum siap"""
+        if not book_index.ready:
+            if not book_index.building:
+                schedule_index_build()
+            return None
+
+        limit = min(limit, settings.search_index.TRIGRAM_MAX_RESULTS)
+        matches = book_index.search(
+            keyword, limit=limit, min_score=settings.search_index.TRIGRAM_MIN_SCORE
+        )
+        books = {book['id']: book for book in await self.dao.get_books_by_ids([m[0] for m in matches])}
+        return [
+            {**books[book_id], 'score': score}
+            for book_id, score in matches
+            if book_id in books
+        ]
+
+    @single_flight('books.search_books')
+    async def _search_books(self, keyword, search_fields):
+        generation = search_cache.generation
+        results = await self.dao.search_books(
             keyword=keyword,
-            search_fields=search_fields
+            search_fields=list(search_fields)
         )
+        if settings.search_cache.SEARCH_CACHE_ENABLED:
+            search_cache.set((keyword, search_fields), results, generation)
+        return results
 
-    async def adjust_stock(self, book_id, quantity):
+    async def adjust_stock(self, book_id, quantity, expected_version=None):
         return await self.dao.adjust_stock(
             book_id=book_id,
-            quantity=quantity
+            quantity=quantity,
+            expected_version=expected_version
         )
 
-    async def get_book_by_id(self, book_id):
+    @single_flight('books.get_catalog_version')
+    async def get_catalog_version(self):
+        return await self.dao.get_catalog_version()
+
+    @single_flight('books.get_book_version')
+    async def get_book_version(self, book_id):
+        return await self.dao.get_book_version(book_id)
+
+    async def get_book_by_id(self, book_id, version=None):
+        """version dari get_book_version (ETag) memungkinkan pemakaian cache"""
+        if version is None or not settings.book_cache.BOOK_CACHE_ENABLED:
+            return await self._get_book_by_id(book_id)
+
+        book, state = await book_cache.get((book_id, version))
+        if state is None:
+            book = await self._get_book_by_id(book_id)
+            book_cache.set((book_id, book['version']), book)
+        return dict(book)
+
+    @single_flight('books.get_book_by_id')
+    async def _get_book_by_id(self, book_id):
         return await self.dao.get_book_by_id(book_id)
 
-    async def add_book(self, param, param1, param2, param3):
-        return await self.dao.add_book(param, param1, param2, param3)
+    async def add_book(self, param, param1, param2, param3, branch_id=DEFAULT_BRANCH):
+        return await self.dao.add_book(param, param1, param2, param3, branch_id=branch_id)
     
\ No newline at end of file
@@ -13,8 +13,13 @@ class PeminjamanService:
             status='dipinjam'
         )
 
-    async def get_all_peminjaman(self):
-        return await self.dao.get_all_peminjaman()
+    async def get_all_peminjaman(self, page=1, per_page=10):
+        data = await self.dao.get_all_peminjaman(page, per_page)
+        total = await self.dao.get_total_peminjaman()
+        return {
+            "data": data,
+            "pagination": {"page": page, "per_page": per_page, "total": total}
+        }
 
     async def get_peminjaman(self, peminjaman_id):
         return await self.dao.get_peminjaman_by_id(peminjaman_id)
@@ -22,8 +27,15 @@ class PeminjamanService:
     async def kembalikan_buku(self, peminjaman_id):
         return await self.dao.kembalikan_buku(peminjaman_id)
 
-    async def get_user_peminjaman(self, user_id):
-        return await self.dao.get_peminjaman_by_user(user_id)
+    async def get_user_peminjaman(self, user_id, page=1, per_page=10):
+        data = await self.dao.get_peminjaman_by_user(user_id, page, per_page)
+        return {
+            "data": data,
+            "pagination": {"page": page, "per_page": per_page}
+        }
+
+    async def get_user_peminjaman_version(self, user_id):
+        return await self.dao.get_user_version(user_id)
 
     async def get_aktif_peminjaman(self, user_id):
         return await self.dao.get_peminjaman_aktif(user_id)
@@ -1,5 +1,18 @@
 from datetime import date
 
+from config import settings
+from utils.cache import TTLCache
+from utils.singleflight import single_flight
+
+# Setiap peminjaman menaikkan versi katalog ('books'), jadi ikut dikosongkan
+popular_cache = TTLCache(
+    'analytics.popular_books',
+    maxsize=settings.analytics_cache.ANALYTICS_CACHE_MAX_ENTRIES,
+    ttl=settings.analytics_cache.POPULAR_BOOKS_CACHE_TTL_S,
+    namespaces=('books',),
+    shared=True
+)
+
 
 class PopularBookService:
     def __init__(self, dao):
@@ -9,4 +22,26 @@ class PopularBookService:
         # Default ke tahun berjalan jika tidak ada input
         current_year = date.today().year
         year = year or current_year
-        return await self.dao.get_popular_books(year, limit)
\ No newline at end of file
+        return await self._cached(('popular', year, limit), lambda: self._get_popular_books(year, limit))
+
+    async def get_available_years(self):
+        return await self._cached(('years',), self._get_available_years)
+
+    async def _cached(self, key, load):
+        if not settings.analytics_cache.ANALYTICS_CACHE_ENABLED:
+            return await load()
+        value, state = await popular_cache.get(key)
+        if state is not None:
+            return value
+        generation = popular_cache.generation
+        value = await load()
+        popular_cache.set(key, value, generation)
+        return value
+
+    @single_flight('popular_books.get_popular_books')
+    async def _get_popular_books(self, year, limit):
+        return await self.dao.get_popular_books(year, limit)
+
+    @single_flight('popular_books.get_available_years')
+    async def _get_available_years(self):
+        return await self.dao.get_available_years()
@@ -1,25 +1,36 @@
 from collections import defaultdict
 from datetime import datetime
 
+from config import settings
+from utils.cache import TTLCache
+
+# Status, judul, dan username yang pernah dipinjam: berubah bersama katalog/peminjaman.
+# Rename username tidak mengosongkan cache ini (terbatas FILTER_OPTIONS_CACHE_TTL_S).
+filter_options_cache = TTLCache(
+    'reports.filter_options',
+    maxsize=1,
+    ttl=settings.analytics_cache.FILTER_OPTIONS_CACHE_TTL_S,
+    namespaces=('books',),
+    shared=True
+)
+
+
 class ReportService:
     def __init__(self, dao):
         self.dao = dao
 
     async def generate_report(self, **filters):
-        raw_data = await self.dao.get_filtered_report(**filters)
-        return {
-            "data": raw_data,
-            "stats": {
-                "monthly_trend": self._calculate_monthly_trend(raw_data),
-                "status_distribution": self._calculate_status_distribution(raw_data)
-            }
-        }
+        return await self.dao.generate_report(**filters)
 
     async def get_filter_options(self):
-        return {
-            "book_titles": await self.dao.get_all_book_titles(),
-            "usernames": await self.dao.get_all_usernames()
-        }
+        if not settings.analytics_cache.ANALYTICS_CACHE_ENABLED:
+            return await self.dao.get_filter_options()
+        options, state = await filter_options_cache.get('options')
+        if state is None:
+            generation = filter_options_cache.generation
+            options = await self.dao.get_filter_options()
+            filter_options_cache.set('options', options, generation)
+        return options
 
     def _calculate_monthly_trend(self, data):
         trend = defaultdict(int)
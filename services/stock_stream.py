@@ -0,0 +1,185 @@
+"""Hub perubahan stok buku untuk GET /books/stream (middlewares/book_stream.py).
+
+Sumber perubahan adalah bus invalidasi (utils/invalidation.py), jadi tulis
+di worker mana pun sampai ke subscriber di worker ini:
+- ('book_stock', id) dari BookDAO.adjust_stock/update_book/delete_book dan
+  pinjam/kembali di PeminjamanDAO (juga hasil polling entity_versions);
+- ('books', None) dari setiap kenaikan versi katalog (juga hasil polling
+  entity_versions) membuat semua id yang ditonton dicek ulang, menutup
+  datagram yang hilang.
+
+Id yang berubah dikumpulkan lalu diambil sekaligus (satu query per putaran,
+dari primary) di event loop ASGI worker. Subscriber menyimpan hanya nilai
+terakhir per buku; subscriber yang tertinggal lebih dari SSE_QUEUE_SIZE buku
+diputus dengan event reset agar klien memuat ulang.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+
+from config import settings, get_db_pool
+from dao import replicas
+from utils.invalidation import bus
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Jeda sebelum mencoba lagi setelah query gagal
+RETRY_DELAY_S = 1.0
+# Batas jumlah versi yang diingat untuk dedup antar putaran
+MAX_TRACKED_VERSIONS = 10000
+MISSING = object()
+
+
+class Subscriber:
+    def __init__(self, book_ids, limit):
+        self.book_ids = book_ids
+        self.limit = limit
+        self.pending = {}
+        self.lagging = False
+        self.wakeup = asyncio.Event()
+
+    def wants(self, book_id):
+        return self.book_ids is None or book_id in self.book_ids
+
+    def push(self, book_id, payload):
+        """Simpan nilai terbaru; False jika subscriber terlalu tertinggal"""
+        if book_id not in self.pending and len(self.pending) >= self.limit:
+            self.lagging = True
+        else:
+            self.pending[book_id] = payload
+        self.wakeup.set()
+        return not self.lagging
+
+    def drain(self):
+        pending, self.pending = self.pending, {}
+        self.wakeup.clear()
+        return list(pending.values())
+
+
+class StockHub:
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._pool = None
+        self._dirty = set()
+        self._initial = {}
+        self._versions = {}
+        self._task = None
+
+    def subscribe(self, book_ids=None):
+        """Dipanggil dari event loop ASGI; None jika batas subscriber tercapai"""
+        config = settings.stock_stream
+        with self._lock:
+            if len(self._subscribers) >= config.SSE_MAX_SUBSCRIBERS:
+                metrics.incr('sse.rejected')
+                return None
+            self._loop = asyncio.get_running_loop()
+            subscriber = Subscriber(book_ids, config.SSE_QUEUE_SIZE)
+            self._subscribers.add(subscriber)
+        metrics.incr('sse.subscribed')
+        if book_ids:
+            # Kirim stok saat ini sebagai baseline (hanya ke subscriber ini)
+            self._initial[subscriber] = set(book_ids)
+            self._loop.call_soon(self._mark, (), context=contextvars.Context())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            if not self._subscribers:
+                self._versions.clear()
+        self._initial.pop(subscriber, None)
+
+    def on_event(self, namespace, key):
+        """Handler bus; bisa dipanggil dari thread mana pun"""
+        if namespace == 'book_stock' and key is not None:
+            with self._lock:
+                wanted = any(subscriber.wants(key) for subscriber in self._subscribers)
+            book_ids = (key,) if wanted else ()
+        elif namespace == 'books' and key is None:
+            with self._lock:
+                book_ids = set().union(*(
+                    subscriber.book_ids for subscriber in self._subscribers
+                    if subscriber.book_ids is not None
+                ))
+        else:
+            return
+        if book_ids and self._loop is not None:
+            try:
+                # Context kosong: query hub tidak boleh terhitung ke budget/sesi request penulis
+                self._loop.call_soon_threadsafe(self._mark, book_ids, context=contextvars.Context())
+            except RuntimeError:
+                # Event loop worker sudah ditutup
+                pass
+
+    def _mark(self, book_ids):
+        self._dirty.update(book_ids)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._flush())
+
+    async def _flush(self):
+        # Stok harus dibaca dari primary: replica bisa tertinggal dari tulis yang memicu event
+        _, token = replicas.begin(pinned=True)
+        try:
+            while self._dirty or self._initial:
+                changed, self._dirty = self._dirty, set()
+                book_ids = sorted(changed.union(*self._initial.values()))
+                try:
+                    books = await self._fetch(book_ids)
+                except Exception as e:
+                    metrics.incr('sse.fetch_failed')
+                    logger.warning(f"Gagal mengambil stok untuk stream: {str(e)}")
+                    self._dirty.update(changed)
+                    await asyncio.sleep(RETRY_DELAY_S)
+                    continue
+                self._publish(book_ids, changed, books)
+        finally:
+            replicas.end(token)
+
+    async def _fetch(self, book_ids):
+        from dao.sharding import book_dao
+        if self._pool is None:
+            self._pool = await get_db_pool()
+        return {book['id']: book for book in await book_dao(self._pool).get_books_by_ids(book_ids)}
+
+    def _publish(self, book_ids, changed_ids, books):
+        if len(self._versions) > MAX_TRACKED_VERSIONS:
+            self._versions.clear()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for book_id in book_ids:
+            book = books.get(book_id)
+            if book is None:
+                payload, version = {'id': book_id, 'deleted': True}, None
+            else:
+                payload = {'id': book_id, 'stok': book['stok'], 'version': book['version']}
+                version = book['version']
+            # Versi sama dengan yang terakhir dikirim: event duplikat atau baseline saja
+            changed = book_id in changed_ids and self._versions.get(book_id, MISSING) != version
+            self._versions[book_id] = version
+            for subscriber in subscribers:
+                initial = self._initial.get(subscriber)
+                first = initial is not None and book_id in initial
+                if first:
+                    initial.discard(book_id)
+                    if not initial:
+                        del self._initial[subscriber]
+                if (changed or first) and subscriber.wants(book_id):
+                    if not subscriber.push(book_id, payload):
+                        metrics.incr('sse.lagging')
+        metrics.incr('sse.fetched', len(book_ids))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'max_subscribers': settings.stock_stream.SSE_MAX_SUBSCRIBERS,
+            }
+
+
+hub = StockHub()
+bus.subscribe(hub.on_event)
+metrics.register_collector('sse', hub.stats)
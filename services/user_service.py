@@ -1,9 +1,43 @@
+from config import settings, get_db_pool
+from utils.cache import TTLCache
+from utils.pagination import keyset_page
+
+profile_cache = TTLCache(
+    'users.profile',
+    maxsize=settings.user_cache.USER_CACHE_MAX_ENTRIES,
+    ttl=settings.user_cache.USER_CACHE_TTL_S,
+    namespaces=('users',)
+)
+
+
+async def get_user_profile(user_id):
+    """Profil user dari cache; pool database hanya dibuat saat cache miss"""
+    if settings.user_cache.USER_CACHE_ENABLED:
+        profile, state = await profile_cache.get(user_id)
+        if state is not None:
+            return profile
+
+    from dao.user_dao import UserDAO
+    return await UserService(UserDAO(await get_db_pool())).get_user(user_id)
+
+
 class UserService:
     def __init__(self, dao):
         self.dao = dao
 
     async def get_user(self, user_id):
-        return await self.dao.get_by_id(user_id)
+        """Profil (id, username, role) tanpa hash password; None jika tidak ada"""
+        if settings.user_cache.USER_CACHE_ENABLED:
+            profile, state = await profile_cache.get(user_id)
+            if state is not None:
+                return profile
+
+        generation = profile_cache.generation
+        profile = await self.dao.get_by_id(user_id)
+        if settings.user_cache.USER_CACHE_ENABLED:
+            # User yang tidak ada ikut di-cache (None) agar token lama tidak membebani DB
+            profile_cache.set(user_id, profile, generation)
+        return profile
 
     async def get_user_by_username(self, username):
         return await self.dao.get_by_username(username)
@@ -20,5 +54,14 @@ class UserService:
     async def get_all_users(self):
         return await self.dao.get_all_users()
 
-    async def search_users(self, keyword):
-        return await self.dao.search_users(keyword)
\ No newline at end of file
+    async def get_users_page(self, after_id=None, limit=50):
+        rows = await self.dao.get_users_page(after_id or 0, limit + 1)
+        return keyset_page(rows, limit, 'id')
+
+    async def search_users(self, keyword, limit=50, after_id=None):
+        rows = await self.dao.search_users(keyword, limit + 1, after_id or 0)
+        return keyset_page(rows, limit, 'id')
+
+    async def search_users_by_prefix(self, prefix, limit=50, after_username=None):
+        rows = await self.dao.search_users_by_prefix(prefix, limit + 1, after_username or '')
+        return keyset_page(rows, limit, 'username')
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""Environment bersama untuk semua test.
+
+config dibaca saat import, jadi environment diset di sini sebelum modul repo
+mana pun di-import. Database adalah stand-in SQLite berisi katalog init.sql
+dan akun benchmark (benchmarks.seed).
+"""
+import os
+import tempfile
+
+import pytest
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix='lbs-tests-'), 'lbs.sqlite')
+
+os.environ.update(
+    DB_BACKEND='sqlite',
+    DB_SQLITE_PATH=DB_PATH,
+    DB_ROUND_TRIP_MODE='enforce',
+    INVALIDATION_ENABLED='false',
+    TRIGRAM_INDEX_ON_STARTUP='false',
+    CACHE_L2_URL='',
+)
+for name, value in {
+    'DB_HOST': 'localhost', 'DB_PORT': '3306', 'DB_USER': 'test', 'DB_PASSWORD': 'test',
+    'DB_NAME': 'lbs_test', 'DB_POOL_MIN': '1', 'DB_POOL_MAX': '5',
+    'JWT_SECRET': 'round-trip-test', 'JWT_ALGORITHM': 'HS256', 'JWT_EXPIRE_MINUTES': '60',
+}.items():
+    os.environ.setdefault(name, value)
+
+from benchmarks.seed import seed_sqlite  # noqa: E402
+
+CREDENTIALS = seed_sqlite(DB_PATH)
+
+
+@pytest.fixture(scope='session')
+def credentials():
+    return CREDENTIALS
+
+
+@pytest.fixture
+def admin_token(credentials):
+    from app import app
+    username, password = credentials['admin']
+    response = app.test_client().post('/login', json={'username': username, 'password': password})
+    return response.get_json()['access_token']
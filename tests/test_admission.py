@@ -0,0 +1,113 @@
+"""Load shedding AdmissionController berdasarkan saturasi pool database"""
+import asyncio
+from types import SimpleNamespace
+
+from dao.pool_waits import pool_waits
+from dao.round_trips import CountingPool
+from middlewares.admission import AdmissionController, ROUTE_CLASSES
+
+
+class BlockingPool:
+    """Pool satu koneksi: acquire berikutnya menunggu sampai koneksi dilepas"""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+
+    def acquire(self, **route):
+        return self
+
+    async def __aenter__(self):
+        await self.lock.acquire()
+        return object()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.lock.release()
+
+
+def admission_config(**overrides):
+    config = {
+        'ADMISSION_ENABLED': True,
+        'ADMISSION_QUEUE_TIMEOUT_MS': 100,
+        'ADMISSION_RETRY_AFTER': 1,
+        'ADMISSION_POOL_WAITERS_MAX': 2,
+        'ADMISSION_POOL_WAIT_MS': 0,
+    }
+    for name in ROUTE_CLASSES:
+        config[f'ADMISSION_{name.upper()}_MAX'] = 8
+        config[f'ADMISSION_{name.upper()}_QUEUE'] = 8
+    config.update(overrides)
+    return SimpleNamespace(**config)
+
+
+async def downstream(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'ok'})
+
+
+async def call(controller, path='/books'):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await controller({'type': 'http', 'method': 'GET', 'path': path}, None, send)
+    return messages[0]['status']
+
+
+def test_waiters_and_shedding_follow_pool_queue():
+    async def scenario():
+        pool = CountingPool(BlockingPool())
+        controller = AdmissionController(downstream, admission_config())
+        release = asyncio.Event()
+
+        async def hold():
+            async with pool.acquire():
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        assert await call(controller) == 200
+
+        # Tiga acquire menunggu koneksi (> ADMISSION_POOL_WAITERS_MAX=2)
+        waiters = [asyncio.ensure_future(hold()) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert pool_waits.waiting == 3
+        assert controller.pool_saturated()
+        assert await call(controller) == 503
+        assert controller.stats()['pool_shed'] == 1
+        # /health tidak pernah ditolak
+        assert await call(controller, '/health') == 200
+
+        # Antrean habis: request kembali diterima
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        assert pool_waits.waiting == 0
+        assert await call(controller) == 200
+
+    asyncio.run(scenario())
+
+
+def test_sheds_when_head_waiter_waits_too_long():
+    async def scenario():
+        pool = CountingPool(BlockingPool())
+        controller = AdmissionController(
+            downstream, admission_config(ADMISSION_POOL_WAITERS_MAX=0, ADMISSION_POOL_WAIT_MS=50)
+        )
+        release = asyncio.Event()
+
+        async def hold():
+            async with pool.acquire():
+                await release.wait()
+
+        tasks = [asyncio.ensure_future(hold()) for _ in range(2)]
+        await asyncio.sleep(0)
+        # Satu penunggu saja belum jenuh selama waktunya di bawah batas
+        assert await call(controller) == 200
+        await asyncio.sleep(0.08)
+        assert await call(controller) == 503
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert await call(controller) == 200
+
+    asyncio.run(scenario())
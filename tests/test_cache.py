@@ -0,0 +1,80 @@
+"""TTLCache (generation, stale, L2) dan BackgroundRefresher"""
+import asyncio
+import concurrent.futures
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dao import replicas, round_trips
+from utils.cache import TTLCache, FRESH, refresher
+from utils.shared_cache import MemoryClient, SharedCache
+
+
+def test_refresh_not_counted_against_request():
+    counter, token = round_trips.start('GET /test', 0)
+    _, session_token = replicas.begin(pinned=True)
+    seen = concurrent.futures.Future()
+
+    async def refresh(pool):
+        async with pool.acquire(read_only=True) as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT 1")
+        seen.set_result((round_trips.current(), replicas.current()))
+
+    try:
+        assert refresher.submit(('test', 'context'), refresh)
+        # Refresh tidak mewarisi counter round trip maupun sesi baca request
+        assert seen.result(timeout=5) == (None, None)
+    finally:
+        replicas.end(session_token)
+        round_trips.stop(token)
+    assert counter.count == 0
+
+
+def test_set_after_invalidation_is_dropped():
+    cache = TTLCache('test.generation', maxsize=10, ttl=60)
+    generation = cache.generation
+    cache.clear()
+    # Hasil yang mulai dimuat sebelum invalidasi tidak boleh tersimpan
+    assert cache.set('key', 'lama', generation) is False
+    assert asyncio.run(cache.get('key')) == (None, None)
+    assert cache.set('key', 'baru', cache.generation) is True
+    assert asyncio.run(cache.get('key')) == ('baru', FRESH)
+
+
+class SlowClient(MemoryClient):
+    """MemoryClient dengan latensi jaringan buatan"""
+
+    def execute(self, command, *args):
+        time.sleep(0.05)
+        return super().execute(command, *args)
+
+
+def test_l2_io_does_not_block_event_loop():
+    executor = ThreadPoolExecutor(max_workers=1)
+    cache = TTLCache('test.l2', maxsize=10, ttl=60)
+    cache.shared = SharedCache(SlowClient(), 'test.l2', executor)
+
+    async def scenario():
+        cache.set('key', 'nilai', cache.generation)
+        ticks = []
+
+        async def ticker():
+            while len(ticks) < 100:
+                ticks.append(1)
+                await asyncio.sleep(0.001)
+
+        task = asyncio.ensure_future(ticker())
+        cache._entries.clear()
+        # Miss L1 -> L2 (SET lalu MGET, masing-masing 50 ms) dilayani di thread executor
+        assert await cache.get('key') == ('nilai', FRESH)
+        assert len(ticks) > 10
+        task.cancel()
+
+        # clear() diantre sebelum get() berikutnya: entry lama tidak terbaca lagi
+        cache.clear()
+        assert await cache.get('key') == (None, None)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
@@ -0,0 +1,44 @@
+"""ETag, If-None-Match, dan If-Match (optimistic concurrency) untuk buku"""
+from app import app
+from utils.http_cache import if_match_version
+
+
+def _if_match(header):
+    headers = {'If-Match': header} if header is not None else {}
+    with app.test_request_context('/books/5', method='PUT', headers=headers):
+        return if_match_version('book', 5)
+
+
+def test_if_match_version_parsing():
+    assert _if_match(None) is None
+    assert _if_match('*') is None
+    assert _if_match('"book-5-3"') == 3
+    # Kompresi melemahkan ETag; weak tag tetap diterima
+    assert _if_match('W/"book-5-3"') == 3
+    assert _if_match('"book-6-3", "book-5-4"') == 4
+    # Tag resource lain tidak boleh cocok dengan versi mana pun
+    assert _if_match('"book-50-3"') == -1
+    assert _if_match('"book-5-x"') == -1
+
+
+def test_conditional_get_and_update(admin_token):
+    client = app.test_client()
+    admin = {'Authorization': f"Bearer {admin_token}"}
+
+    response = client.get('/books/4')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    assert client.get('/books/4', headers={'If-None-Match': etag}).status_code == 304
+
+    response = client.put('/books/4', json={'stok': 9}, headers={**admin, 'If-Match': etag})
+    assert response.status_code == 200
+    new_etag = response.headers['ETag']
+    assert new_etag != etag
+    assert client.get('/books/4', headers={'If-None-Match': etag}).status_code == 200
+    assert client.get('/books/4').headers['ETag'] == new_etag
+
+    # ETag lama: 412 beserta versi terkini, data tidak berubah
+    response = client.put('/books/4', json={'stok': 1}, headers={**admin, 'If-Match': etag})
+    assert response.status_code == 412
+    assert response.headers['ETag'] == new_etag
+    assert client.get('/books/4').get_json()['stok'] == 9
@@ -0,0 +1,39 @@
+"""GET /users dan /users/search: body tetap list, halaman berikutnya lewat header"""
+from urllib.parse import urlsplit
+
+from app import app
+from utils.pagination import pagination_headers
+
+
+def test_last_page_has_no_next_headers():
+    headers = pagination_headers({'limit': 50, 'next_cursor': None}, 'http://x/users', {})
+    assert headers == {'X-Page-Limit': '50'}
+
+
+def test_users_list_follows_link_header(admin_token):
+    client = app.test_client()
+    auth = {'Authorization': f'Bearer {admin_token}'}
+
+    response = client.get('/users?limit=1', headers=auth)
+    assert response.status_code == 200
+    first = response.get_json()
+    assert isinstance(first, list) and len(first) == 1
+    assert response.headers['X-Page-Limit'] == '1'
+    cursor = response.headers['X-Next-Cursor']
+    link = response.headers['Link']
+    assert link.endswith('; rel="next"') and f'cursor={cursor}' in link
+
+    next_url = urlsplit(link[1:link.index('>')])
+    response = client.get(f'{next_url.path}?{next_url.query}', headers=auth)
+    assert response.status_code == 200
+    second = response.get_json()
+    assert isinstance(second, list) and len(second) == 1
+    assert second[0]['id'] > first[0]['id']
+
+
+def test_user_search_returns_list(admin_token):
+    response = app.test_client().get(
+        '/users/search?q=bench&limit=1', headers={'Authorization': f'Bearer {admin_token}'}
+    )
+    assert response.status_code == 200
+    assert isinstance(response.get_json(), list)
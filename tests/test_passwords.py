@@ -0,0 +1,31 @@
+"""bcrypt dijalankan di thread terpisah dari event loop"""
+import asyncio
+
+from utils.passwords import check_password_async, hash_password, hash_password_async, hash_rounds
+
+
+def test_bcrypt_does_not_block_event_loop():
+    hashed = hash_password('rahasia123', rounds=12)
+
+    async def scenario():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.001)
+
+        task = asyncio.ensure_future(ticker())
+        await asyncio.sleep(0)
+        # Satu checkpw cost 12 memakan ratusan ms CPU
+        assert await check_password_async('rahasia123', hashed)
+        assert not await check_password_async('salah', hashed)
+        task.cancel()
+        return len(ticks)
+
+    assert asyncio.run(scenario()) > 10
+
+
+def test_hash_password_async_uses_rounds():
+    hashed = asyncio.run(hash_password_async('rahasia123', rounds=10))
+    assert hash_rounds(hashed) == 10
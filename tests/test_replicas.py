@@ -0,0 +1,64 @@
+"""Pool replica dipakai bersama per event loop dan ditutup saat shutdown"""
+import asyncio
+
+from dao import loop_pools
+from dao.replicas import Replica
+from middlewares.lifespan import Lifespan
+
+
+class FakePool:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+def _replica(created):
+    async def factory():
+        created.append(FakePool())
+        return created[-1]
+
+    return Replica('db-r1:3306', factory)
+
+
+def test_replica_pool_shared_per_loop():
+    created = []
+
+    async def requests():
+        # get_db_pool() membuat Replica baru di setiap request
+        first = await _replica(created).get_pool()
+        second = await _replica(created).get_pool()
+        assert first is second
+        await loop_pools.close('replica')
+        return first
+
+    pool = asyncio.run(requests())
+    assert len(created) == 1 and pool.closed
+    # Loop lain (mis. server dev) mendapat pool sendiri
+    asyncio.run(requests())
+    assert len(created) == 2
+
+
+def test_lifespan_shutdown_closes_pools():
+    created = []
+    sent = []
+
+    async def serve():
+        await _replica(created).get_pool()
+        messages = iter([{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        await Lifespan(None)({'type': 'lifespan'}, receive, send)
+
+    asyncio.run(serve())
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+    assert created[0].closed
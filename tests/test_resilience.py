@@ -0,0 +1,76 @@
+"""Circuit breaker, retry, dan 503 + Retry-After saat database tidak tersedia"""
+import asyncio
+
+import aiomysql
+import pytest
+
+from app import app
+from dao.resilience import CircuitBreaker, breaker, run_with_retry
+from utils.exceptions import ServiceUnavailableError
+
+
+def test_breaker_opens_and_admits_one_probe(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('dao.resilience.time.monotonic', lambda: clock[0])
+    cb = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+    cb.before_call()
+    cb.record_failure()
+    cb.before_call()
+    cb.record_failure()
+    assert cb.is_open()
+    with pytest.raises(ServiceUnavailableError) as error:
+        cb.before_call()
+    assert error.value.retry_after == 10
+
+    # Setelah reset_timeout hanya satu probe yang boleh lewat
+    clock[0] += 10
+    cb.before_call()
+    with pytest.raises(ServiceUnavailableError):
+        cb.before_call()
+    cb.record_success()
+    assert not cb.is_open()
+    cb.before_call()
+
+
+def test_retry_only_idempotent_connection_errors():
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 2:
+            raise aiomysql.OperationalError(2013, 'Lost connection to MySQL server during query')
+        return 'ok'
+
+    assert asyncio.run(run_with_retry(flaky, idempotent=True)) == 'ok'
+    assert len(calls) == 2
+
+    calls.clear()
+    with pytest.raises(aiomysql.OperationalError):
+        asyncio.run(run_with_retry(flaky, idempotent=False))
+    assert len(calls) == 1
+
+
+@pytest.fixture
+def open_breaker():
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    yield
+    breaker.record_success()
+
+
+def test_routes_return_503_when_breaker_open(credentials, admin_token, open_breaker):
+    client = app.test_client()
+    admin = {'Authorization': f"Bearer {admin_token}"}
+    for method, path, body, headers in [
+        ('GET', '/books/1', None, {}),
+        ('GET', '/books/search?q=Harry', None, {}),
+        ('POST', '/login', {'username': credentials['user'][0], 'password': credentials['user'][1]}, {}),
+        ('POST', '/peminjaman', {'book_id': 1}, admin),
+        ('GET', '/reports', None, admin),
+        ('GET', '/analytics/popular-books', None, admin),
+    ]:
+        response = client.open(path, method=method, json=body, headers=headers)
+        assert response.status_code == 503, (path, response.get_data(as_text=True))
+        assert int(response.headers['Retry-After']) >= 1
+        assert response.get_json()['error'] == 'Service Unavailable'
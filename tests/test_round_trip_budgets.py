@@ -0,0 +1,175 @@
+"""Budget round trip database per route (@round_trip_budget) untuk setiap peran.
+
+Semua route dijalankan terhadap database SQLite hasil benchmarks.seed
+(tests/conftest.py) dengan DB_ROUND_TRIP_MODE=enforce; setiap response
+membawa X-DB-Round-Trips dan X-DB-Round-Trip-Budget, dan test gagal jika
+ada yang melebihi budget.
+Cache proses dikosongkan sebelum setiap request agar jalur terdingin
+(paling banyak query) yang diukur.
+"""
+import pytest
+
+from app import app
+from utils import cache as cache_module
+
+
+def _clear_caches():
+    with cache_module._namespaces_lock:
+        caches = {id(cache): cache for group in cache_module._namespaces.values() for cache in group}
+    for cache in caches.values():
+        cache.clear()
+
+
+class BudgetClient:
+    """Test client yang memeriksa header budget di setiap response"""
+
+    def __init__(self, client, credentials):
+        self.client = client
+        self.credentials = credentials
+        self.seen = {}
+
+    def request(self, method, path, role=None, token=None, **kwargs):
+        _clear_caches()
+        if token:
+            kwargs.setdefault('headers', {})['Authorization'] = f"Bearer {token}"
+        response = self.client.open(path, method=method, **kwargs)
+        count = response.headers.get('X-DB-Round-Trips')
+        budget = response.headers.get('X-DB-Round-Trip-Budget')
+        if count is not None:
+            label = f"{role or 'anon'} {method} {path} -> {response.status_code}"
+            self.seen[label] = (int(count), int(budget))
+            assert int(count) <= int(budget), f"{label}: {count} round trip, budget {budget}"
+        return response
+
+    def login(self, role):
+        username, password = self.credentials[role]
+        response = self.request('POST', '/login', json={'username': username, 'password': password})
+        assert response.status_code == 200, response.get_data(as_text=True)
+        return response.get_json()
+
+
+@pytest.fixture(scope='module')
+def client(credentials):
+    return BudgetClient(app.test_client(), credentials)
+
+
+@pytest.fixture(scope='module')
+def admin(client):
+    return client.login('admin')
+
+
+@pytest.fixture(scope='module')
+def user(client):
+    return client.login('user')
+
+
+@pytest.fixture(scope='module')
+def book_id(client, admin):
+    response = client.request(
+        'POST', '/books', 'admin', admin['access_token'],
+        json={'judul': 'Buku Uji Budget', 'pengarang': 'Penulis Uji', 'tahun_terbit': 2020, 'stok': 5}
+    )
+    assert response.status_code == 201, response.get_data(as_text=True)
+    return response.get_json()['id']
+
+
+def test_public_routes(client, book_id):
+    assert client.request('GET', '/books').status_code == 200
+    assert client.request('GET', '/books?page=2&per_page=5').status_code == 200
+    assert client.request('GET', f'/books/{book_id}').status_code == 200
+    assert client.request('GET', '/books/999999').status_code == 404
+    assert client.request('GET', '/books/search?q=Budget').status_code == 200
+    # Username tidak ada dan password salah dijawab sama
+    assert client.request('POST', '/login', json={'username': 'tidak_ada', 'password': 'Salah123'}).status_code == 401
+    username, _ = client.credentials['user']
+    assert client.request('POST', '/login', json={'username': username, 'password': 'Salah123'}).status_code == 401
+
+
+def test_user_routes(client, user, admin, book_id):
+    token, user_id = user['access_token'], user['user']['id']
+    assert client.request('GET', '/me', 'user', token).status_code == 200
+    assert client.request('GET', f'/users/{user_id}', 'user', token).status_code == 200
+    assert client.request('GET', f"/users/{admin['user']['id']}", 'user', token).status_code == 403
+
+    response = client.request('POST', '/peminjaman', 'user', token, json={'book_id': book_id})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    peminjaman_id = response.get_json()['id']
+    assert client.request('POST', '/peminjaman', 'user', token, json={'book_id': 999999}).status_code == 404
+
+    assert client.request('GET', f'/peminjaman/{peminjaman_id}', 'user', token).status_code == 200
+    assert client.request('GET', f'/users/{user_id}/peminjaman', 'user', token).status_code == 200
+    assert client.request('GET', f"/users/{admin['user']['id']}/peminjaman", 'user', token).status_code == 403
+    assert client.request('POST', f'/peminjaman/{peminjaman_id}/kembalikan', 'user', token).status_code == 200
+    # Dikembalikan dua kali
+    assert client.request('POST', f'/peminjaman/{peminjaman_id}/kembalikan', 'user', token).status_code in (400, 403, 404)
+
+    # Route admin ditolak setelah query autentikasi
+    assert client.request('GET', '/peminjaman', 'user', token).status_code == 403
+    assert client.request('GET', '/users', 'user', token).status_code == 403
+    assert client.request('DELETE', f'/books/{book_id}', 'user', token).status_code == 403
+
+
+def test_admin_routes(client, admin, user, book_id):
+    token, user_id = admin['access_token'], user['user']['id']
+    response = client.request('GET', f'/books/{book_id}')
+    etag = response.headers.get('ETag')
+    headers = {'If-Match': etag} if etag else {}
+    assert client.request(
+        'PUT', f'/books/{book_id}', 'admin', token, json={'stok': 6}, headers=headers
+    ).status_code == 200
+    assert client.request('PATCH', f'/books/{book_id}/stock', 'admin', token, json={'quantity': 1}).status_code == 200
+
+    # Admin meminjamkan untuk user lain lalu mengembalikannya
+    response = client.request('POST', '/peminjaman', 'admin', token, json={'book_id': book_id, 'user_id': user_id})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    peminjaman_id = response.get_json()['id']
+    assert client.request('GET', '/peminjaman', 'admin', token).status_code == 200
+    assert client.request('GET', f'/peminjaman/{peminjaman_id}', 'admin', token).status_code == 200
+    assert client.request('GET', f'/users/{user_id}/peminjaman', 'admin', token).status_code == 200
+    assert client.request('POST', f'/peminjaman/{peminjaman_id}/kembalikan', 'admin', token).status_code == 200
+
+    assert client.request('GET', '/reports', 'admin', token).status_code == 200
+    assert client.request('GET', '/reports/filter-options', 'admin', token).status_code == 200
+    assert client.request('GET', '/analytics/popular-books', 'admin', token).status_code == 200
+    assert client.request('GET', '/analytics/available-years', 'admin', token).status_code == 200
+
+    response = client.request(
+        'POST', '/users', 'admin', token,
+        json={'username': 'budget_user', 'password': 'Password1', 'role': 'user'}
+    )
+    assert response.status_code == 201, response.get_data(as_text=True)
+    new_id = response.get_json()['id']
+    assert client.request('GET', '/users', 'admin', token).status_code == 200
+    assert client.request('GET', f'/users/{user_id}', 'admin', token).status_code == 200
+    assert client.request('GET', '/users/search?q=bench', 'admin', token).status_code == 200
+    assert client.request(
+        'PUT', f'/users/{new_id}', 'admin', token,
+        json={'username': 'budget_user', 'password': 'Password2', 'role': 'admin'}
+    ).status_code == 200
+    # Ganti username menambah satu cek keunikan
+    assert client.request(
+        'PUT', f'/users/{new_id}', 'admin', token,
+        json={'username': 'budget_user2', 'password': 'Password2', 'role': 'admin'}
+    ).status_code == 200
+    assert client.request('DELETE', f'/users/{new_id}', 'admin', token).status_code == 200
+    # Buku dengan riwayat peminjaman tidak boleh dihapus (peminjaman tidak ikut terhapus)
+    assert client.request('DELETE', f'/books/{book_id}', 'admin', token).status_code == 409
+    assert client.request('GET', f'/peminjaman/{peminjaman_id}', 'admin', token).status_code == 200
+    response = client.request(
+        'POST', '/books', 'admin', token,
+        json={'judul': 'Buku Uji Hapus', 'pengarang': 'Penulis Uji', 'tahun_terbit': 2021, 'stok': 1}
+    )
+    assert client.request('DELETE', f"/books/{response.get_json()['id']}", 'admin', token).status_code == 200
+    assert client.request('DELETE', '/books/999999', 'admin', token).status_code == 404
+
+
+def test_token_routes(client):
+    session = client.login('user')
+    response = client.request('POST', '/token/refresh', json={'refresh_token': session['refresh_token']})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    refreshed = response.get_json()
+    # Refresh token lama dipakai ulang: seluruh keluarga token dicabut
+    assert client.request('POST', '/token/refresh', json={'refresh_token': session['refresh_token']}).status_code == 401
+    assert client.request(
+        'POST', '/logout', 'user', refreshed['access_token'], json={'refresh_token': refreshed['refresh_token']}
+    ).status_code in (200, 204)
@@ -0,0 +1,45 @@
+"""Back-pressure GET /books/stream: subscriber yang tertinggal diputus"""
+import asyncio
+
+from services.stock_stream import StockHub, Subscriber
+
+
+def _subscriber(book_ids, limit):
+    async def create():
+        return Subscriber(book_ids, limit)
+    return asyncio.run(create())
+
+
+def test_push_coalesces_per_book_and_flags_lagging():
+    subscriber = _subscriber(None, limit=2)
+    assert subscriber.push(1, {'id': 1, 'stok': 5})
+    # Update buku yang sama menimpa nilai lama, tidak menambah antrean
+    assert subscriber.push(1, {'id': 1, 'stok': 4})
+    assert subscriber.push(2, {'id': 2, 'stok': 1})
+    assert not subscriber.push(3, {'id': 3, 'stok': 7})
+    assert subscriber.lagging
+    assert subscriber.drain() == [{'id': 1, 'stok': 4}, {'id': 2, 'stok': 1}]
+    assert not subscriber.wakeup.is_set()
+
+
+def test_hub_marks_slow_subscriber_without_blocking_others():
+    hub = StockHub()
+    slow = _subscriber(None, limit=1)
+    fast = _subscriber({1, 2}, limit=10)
+    hub._subscribers.update({slow, fast})
+
+    books = {
+        1: {'id': 1, 'stok': 3, 'version': 2},
+        2: {'id': 2, 'stok': 0, 'version': 5},
+    }
+    hub._publish([1, 2], {1, 2}, books)
+    assert slow.lagging
+    assert not fast.lagging
+    assert fast.drain() == [
+        {'id': 1, 'stok': 3, 'version': 2},
+        {'id': 2, 'stok': 0, 'version': 5},
+    ]
+
+    # Event duplikat (versi sama) tidak dikirim ulang; buku terhapus dikirim sebagai deleted
+    hub._publish([1, 2], {1, 2}, {1: books[1]})
+    assert fast.drain() == [{'id': 2, 'deleted': True}]
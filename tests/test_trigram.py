@@ -0,0 +1,51 @@
+"""Skor dan pencarian indeks trigram (pencarian fuzzy)"""
+from utils.trigram import TrigramIndex, similarity, trigrams
+
+
+def _index(*books):
+    index = TrigramIndex()
+    assert index.start_build()
+    index.finish_build([
+        {'id': book_id, 'judul': judul, 'pengarang': pengarang}
+        for book_id, judul, pengarang in books
+    ])
+    return index
+
+
+def test_trigrams_are_padded_per_word():
+    assert trigrams('Ab') == {'  a', ' ab', 'ab '}
+    # Case dan tanda baca tidak berpengaruh
+    assert trigrams('Laskar-Pelangi') == trigrams('laskar pelangi')
+
+
+def test_similarity_is_fraction_of_query_trigrams():
+    query = trigrams('pelangi')
+    assert similarity(query, 'Laskar Pelangi') == 1.0
+    assert similarity(query, 'Bumi Manusia') == 0.0
+    assert 0.4 < similarity(query, 'pelagni') < 1.0
+    assert similarity(set(), 'apa saja') == 0.0
+
+
+def test_search_tolerates_typos_and_ranks_by_score():
+    index = _index(
+        (1, 'Laskar Pelangi', 'Andrea Hirata'),
+        (2, 'Sang Pemimpi', 'Andrea Hirata'),
+        (3, 'Bumi Manusia', 'Pramoedya Ananta Toer'),
+    )
+    results = index.search('laskar pelangii')
+    assert results[0][0] == 1
+    assert results[0][1] < 1.0
+    # Cocok lewat pengarang; skor sama diurutkan menurut id
+    assert [book_id for book_id, _ in index.search('andrea hirata')] == [1, 2]
+    assert index.search('pramudya', min_score=0.4)[0][0] == 3
+    assert index.search('xyzzy') == []
+
+
+def test_upsert_and_remove_are_reflected():
+    index = _index((1, 'Laskar Pelangi', 'Andrea Hirata'))
+    index.upsert(1, judul='Ayat-Ayat Cinta')
+    # Posting lama basi tidak lagi menghasilkan kecocokan
+    assert index.search('laskar pelangi', min_score=0.5) == []
+    assert index.search('ayat cinta')[0][0] == 1
+    index.remove(1)
+    assert index.search('ayat cinta') == []
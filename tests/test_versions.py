@@ -0,0 +1,82 @@
+"""Kenaikan entity_versions ikut transaksi tulisnya"""
+import asyncio
+
+import pytest
+
+from config import get_db_pool
+from dao.book_dao import BookDAO
+from dao.peminjaman_dao import PeminjamanDAO
+from dao.version_dao import VersionDAO, TABLE_VERSION
+from utils.exceptions import DatabaseError
+
+
+@pytest.fixture
+def broken_bump(monkeypatch):
+    statement = VersionDAO._bump_statement
+    monkeypatch.setattr(
+        VersionDAO, '_bump_statement',
+        staticmethod(lambda keys: ("INSERT INTO tabel_tidak_ada VALUES (%s)", (1,)))
+    )
+    return statement
+
+
+def _snapshot(book_id, user_id):
+    async def read():
+        pool = await get_db_pool()
+        book = await BookDAO(pool).get_book_by_id(book_id)
+        loans = await PeminjamanDAO(pool).get_peminjaman_aktif(user_id)
+        version = await VersionDAO(pool).get('books', TABLE_VERSION)
+        return book['stok'], len(loans), version['version']
+    return asyncio.run(read())
+
+
+def test_failed_bump_rolls_back_book_write(broken_bump):
+    before = _snapshot(1, 1)
+
+    async def adjust():
+        await BookDAO(await get_db_pool()).adjust_stock(1, 5)
+
+    with pytest.raises(DatabaseError):
+        asyncio.run(adjust())
+    assert _snapshot(1, 1) == before
+
+
+def test_failed_bump_rolls_back_loan(broken_bump):
+    before = _snapshot(2, 1)
+
+    async def borrow():
+        await PeminjamanDAO(await get_db_pool()).add_peminjaman(1, 2)
+
+    with pytest.raises(DatabaseError):
+        asyncio.run(borrow())
+    # Stok, peminjaman, dan versi katalog tidak berubah sebagian
+    assert _snapshot(2, 1) == before
+
+
+def test_write_and_version_commit_together():
+    stok, _, version = _snapshot(1, 1)
+
+    async def adjust():
+        await BookDAO(await get_db_pool()).adjust_stock(1, 1)
+
+    asyncio.run(adjust())
+    assert _snapshot(1, 1)[0::2] == (stok + 1, version + 1)
+
+
+def test_polling_replays_index_and_stock_events(monkeypatch):
+    from utils import invalidation
+
+    dispatched = []
+    monkeypatch.setattr(invalidation.bus, 'dispatch', lambda events, remote: dispatched.extend(events))
+
+    async def scenario():
+        pool = await get_db_pool()
+        poller = asyncio.ensure_future(invalidation._poll_node(VersionDAO(pool), 0.05))
+        await asyncio.sleep(0.02)
+        await BookDAO(pool).update_book(3, judul='Judul Baru', stok=7)
+        await asyncio.sleep(0.15)
+        poller.cancel()
+
+    asyncio.run(scenario())
+    # Worker yang kehilangan datagram tetap menyinkronkan indeks trigram dan stream stok
+    assert {('books', None), ('book_index', 3), ('book_stock', 3)} <= set(dispatched)
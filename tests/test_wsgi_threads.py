@@ -0,0 +1,73 @@
+"""Request bersamaan lewat ThreadedWsgiToAsgi tumpang tindih di satu event loop"""
+import asyncio
+import time
+
+from flask import Flask
+
+from middlewares.wsgi_threads import ThreadedWsgiToAsgi
+from utils.singleflight import single_flight
+
+DELAY_S = 0.3
+
+
+class SlowService:
+    calls = 0
+
+    @single_flight('test.slow_service')
+    async def load(self, key):
+        SlowService.calls += 1
+        await asyncio.sleep(DELAY_S)
+        return {'key': key}
+
+
+def _asgi_app():
+    app = Flask(__name__)
+
+    @app.route('/sleep')
+    async def sleep():
+        await asyncio.sleep(DELAY_S)
+        return 'ok'
+
+    @app.route('/load')
+    async def load():
+        return await SlowService().load('sama')
+
+    return ThreadedWsgiToAsgi(app, threads=8)
+
+
+async def _get(app, path):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app({
+        'type': 'http', 'method': 'GET', 'path': path, 'root_path': '',
+        'query_string': b'', 'headers': [], 'http_version': '1.1',
+    }, receive, send)
+    return messages[0]['status'], b''.join(message.get('body', b'') for message in messages[1:])
+
+
+async def _get_many(app, path, count):
+    return await asyncio.gather(*(_get(app, path) for _ in range(count)))
+
+
+def test_requests_run_concurrently():
+    app = _asgi_app()
+    started = time.monotonic()
+    responses = asyncio.run(_get_many(app, '/sleep', 4))
+    elapsed = time.monotonic() - started
+    assert [status for status, _ in responses] == [200] * 4
+    # Bergiliran di satu thread butuh 4 * DELAY_S
+    assert elapsed < 2 * DELAY_S
+
+
+def test_single_flight_coalesces_concurrent_requests():
+    app = _asgi_app()
+    SlowService.calls = 0
+    responses = asyncio.run(_get_many(app, '/load', 4))
+    assert [status for status, _ in responses] == [200] * 4
+    assert SlowService.calls == 1
@@ -0,0 +1,258 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from config import settings
+from dao import replicas
+from utils.invalidation import bus
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+FRESH = 'fresh'
+STALE = 'stale'
+
+# namespace -> daftar cache yang harus dikosongkan saat entitas itu berubah
+_namespaces = {}
+_namespaces_lock = threading.Lock()
+
+
+class TTLCache:
+    """Cache LRU ber-TTL per proses, aman dipakai lintas thread.
+
+    Entry berumur < ttl dianggap fresh; sampai ttl + stale_ttl masih boleh
+    dipakai sebagai stale (stale-while-revalidate). Setiap invalidasi
+    menaikkan generation sehingga hasil query yang dimulai sebelum
+    invalidasi tidak ikut disimpan: ambil cache.generation sebelum memuat
+    data dan kirim ke set().
+
+    shared=True menambahkan L2 bersama antar worker (utils/shared_cache.py)
+    jika CACHE_L2_URL diisi: miss di L1 dicari di L2 (karena itu get() adalah
+    coroutine), set/delete/clear diteruskan ke L2 di background.
+
+    Selama DB_READ_YOUR_WRITES_S setelah invalidasi, hasil yang dibaca dari
+    replica tidak disimpan: replica bisa belum menerima tulis pemicunya, dan
+    entry lama itu akan terbaca juga oleh penulis yang dipin ke primary.
+    """
+
+    def __init__(self, name, maxsize, ttl, stale_ttl=0, namespaces=(), shared=False):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._generation = 0
+        # Generation L2 terakhir yang terbaca get()/clear()
+        self._shared_generation = None
+        self.invalidated_at = None
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.shared = None
+        if shared:
+            from utils.shared_cache import shared_cache
+            self.shared = shared_cache(name)
+        for namespace in namespaces:
+            register(namespace, self)
+        metrics.register_collector(f'cache.{name}', self.stats)
+
+    async def get(self, key):
+        """Kembalikan (value, FRESH|STALE) atau (None, None) jika tidak ada"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = now - stored_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    state = FRESH
+                elif age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    state = STALE
+                else:
+                    del self._entries[key]
+                    state = None
+            else:
+                state = None
+            generation = self._generation
+
+        if state is None and self.shared is not None:
+            value, state = await self._get_shared(key, generation)
+
+        with self._lock:
+            if state:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.incr(f'cache.{self.name}.{state or "miss"}')
+        return (value, state) if state else (None, None)
+
+    @property
+    def generation(self):
+        """Token untuk set(): generation L1 dan L2 saat data mulai dimuat"""
+        return self._generation, self._shared_generation
+
+    async def _get_shared(self, key, generation):
+        value, age, shared_generation = await self.shared.get(key)
+        if shared_generation is not None:
+            self._shared_generation = shared_generation
+        if age is None or age >= self.ttl + self.stale_ttl:
+            return None, None
+        # Salin ke L1 dengan umur dari L2 agar TTL tidak bertambah panjang
+        self._store(key, value, time.monotonic() - age, generation)
+        return value, FRESH if age < self.ttl else STALE
+
+    def set(self, key, value, generation=None):
+        """Simpan value; diabaikan jika cache sudah diinvalidasi sejak generation"""
+        if self._replica_lagging():
+            metrics.incr(f'cache.{self.name}.replica_skipped')
+            return False
+        local, shared = generation if generation is not None else (None, None)
+        if not self._store(key, value, time.monotonic(), local):
+            return False
+        if self.shared is not None:
+            self.shared.set(key, value, self.ttl + self.stale_ttl, shared)
+        return True
+
+    def _store(self, key, value, stored_at, generation):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                metrics.incr(f'cache.{self.name}.evicted')
+        return True
+
+    def _replica_lagging(self):
+        if self.invalidated_at is None:
+            return False
+        window = settings.database.DB_READ_YOUR_WRITES_S
+        return time.monotonic() - self.invalidated_at < window and replicas.read_from_replica()
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self.invalidated_at = time.monotonic()
+        if self.shared is not None:
+            self.shared.delete(key)
+        metrics.incr(f'cache.{self.name}.invalidated')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidated_at = time.monotonic()
+        if self.shared is not None:
+            # Generation L2 baru terbaca lagi oleh get() berikutnya
+            self._shared_generation = None
+            self.shared.clear()
+        metrics.incr(f'cache.{self.name}.invalidated')
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'entries': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'generation': self._generation,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+        if self.shared is not None:
+            stats['l2'] = self.shared.stats()
+        return stats
+
+
+def register(namespace, cache):
+    with _namespaces_lock:
+        _namespaces.setdefault(namespace, []).append(cache)
+
+
+def invalidate(*namespaces):
+    """Kosongkan semua cache yang terdaftar pada namespace (mis. 'books')
+    di worker ini dan, lewat bus invalidasi, di worker lain"""
+    bus.publish(*((namespace, None) for namespace in namespaces))
+
+
+def invalidate_keys(namespace, *keys):
+    """Hapus key tertentu dari cache pada namespace (mis. profil user per id)"""
+    bus.publish(*((namespace, key) for key in keys))
+
+
+def _apply_invalidation(namespace, key):
+    with _namespaces_lock:
+        caches = list(_namespaces.get(namespace, ()))
+    for cache in caches:
+        if key is None:
+            cache.clear()
+        else:
+            cache.delete(key)
+
+
+bus.subscribe(_apply_invalidation)
+
+
+class BackgroundRefresher:
+    """Satu thread daemon dengan event loop sendiri untuk refresh cache stale.
+
+    Event loop request Flask selesai bersama request-nya, jadi refresh
+    dijalankan di loop terpisah yang memiliki pool database sendiri.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._pool = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name='cache-refresher', daemon=True
+                ).start()
+            return self._loop
+
+    async def _get_pool(self):
+        if self._pool is None:
+            from config import get_db_pool
+            self._pool = await get_db_pool()
+        return self._pool
+
+    def submit(self, key, refresh):
+        """Jalankan refresh(pool) di background; key yang sama tidak diduplikasi"""
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        # Context kosong: run_coroutine_threadsafe akan menyalin context pemanggil,
+        # sehingga query refresh terhitung ke budget dan sesi baca request pemicunya
+        self._ensure_loop().call_soon_threadsafe(
+            self._start, key, refresh, context=contextvars.Context()
+        )
+        return True
+
+    def _start(self, key, refresh):
+        asyncio.ensure_future(self._run(key, refresh))
+
+    async def _run(self, key, refresh):
+        try:
+            await refresh(await self._get_pool())
+            metrics.incr('cache.refresh.completed')
+        except Exception as e:
+            metrics.incr('cache.refresh.failed')
+            logger.warning(f"Refresh cache gagal untuk {key!r}: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+
+refresher = BackgroundRefresher()
@@ -40,4 +40,26 @@ class OperationNotAllowedError(DatabaseError):
     def __init__(self, message, detail=None):
         self.message = message
         self.detail = detail
-        super().__init__(f"Operasi tidak diizinkan: {message}")
\ No newline at end of file
+        super().__init__(f"Operasi tidak diizinkan: {message}")
+
+class PreconditionFailedError(DatabaseError):
+    """Raised when a conditional write does not match the current version"""
+    def __init__(self, model, identifier, current_version=None):
+        self.model = model
+        self.identifier = identifier
+        self.current_version = current_version
+        self.message = f"{model} with id {identifier} has been modified (current version: {current_version})"
+        super().__init__(self.message)
+
+class ServiceUnavailableError(DatabaseError):
+    """Raised when the database circuit breaker is open"""
+    def __init__(self, retry_after=None):
+        self.retry_after = retry_after
+        self.message = "Database sementara tidak tersedia"
+        super().__init__(self.message)
+
+class AuthenticationError(DatabaseError):
+    """Raised when a credential or refresh token is invalid, expired or reused"""
+    def __init__(self, message="Token tidak valid"):
+        self.message = message
+        super().__init__(self.message)
@@ -0,0 +1,60 @@
+from datetime import timezone
+
+from flask import request, Response
+from werkzeug.http import unquote_etag
+
+
+def build_etag(*parts):
+    """Gabungkan bagian-bagian versi menjadi satu nilai ETag"""
+    return "-".join(str(part) for part in parts)
+
+
+def latest_modified(*versions):
+    """Ambil updated_at terbaru dari hasil VersionDAO (UTC)"""
+    timestamps = [v['updated_at'] for v in versions if v.get('updated_at')]
+    if not timestamps:
+        return None
+    return max(timestamps).replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def is_not_modified(etag, last_modified=None):
+    """Cek If-None-Match (prioritas) lalu If-Modified-Since"""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.if_none_match:
+        # GET memakai perbandingan weak (RFC 9110 13.1.2)
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def set_validators(response, etag, last_modified=None, weak=False, private=False):
+    response.set_etag(etag, weak=weak)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+    return response
+
+
+def not_modified_response(etag, last_modified=None, weak=False, private=False):
+    return set_validators(Response(status=304), etag, last_modified, weak, private)
+
+
+def if_match_version(*prefix_parts):
+    """Versi yang diharapkan dari header If-Match untuk ETag '<prefix>-<versi>'
+
+    Mengembalikan None jika header tidak ada atau bernilai '*'. Tag milik
+    resource lain menghasilkan -1 sehingga conditional update pasti gagal.
+    Weak tag tetap diterima karena kompresi response melemahkan ETag.
+    """
+    header = request.headers.get('If-Match')
+    if not header or header.strip() == '*':
+        return None
+
+    prefix = build_etag(*prefix_parts) + "-"
+    for raw in header.split(','):
+        etag, _weak = unquote_etag(raw.strip())
+        if etag and etag.startswith(prefix) and etag[len(prefix):].isdigit():
+            return int(etag[len(prefix):])
+    return -1
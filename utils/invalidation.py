@@ -0,0 +1,197 @@
+"""Bus invalidasi cache lintas worker hypercorn.
+
+Event berbentuk (namespace, key); key None berarti seluruh namespace
+(mis. ('books', None) untuk katalog, ('users', 5) untuk satu profil).
+publish() menerapkan event di worker ini lalu mengirimnya sebagai satu
+datagram ke socket Unix setiap worker lain di INVALIDATION_SOCKET_DIR
+(<pid>.sock); penerima menjalankan subscriber di thread-nya sendiri.
+
+Datagram bisa hilang (antrean penerima penuh, worker di host/container
+lain). Sebagai fallback, tabel entity_versions di-poll setiap
+INVALIDATION_POLL_MS dan versi yang berubah diterapkan sebagai event;
+karena itu setiap event yang dikirim DAO (termasuk ('book_index', id) dan
+('book_stock', id)) juga dicatat sebagai versi di transaksi tulisnya.
+"""
+import asyncio
+import atexit
+import json
+import logging
+import os
+import socket
+import threading
+
+from config import settings
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Batasi ukuran datagram; event dikirim dalam beberapa pesan bila perlu
+EVENTS_PER_MESSAGE = 100
+MAX_DATAGRAM = 65536
+# entity_id di entity_versions untuk versi level tabel (dao.version_dao.TABLE_VERSION)
+TABLE_VERSION = 0
+
+
+class InvalidationBus:
+    def __init__(self, directory):
+        self.directory = directory
+        self._handlers = []
+        self._pid = None
+        self._path = None
+        self._receiver = None
+        self._sender = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, handler, remote_only=False):
+        """handler(namespace, key); remote_only untuk event dari worker lain saja"""
+        self._handlers.append((handler, remote_only))
+
+    def publish(self, *events):
+        events = [(namespace, key) for namespace, key in events]
+        if not events:
+            return
+        self.dispatch(events, remote=False)
+        if self._pid == os.getpid():
+            self._broadcast(events)
+
+    def dispatch(self, events, remote):
+        for handler, remote_only in list(self._handlers):
+            if remote_only and not remote:
+                continue
+            for namespace, key in events:
+                try:
+                    handler(namespace, key)
+                except Exception as e:
+                    logger.warning(f"Handler invalidasi {namespace}/{key} gagal: {str(e)}")
+
+    def start(self):
+        """Bind socket worker ini dan mulai thread penerima (idempoten per proses)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return True
+            try:
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+                path = os.path.join(self.directory, f"{os.getpid()}.sock")
+                if os.path.exists(path):
+                    os.unlink(path)
+                receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                receiver.bind(path)
+                sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                sender.setblocking(False)
+            except OSError as e:
+                logger.warning(f"Socket invalidasi tidak tersedia ({e}); hanya polling entity_versions")
+                return False
+            self._pid, self._path = os.getpid(), path
+            self._receiver, self._sender = receiver, sender
+        atexit.register(self._unlink)
+        threading.Thread(target=self._receive, name='cache-invalidation', daemon=True).start()
+        return True
+
+    def _unlink(self):
+        if self._pid == os.getpid():
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+
+    def _peers(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [
+            os.path.join(self.directory, name)
+            for name in names
+            if name.endswith('.sock') and name != os.path.basename(self._path)
+        ]
+
+    def _broadcast(self, events):
+        for start in range(0, len(events), EVENTS_PER_MESSAGE):
+            data = json.dumps({
+                'origin': self._pid,
+                'events': events[start:start + EVENTS_PER_MESSAGE]
+            }).encode('utf-8')
+            for peer in self._peers():
+                try:
+                    self._sender.sendto(data, peer)
+                    metrics.incr('invalidation.sent')
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Socket sisa worker yang sudah mati
+                    try:
+                        os.unlink(peer)
+                    except OSError:
+                        pass
+                except OSError:
+                    # Antrean penerima penuh: polling entity_versions menyusul
+                    metrics.incr('invalidation.dropped')
+
+    def _receive(self):
+        while True:
+            try:
+                message = json.loads(self._receiver.recv(MAX_DATAGRAM))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Pesan invalidasi tidak terbaca: {str(e)}")
+                continue
+            if message.get('origin') == self._pid:
+                continue
+            metrics.incr('invalidation.received')
+            self.dispatch([tuple(event) for event in message.get('events', ())], remote=True)
+
+
+bus = InvalidationBus(settings.invalidation.INVALIDATION_SOCKET_DIR)
+
+
+def version_events(keys):
+    """(entity, entity_id) entity_versions -> event bus"""
+    return [(entity, None if entity_id == TABLE_VERSION else entity_id) for entity, entity_id in keys]
+
+
+async def poll_versions(pool):
+    """Fallback: terapkan perubahan entity_versions yang mungkin terlewat bus"""
+    from dao.sharding import ShardRouter, is_sharded
+    from dao.version_dao import VersionDAO
+
+    # Dengan sharding setiap node menyimpan counter versinya sendiri
+    pools = await ShardRouter(pool).all_pools() if is_sharded() else [pool]
+    interval = settings.invalidation.INVALIDATION_POLL_MS / 1000.0
+    await asyncio.gather(*(_poll_node(VersionDAO(node_pool), interval) for node_pool in pools))
+
+
+async def _poll_node(dao, interval):
+    since, seen = None, {}
+    while since is None:
+        try:
+            since = await dao.latest_update() or 0
+        except Exception as e:
+            logger.warning(f"Polling entity_versions belum bisa dimulai: {str(e)}")
+            await asyncio.sleep(interval)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            rows = await dao.changed_since(since)
+        except Exception as e:
+            logger.warning(f"Polling entity_versions gagal: {str(e)}")
+            continue
+        changed = [
+            (row['entity'], row['entity_id'])
+            for row in rows
+            if seen.get((row['entity'], row['entity_id'])) != row['version']
+        ]
+        if rows:
+            since = max(row['updated_at'] for row in rows)
+            # Baris pada detik batas akan terbaca lagi; ingat versinya
+            seen = {
+                (row['entity'], row['entity_id']): row['version']
+                for row in rows if row['updated_at'] == since
+            }
+        if changed:
+            metrics.incr('invalidation.polled', len(changed))
+            bus.dispatch(version_events(changed), remote=True)
+
+
+def start_bus():
+    """Dipanggil saat app dibuat di setiap worker"""
+    bus.start()
+    if settings.invalidation.INVALIDATION_POLL_MS > 0:
+        from utils.cache import refresher
+        refresher.submit('invalidation.poll', poll_versions)
@@ -0,0 +1,38 @@
+import threading
+
+
+class MetricsRegistry:
+    """Counter sederhana per proses, aman dipakai lintas thread.
+
+    Komponen lain (admission, circuit breaker, cache) bisa mendaftarkan
+    collector yang dipanggil saat snapshot diambil.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def get(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def register_collector(self, name, collector):
+        with self._lock:
+            self._collectors[name] = collector
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(sorted(self._counters.items()))
+            collectors = dict(self._collectors)
+        return {
+            'counters': counters,
+            **{name: collector() for name, collector in collectors.items()}
+        }
+
+
+metrics = MetricsRegistry()
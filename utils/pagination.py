@@ -0,0 +1,65 @@
+import base64
+import json
+from urllib.parse import urlencode
+
+from utils.exceptions import InvalidDataError
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def encode_cursor(value):
+    """Cursor opaque (base64url) dari posisi terakhir halaman"""
+    raw = json.dumps(value, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, expected_type=int):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError):
+        value = None
+    if not isinstance(value, expected_type) or isinstance(value, bool):
+        raise InvalidDataError('cursor', cursor, 'Cursor tidak valid')
+    return value
+
+
+def parse_limit(value, default=DEFAULT_LIMIT):
+    if value is None:
+        return default
+    if value < 1 or value > MAX_LIMIT:
+        raise InvalidDataError('limit', value, f'Harus 1-{MAX_LIMIT}')
+    return value
+
+
+def keyset_page(rows, limit, key):
+    """Potong hasil query LIMIT limit+1 dan buat next_cursor dari baris terakhir"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'data': rows,
+        'pagination': {
+            'limit': limit,
+            'next_cursor': encode_cursor(rows[-1][key]) if has_more else None
+        }
+    }
+
+
+def pagination_headers(pagination, base_url, args):
+    """Header halaman berikutnya untuk endpoint yang body-nya tetap list.
+
+    X-Next-Cursor berisi cursor mentah, Link rel="next" berisi URL lengkap
+    dengan query string yang sama. Halaman terakhir tidak mendapat header.
+    """
+    next_cursor = pagination['next_cursor']
+    headers = {'X-Page-Limit': str(pagination['limit'])}
+    if next_cursor is None:
+        return headers
+    query = {k: v for k, v in args.items() if k != 'cursor'}
+    query['cursor'] = next_cursor
+    headers['X-Next-Cursor'] = next_cursor
+    headers['Link'] = f'<{base_url}?{urlencode(query)}>; rel="next"'
+    return headers
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from config import settings
+
+# bcrypt menerima cost 4-31; di bawah 10 terlalu lemah untuk produksi
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+_COST_RE = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def configured_rounds():
+    return settings.password.BCRYPT_ROUNDS
+
+
+def hash_password(password, rounds=None):
+    salt = bcrypt.gensalt(rounds=rounds or configured_rounds())
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def check_password(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def _bcrypt_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.password.BCRYPT_THREADS or os.cpu_count() or 1,
+                thread_name_prefix='bcrypt'
+            )
+        return _executor
+
+
+async def hash_password_async(password, rounds=None):
+    """hash_password di thread bcrypt: ratusan ms CPU tidak menahan event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_executor(), hash_password, password, rounds)
+
+
+async def check_password_async(password, hashed):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_executor(), check_password, password, hashed)
+
+
+def hash_rounds(hashed):
+    """Cost factor yang tertulis di hash bcrypt ($2b$12$...), None jika bukan bcrypt"""
+    match = _COST_RE.match(hashed or '')
+    return int(match.group(1)) if match else None
+
+
+def needs_rehash(hashed, rounds=None):
+    return hash_rounds(hashed) != (rounds or configured_rounds())
+
+
+def measure(rounds, samples=3):
+    """Median durasi satu hashpw (detik) pada host ini"""
+    durations = []
+    for _ in range(samples):
+        salt = bcrypt.gensalt(rounds=rounds)
+        started = time.perf_counter()
+        bcrypt.hashpw(b'calibration-password', salt)
+        durations.append(time.perf_counter() - started)
+    return sorted(durations)[len(durations) // 2]
+
+
+def calibrate(target_ms, min_rounds=MIN_ROUNDS, max_rounds=MAX_ROUNDS, samples=3):
+    """Pilih cost tertinggi yang durasi hash-nya masih <= target_ms.
+
+    Mengembalikan (rounds, {rounds: ms}). Berhenti mengukur begitu target
+    terlampaui karena setiap kenaikan cost menggandakan durasi.
+    """
+    timings = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        elapsed_ms = measure(rounds, samples) * 1000
+        timings[rounds] = round(elapsed_ms, 1)
+        if elapsed_ms > target_ms:
+            break
+        chosen = rounds
+    return chosen, timings
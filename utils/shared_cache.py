@@ -0,0 +1,331 @@
+"""Cache L2 bersama (di luar proses) untuk TTLCache(shared=True).
+
+CACHE_L2_URL memilih backend:
+- '' (default): nonaktif, cache hanya L1 per worker
+- 'redis://[:password@]host:port/db': server ber-protokol Redis (RESP)
+- 'memory://': pengganti lokal in-process dengan perintah yang sama,
+  untuk test dan development tanpa server Redis
+
+Entry disimpan bersama generation namespace cache-nya; clear() menaikkan
+generation (INCR) sehingga entry lama di L2 tidak terbaca lagi tanpa perlu
+SCAN/DEL. Server yang gagal dihubungi dilewati selama CACHE_L2_RETRY_S
+detik; request tetap dilayani dari L1/database.
+
+Socket L2 blocking tidak pernah disentuh dari event loop: semua perintah
+dijalankan satu thread executor per worker. get() di-await dari async view,
+set/delete/clear dikirim tanpa ditunggu; karena thread-nya tunggal,
+perintah dieksekusi sesuai urutan kirim (DEL/INCR invalidasi selalu
+mendahului GET berikutnya dari worker yang sama).
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from urllib.parse import urlparse
+
+from config import settings
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 200
+
+
+class ResponseError(Exception):
+    """Balasan error (-ERR ...) dari server"""
+
+
+class RespClient:
+    """Klien RESP minimal dan blocking; satu koneksi per thread.
+
+    Hanya dipanggil dari thread executor SharedCache, bukan dari event loop.
+    """
+
+    def __init__(self, host, port=6379, db=0, password=None, timeout=0.05):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = (sock, sock.makefile('rb'))
+        self._local.connection = connection
+        try:
+            if self.password:
+                self.execute('AUTH', self.password)
+            if self.db:
+                self.execute('SELECT', self.db)
+        except Exception:
+            self.close()
+            raise
+        return connection
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            for resource in reversed(connection):
+                try:
+                    resource.close()
+                except OSError:
+                    pass
+
+    def execute(self, *args):
+        connection = getattr(self._local, 'connection', None) or self._connect()
+        sock, reader = connection
+        try:
+            sock.sendall(self._pack(args))
+            return self._read(reader)
+        except ResponseError:
+            raise
+        except Exception:
+            # Balasan yang tertinggal membuat koneksi tidak sinkron lagi
+            self.close()
+            raise
+
+    @staticmethod
+    def _pack(args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    def _read(self, reader):
+        line = reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("Koneksi cache L2 terputus")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode('utf-8')
+        if kind == b'-':
+            raise ResponseError(payload.decode('utf-8'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Koneksi cache L2 terputus")
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            return None if length < 0 else [self._read(reader) for _ in range(length)]
+        raise ConnectionError(f"Balasan RESP tidak dikenal: {line!r}")
+
+
+class MemoryClient:
+    """Pengganti RespClient in-process (GET/MGET/SET PX/DEL/INCR/PING/FLUSHDB)"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def execute(self, command, *args):
+        command = command.upper()
+        keys = [arg if isinstance(arg, bytes) else str(arg).encode('utf-8') for arg in args]
+        with self._lock:
+            if command == 'PING':
+                return 'PONG'
+            if command == 'GET':
+                return self._get(keys[0])
+            if command == 'MGET':
+                return [self._get(key) for key in keys]
+            if command == 'SET':
+                expires_at = None
+                if len(keys) >= 4 and keys[2].upper() == b'PX':
+                    expires_at = time.monotonic() + int(keys[3]) / 1000.0
+                self._data[keys[0]] = (keys[1], expires_at)
+                return 'OK'
+            if command == 'DEL':
+                return sum(1 for key in keys if self._data.pop(key, None) is not None)
+            if command == 'INCR':
+                value = int(self._get(keys[0]) or 0) + 1
+                entry = self._data.get(keys[0])
+                self._data[keys[0]] = (str(value).encode('utf-8'), entry[1] if entry else None)
+                return value
+            if command == 'FLUSHDB':
+                self._data.clear()
+                return 'OK'
+        raise ResponseError(f"ERR unknown command '{command}'")
+
+    def close(self):
+        pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'__decimal__': str(value)}
+    if isinstance(value, bytes):
+        return {'__bytes__': base64.b64encode(value).decode('ascii')}
+    raise TypeError(f"Tipe {type(value).__name__} tidak bisa disimpan di cache L2")
+
+
+def _decode_value(obj):
+    if len(obj) == 1:
+        if '__datetime__' in obj:
+            return datetime.fromisoformat(obj['__datetime__'])
+        if '__date__' in obj:
+            return date.fromisoformat(obj['__date__'])
+        if '__decimal__' in obj:
+            return Decimal(obj['__decimal__'])
+        if '__bytes__' in obj:
+            return base64.b64decode(obj['__bytes__'])
+    return obj
+
+
+class SharedCache:
+    """Akses L2 untuk satu TTLCache; semua error ditelan (cache hanya optimasi)"""
+
+    def __init__(self, client, name, executor, prefix='lbs:cache:', retry_s=30):
+        self.client = client
+        self.executor = executor
+        self.name = name
+        self.prefix = f"{prefix}{name}:"
+        self.retry_s = retry_s
+        self._down_until = 0.0
+        self.hits = self.misses = self.errors = 0
+
+    def _key(self, key):
+        text = json.dumps(key, default=str, separators=(',', ':'))
+        if len(text) > MAX_KEY_LENGTH:
+            text = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        return f"{self.prefix}{text}"
+
+    def _call(self, *args):
+        if self._down_until > time.monotonic():
+            return None, False
+        try:
+            return self.client.execute(*args), True
+        except Exception as e:
+            self.errors += 1
+            self._down_until = time.monotonic() + self.retry_s
+            metrics.incr(f'cache.{self.name}.l2.error')
+            logger.warning(f"Cache L2 {self.name} tidak tersedia, hanya memakai L1: {str(e)}")
+            return None, False
+
+    def _submit(self, function, *args):
+        """Jalankan di thread L2 tanpa menunggu hasilnya"""
+        self.executor.submit(function, *args).add_done_callback(self._log_failure)
+
+    def _log_failure(self, future):
+        if future.exception() is not None:
+            logger.warning(f"Perintah cache L2 {self.name} gagal: {str(future.exception())}")
+
+    async def get(self, key):
+        """(value, umur detik, generation); value dan umur None jika miss,
+        semuanya None jika L2 tidak tersedia"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._get, key)
+
+    def _get(self, key):
+        reply, ok = self._call('MGET', f"{self.prefix}__generation__", self._key(key))
+        if not ok:
+            return None, None, None
+        generation, data = reply
+        generation = int(generation or 0)
+        if data is not None:
+            entry = json.loads(data, object_hook=_decode_value)
+            if entry['g'] == generation:
+                self.hits += 1
+                metrics.incr(f'cache.{self.name}.l2.hit')
+                return entry['v'], max(0.0, time.time() - entry['t']), generation
+        self.misses += 1
+        metrics.incr(f'cache.{self.name}.l2.miss')
+        return None, None, generation
+
+    def set(self, key, value, ttl, generation=None):
+        """generation dari get() sebelum value dimuat: value yang dimuat
+        sebelum clear() di worker lain tidak boleh memakai generation baru"""
+        self._submit(self._set, key, value, ttl, generation)
+
+    def _set(self, key, value, ttl, generation):
+        if generation is None:
+            reply, ok = self._call('GET', f"{self.prefix}__generation__")
+            if not ok:
+                return
+            generation = int(reply or 0)
+        data = json.dumps(
+            {'g': generation, 't': time.time(), 'v': value},
+            default=_encode_value, separators=(',', ':')
+        )
+        self._call('SET', self._key(key), data, 'PX', max(1, int(ttl * 1000)))
+
+    def delete(self, key):
+        self._submit(self._call, 'DEL', self._key(key))
+
+    def clear(self):
+        """Naikkan generation; get() berikutnya membaca generation baru"""
+        self._submit(self._call, 'INCR', f"{self.prefix}__generation__")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+_client = None
+_executor = None
+_client_lock = threading.Lock()
+
+
+def create_client(url, timeout):
+    parsed = urlparse(url)
+    if parsed.scheme == 'memory':
+        return MemoryClient()
+    if parsed.scheme != 'redis':
+        raise ValueError(f"CACHE_L2_URL tidak didukung: {url!r}")
+    return RespClient(
+        parsed.hostname or 'localhost',
+        parsed.port or 6379,
+        db=int(parsed.path.lstrip('/') or 0),
+        password=parsed.password,
+        timeout=timeout
+    )
+
+
+def shared_cache(name):
+    """SharedCache untuk cache bernama name, atau None jika L2 nonaktif"""
+    global _client, _executor
+    config = settings.shared_cache
+    if not config.CACHE_L2_URL:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = create_client(config.CACHE_L2_URL, config.CACHE_L2_TIMEOUT_MS / 1000.0)
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cache-l2')
+    return SharedCache(
+        _client, name, _executor, prefix=config.CACHE_L2_PREFIX, retry_s=config.CACHE_L2_RETRY_S
+    )
@@ -0,0 +1,83 @@
+import asyncio
+import concurrent.futures
+import copy
+import functools
+import threading
+
+from dao import replicas
+from utils.metrics import metrics
+
+
+def _freeze(value):
+    """Ubah argumen (list/dict) menjadi bentuk hashable untuk key"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+class SingleFlight:
+    """Gabungkan panggilan identik yang sedang berjalan menjadi satu query.
+
+    Panggilan pertama (leader) menjalankan query; panggilan lain dengan key
+    yang sama menunggu hasil leader. Di hypercorn semua request satu worker
+    berjalan di event loop yang sama (middlewares/wsgi_threads.py); di server
+    dev (app.run) setiap async view punya event loop sendiri, karena itu
+    dipakai concurrent.futures.Future yang aman lintas loop/thread.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    async def do(self, key, operation):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._calls[key] = future
+
+        if not leader:
+            metrics.incr(f'singleflight.{self.name}.coalesced')
+            # Salinan agar follower tidak berbagi objek mutable dengan leader
+            return copy.deepcopy(await asyncio.wrap_future(future))
+
+        metrics.incr(f'singleflight.{self.name}.executed')
+        try:
+            result = await operation()
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key):
+        # Lepas key sebelum hasil diumumkan: panggilan baru memulai query baru
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+def single_flight(name):
+    """Decorator untuk method service read-only; key = argumen selain self
+    dan tujuan routing baca (primary/replica) sesi pemanggil"""
+    group = SingleFlight(name)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            key = (replicas.route_key(), _freeze(args), _freeze(kwargs))
+            return await group.do(key, lambda: func(self, *args, **kwargs))
+
+        wrapper.group = group
+        return wrapper
+
+    return decorator
@@ -0,0 +1,220 @@
+import logging
+import re
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+# Kandidat hasil hitung posting yang diverifikasi ulang per query
+MAX_CANDIDATES = 500
+# Trigram yang muncul di lebih dari fraksi dokumen ini dilewati jika masih
+# ada trigram lain yang lebih selektif
+COMMON_TRIGRAM_RATIO = 0.1
+# Compact posting jika entry basi melebihi fraksi ini
+COMPACT_RATIO = 0.25
+
+
+def normalize(text):
+    return _NON_WORD.sub(' ', (text or '').casefold()).strip()
+
+
+def trigrams(text):
+    """Trigram per kata ala pg_trgm: kata diberi padding '  kata '"""
+    result = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def similarity(query_trigrams, text):
+    """Fraksi trigram query yang ada di teks (cocok untuk sebagian judul/nama)"""
+    if not query_trigrams:
+        return 0.0
+    return len(query_trigrams & trigrams(text)) / len(query_trigrams)
+
+
+class TrigramIndex:
+    """Indeks trigram in-memory untuk pencarian fuzzy judul/pengarang.
+
+    Posting disimpan sebagai array('I') berisi id buku. Update tidak
+    menghapus posting lama (hanya menambah trigram baru); kandidat selalu
+    diverifikasi ulang terhadap teks terkini, dan posting basi dibersihkan
+    lewat compaction berkala.
+    """
+
+    def __init__(self, fields=('judul', 'pengarang')):
+        self.fields = fields
+        self._docs = {}
+        self._postings = {}
+        self._stale = 0
+        self._entries = 0
+        self._lock = threading.RLock()
+        self._state = 'empty'
+        self._pending = []
+        self.built_at = None
+        self.build_seconds = None
+
+    @property
+    def ready(self):
+        return self._state == 'ready'
+
+    @property
+    def building(self):
+        return self._state == 'building'
+
+    def start_build(self):
+        """Tandai build dimulai; False jika build lain sedang berjalan"""
+        with self._lock:
+            if self._state == 'building':
+                return False
+            self._state = 'building'
+            self._pending = []
+            return True
+
+    def finish_build(self, rows):
+        """Ganti isi indeks dengan rows (dict id + fields) hasil snapshot"""
+        started = time.perf_counter()
+        docs = {row['id']: tuple(row[field] or '' for field in self.fields) for row in rows}
+        postings, entries = self._build_postings(docs)
+        with self._lock:
+            self._docs, self._postings = docs, postings
+            self._entries, self._stale = entries, 0
+            # Tulis yang terjadi selama snapshot dibaca
+            for operation, args in self._pending:
+                operation(*args)
+            self._pending = []
+            self._state = 'ready'
+            self.built_at = time.time()
+            self.build_seconds = round(time.perf_counter() - started, 3)
+        logger.info(f"Indeks trigram dibangun: {len(docs)} buku dalam {self.build_seconds}s")
+
+    def fail_build(self):
+        with self._lock:
+            self._state = 'empty'
+            self._pending = []
+
+    def _build_postings(self, docs):
+        postings = {}
+        entries = 0
+        for doc_id, values in docs.items():
+            for gram in self._doc_trigrams(values):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array('I')
+                posting.append(doc_id)
+                entries += 1
+        return postings, entries
+
+    def _doc_trigrams(self, values):
+        result = set()
+        for value in values:
+            result |= trigrams(value)
+        return result
+
+    def upsert(self, doc_id, **values):
+        with self._lock:
+            if self._state == 'building':
+                self._pending.append((self._apply_upsert, (doc_id, values)))
+            elif self._state == 'ready':
+                self._apply_upsert(doc_id, values)
+
+    def remove(self, doc_id):
+        with self._lock:
+            if self._state == 'building':
+                self._pending.append((self._apply_remove, (doc_id,)))
+            elif self._state == 'ready':
+                self._apply_remove(doc_id)
+
+    def _apply_upsert(self, doc_id, values):
+        old = self._docs.get(doc_id)
+        new = tuple(
+            values[field] if values.get(field) is not None else (old[i] if old else '')
+            for i, field in enumerate(self.fields)
+        )
+        old_grams = self._doc_trigrams(old) if old else set()
+        new_grams = self._doc_trigrams(new)
+        self._docs[doc_id] = new
+        for gram in new_grams - old_grams:
+            self._postings.setdefault(gram, array('I')).append(doc_id)
+            self._entries += 1
+        self._stale += len(old_grams - new_grams)
+        self._maybe_compact()
+
+    def _apply_remove(self, doc_id):
+        old = self._docs.pop(doc_id, None)
+        if old:
+            self._stale += len(self._doc_trigrams(old))
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._entries and self._stale > self._entries * COMPACT_RATIO:
+            self._postings, self._entries = self._build_postings(self._docs)
+            self._stale = 0
+            metrics.incr('trigram.compactions')
+
+    def search(self, keyword, limit=20, min_score=0.4):
+        """Kembalikan [(id, score)] terurut dari skor tertinggi"""
+        query = trigrams(keyword)
+        if not query:
+            return []
+
+        with self._lock:
+            postings = sorted(
+                (self._postings.get(gram, ()) for gram in query),
+                key=len
+            )
+            common = len(self._docs) * COMMON_TRIGRAM_RATIO
+            selective = [posting for posting in postings if len(posting) <= common]
+            # Minimal separuh trigram query dipakai agar typo tetap tertangkap
+            if len(selective) < (len(postings) + 1) // 2:
+                selective = postings
+
+            counts = Counter()
+            for posting in selective:
+                counts.update(posting)
+
+            results = []
+            for doc_id, _ in counts.most_common(MAX_CANDIDATES):
+                values = self._docs.get(doc_id)
+                if values is None:
+                    continue
+                score = max(similarity(query, value) for value in values)
+                if score >= min_score:
+                    results.append((doc_id, round(score, 3)))
+
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results[:limit]
+
+    def stats(self):
+        """Jumlah dokumen/trigram dan perkiraan memori (byte)"""
+        with self._lock:
+            postings_bytes = sum(
+                sys.getsizeof(gram) + sys.getsizeof(posting)
+                for gram, posting in self._postings.items()
+            ) + sys.getsizeof(self._postings)
+            docs_bytes = sys.getsizeof(self._docs) + sum(
+                sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+                for values in self._docs.values()
+            )
+            return {
+                'state': self._state,
+                'documents': len(self._docs),
+                'trigrams': len(self._postings),
+                'posting_entries': self._entries,
+                'stale_entries': self._stale,
+                'memory_bytes': postings_bytes + docs_bytes,
+                'built_at': self.built_at,
+                'build_seconds': self.build_seconds,
+            }
+
+
+book_index = TrigramIndex()
+metrics.register_collector('trigram_index', book_index.stats)